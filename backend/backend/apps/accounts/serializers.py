@@ -13,6 +13,7 @@ from rest_framework.validators import UniqueValidator
 from accounts.tasks import send_account_verification_email_async, send_password_reset_email_async
 from accounts.utils import TokenGenerator
 from commons import constants as commons_constant
+from commons.outbox import enqueue_task
 from commons.validators import PhoneNumberValidator
 
 AUTH_USER = get_user_model()
@@ -76,7 +77,7 @@ class UserPasswordSerializer(UserSerializer):
             )
         )
         # sending email to the user.
-        send_account_verification_email_async.delay(user.email, token)
+        enqueue_task(send_account_verification_email_async, user.email, token)
 
         return user
 
@@ -162,8 +163,8 @@ class ResendVerificationEmailSerializer(serializers.Serializer):
                 hours=commons_constant.EMAIL_VERIFICATION_EXPIRATION_TIME_HR
             )
         )
-        send_account_verification_email_async.delay(
-            self.context['user'].email, token
+        enqueue_task(
+            send_account_verification_email_async, self.context['user'].email, token
         )
         return token
 
@@ -223,7 +224,7 @@ class ForgetPasswordSerializer(serializers.Serializer):
                 hours=commons_constant.EMAIL_VERIFICATION_EXPIRATION_TIME_HR
             )
         )
-        send_password_reset_email_async.delay(self.user.email, token)
+        enqueue_task(send_password_reset_email_async, self.user.email, token)
         return token
 
 
@@ -5,6 +5,8 @@ from rest_framework.authtoken.models import Token
 
 from accounts.models import User
 from accounts.tasks import send_welcome_msg_with_questionnaire_async
+from commons.outbox import enqueue_task
+from surveys.inbox import add_user_mandatory_items
 from surveys.models import Questionnaire
 
 
@@ -15,6 +17,13 @@ def create_token(sender, instance=None, created=False, **kwargs):
         Token.objects.create(user=instance)
 
 
+@receiver(post_save, sender=User)
+def add_mandatory_inbox_items(sender, instance=None, created=False, **kwargs):
+    """ Method for adding the mandatory questionnaires to the inbox of a new user. """
+    if created:
+        add_user_mandatory_items(instance.id)
+
+
 @receiver(pre_save, sender=User)
 def send_welcome_email(sender, instance=None, **kwargs):
     """ Method for sending welcome msg and links to mandatory questionnaires to fill. """
@@ -22,6 +31,7 @@ def send_welcome_email(sender, instance=None, **kwargs):
         before_state = User.objects.get(id=instance.id).is_email_verified
         after_state = instance.is_email_verified
         if after_state == True and before_state == False:
-            send_welcome_msg_with_questionnaire_async.delay(
+            enqueue_task(
+                send_welcome_msg_with_questionnaire_async,
                 instance.get_full_name(), instance.email
             )
@@ -1,5 +1,4 @@
 import datetime
-from unittest.mock import patch
 
 from django.contrib.auth import get_user_model, authenticate
 from django.contrib.auth.hashers import make_password
@@ -10,8 +9,10 @@ from rest_framework import status
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APITestCase
 
+from accounts.tasks import send_account_verification_email_async, send_password_reset_email_async
 from accounts.utils import TokenGenerator
 from commons import constants as commons_constant
+from commons.models import OutboxEvent
 
 AUTH_USER = get_user_model()
 
@@ -38,8 +39,7 @@ class UserCreationAPITestCase(APITestCase):
         self.url = reverse('accounts:user-list')
 
     # Creation Success
-    @patch('accounts.serializers.send_account_verification_email_async')
-    def test_user_creation_success(self, mock_send_account_verification_email):
+    def test_user_creation_success(self):
         """ Test to check the successful creation of User with valid data. """
 
         data = get_user_data()
@@ -56,8 +56,12 @@ class UserCreationAPITestCase(APITestCase):
             AUTH_USER.objects.filter(email=data.get('email')).first()
         )
 
-        # Checking if the patched function is called in the API.
-        mock_send_account_verification_email.delay.assert_called()
+        # Checking if the email is enqueued in the outbox by the API.
+        self.assertTrue(
+            OutboxEvent.all_objects.filter(
+                task=send_account_verification_email_async.name
+            ).exists()
+        )
 
         expected_response_data.update({
             'id': AUTH_USER.objects.get(email=data.get('email')).id,
@@ -378,8 +382,7 @@ class ResendVerificationEmailAPITestCase(APITestCase):
     def setUp(self):
         self.url = reverse('accounts:resend-email')
 
-    @patch('accounts.serializers.send_account_verification_email_async')
-    def test_resend_verification_email_success(self, mock_send_account_verification_email):
+    def test_resend_verification_email_success(self):
         """ Testcase to successfully sending verification email to the user. """
         user = G(AUTH_USER)
 
@@ -392,10 +395,13 @@ class ResendVerificationEmailAPITestCase(APITestCase):
             response.data.get(commons_constant.RESPONSE_MSG),
             commons_constant.PASS_RESET_LINK_SUCC
         )
-        mock_send_account_verification_email.delay.assert_called()
+        self.assertTrue(
+            OutboxEvent.all_objects.filter(
+                task=send_account_verification_email_async.name
+            ).exists()
+        )
 
-    @patch('accounts.serializers.send_account_verification_email_async')
-    def test_resend_verification_email_failure(self, mock_send_account_verification_email):
+    def test_resend_verification_email_failure(self):
         """ Testcase to not sending verification email to the already verified user. """
         user = G(AUTH_USER, is_email_verified=True)
 
@@ -408,7 +414,11 @@ class ResendVerificationEmailAPITestCase(APITestCase):
             response.data.get(commons_constant.RESPONSE_MSG),
             commons_constant.PASS_RESET_LINK_SUCC
         )
-        mock_send_account_verification_email.delay.assert_not_called()
+        self.assertFalse(
+            OutboxEvent.all_objects.filter(
+                task=send_account_verification_email_async.name
+            ).exists()
+        )
 
 
 class LoginAPITestCase(APITestCase):
@@ -496,8 +506,7 @@ class ForgetPasswordAPITestCase(APITestCase):
     def setUp(self):
         self.url = reverse('accounts:forget')
 
-    @patch('accounts.serializers.send_password_reset_email_async')
-    def test_forget_password_success(self, mock_send_password_reset_email_async):
+    def test_forget_password_success(self):
         """ Test for forget password success. """
         user = G(AUTH_USER)
 
@@ -512,7 +521,11 @@ class ForgetPasswordAPITestCase(APITestCase):
             response.data.get(commons_constant.RESPONSE_MSG),
             commons_constant.PASS_RESET_LINK_SUCC
         )
-        mock_send_password_reset_email_async.delay.assert_called()
+        self.assertTrue(
+            OutboxEvent.all_objects.filter(
+                task=send_password_reset_email_async.name
+            ).exists()
+        )
 
     def test_forget_password_with_bad_email(self):
         """ Test for handling forget request with bad email. """
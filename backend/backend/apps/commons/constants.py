@@ -7,6 +7,9 @@ EMAIL_VERIFICATION_EXPIRATION_TIME_HR = 5
 DEFAULT_TOKEN_LENGTH = 20
 TOKEN_MAX_LENGTH = 100
 DEFAULT_RANDOM_STRING_LENGTH = 20
+RECEIPT_LENGTH = 32
+HASH_LENGTH = 64
+TASK_NAME_MAX_LENGTH = 255
 
 INTIAL_PASSWORD_LENGHT = 10
 RESPONSE_MSG = 'msg'
@@ -28,6 +31,35 @@ INVITE_SUCC_SENT = 'Invite Sent Successfully.'
 INVITE_ACCEPTED = 'Invite Accepted.'
 TOKEN_EXPIRED = 'Token Expired.'
 COUNT = 'Count'
+RESULTS = 'results'
+PERIOD = 'period'
+BUCKET = 'bucket'
+PERCENTILE = 'percentile'
+PERCENTILES = 'percentiles'
+START = 'start'
+END = 'end'
+UNIQUE_RESPONDENTS = 'unique_respondents'
+PERIOD_STARTED_AT = 'period_started_at'
+EMPLOYEE_COUNT = 'employee_count'
+COMPLETED_COUNT = 'completed_count'
+COMPLETION_RATE = 'completion_rate'
+PENDING = 'pending'
+NEXT = 'next'
+QUESTION = 'question'
+QUESTIONS = 'questions'
+ANSWER = 'answer'
+ANSWERS = 'answers'
+ANSWER_COUNT = 'count'
+RESPONSE_COUNT = 'response_count'
+RECEIPT = 'receipt'
+STATUS = 'status'
+IDEMPOTENCY_KEY_HEADER = 'Idempotency-Key'
+IDEMPOTENCY_KEY_REPLAYED_HEADER = 'Idempotent-Replayed'
+IDEMPOTENCY_KEY_IN_PROGRESS = 'A request with the same Idempotency-Key is in progress.'
+IDEMPOTENCY_KEY_REUSED = 'Idempotency-Key is already used for a different request.'
+INVALID_DATE_RANGE = 'start should not be after end.'
+TOO_MANY_BUCKETS = 'Date range has too many buckets.'
+SUBMISSION_QUEUED = 'Questionnaire submission accepted for processing.'
 RULE_DISABLE = 0
 RULE_ONBOARDING = 1
 RULE_ONCE = 2
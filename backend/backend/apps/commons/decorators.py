@@ -0,0 +1,110 @@
+import datetime
+import functools
+import hashlib
+import json
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from commons import constants as commons_constants
+from commons.models import IdempotencyKey
+
+
+def get_hash(*parts):
+    """ Returns sha256 hex digest of the given parts. """
+    return hashlib.sha256(
+        '\x00'.join(str(part) for part in parts).encode()
+    ).hexdigest()
+
+
+def idempotent(view_method):
+    """ Decorator for APIView methods to make requests with Idempotency-Key header idempotent.
+
+        First request with a key is executed and its successful response is stored,
+        requests retried with the same key are replied with the stored response without
+        executing the method again. Requests with the key of a request which is still in
+        progress are rejected, so that concurrent duplicates are not executed.
+        Keys are scoped to the requesting user and path, and expire after
+        IDEMPOTENCY_KEY_TTL seconds. Key of a request stopped before responding is
+        released after IDEMPOTENCY_KEY_LOCK_TIMEOUT seconds.
+    """
+
+    @functools.wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        header = request.META.get(
+            'HTTP_' + commons_constants.IDEMPOTENCY_KEY_HEADER.upper().replace('-', '_')
+        )
+        if not header:
+            return view_method(self, request, *args, **kwargs)
+
+        key = get_hash(request.user.id, request.method, request.path, header)
+        fingerprint = get_hash(
+            json.dumps(request.data, sort_keys=True, cls=JSONEncoder)
+        )
+        now = timezone.now()
+
+        # Evicting the expired entry of the key, or the entry of a request stopped before
+        # responding, so that it can be claimed again.
+        IdempotencyKey.all_objects.filter(key=key).filter(
+            Q(expires_at__lte=now) | Q(status_code=None, locked_until__lte=now)
+        ).delete()
+
+        try:
+            # Claiming the key, only one of the concurrent requests can insert it.
+            with transaction.atomic():
+                entry = IdempotencyKey.all_objects.create(
+                    key=key,
+                    fingerprint=fingerprint,
+                    expires_at=now + datetime.timedelta(
+                        seconds=settings.IDEMPOTENCY_KEY_TTL
+                    ),
+                    locked_until=now + datetime.timedelta(
+                        seconds=settings.IDEMPOTENCY_KEY_LOCK_TIMEOUT
+                    )
+                )
+        except IntegrityError:
+            entry = IdempotencyKey.all_objects.filter(key=key).first()
+
+            if entry is not None and entry.fingerprint != fingerprint:
+                return Response(
+                    {'detail': commons_constants.IDEMPOTENCY_KEY_REUSED},
+                    status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                )
+            if entry is None or entry.status_code is None:
+                return Response(
+                    {'detail': commons_constants.IDEMPOTENCY_KEY_IN_PROGRESS},
+                    status=status.HTTP_409_CONFLICT
+                )
+            return Response(
+                json.loads(entry.response),
+                status=entry.status_code,
+                headers={commons_constants.IDEMPOTENCY_KEY_REPLAYED_HEADER: 'true'}
+            )
+
+        # Entry is changed by its id, so that a request which outlived its lock doesn't
+        # change the entry of the request which claimed the key again.
+        try:
+            response = view_method(self, request, *args, **kwargs)
+        except Exception:
+            # Releasing the key, so that the request can be retried.
+            IdempotencyKey.all_objects.filter(id=entry.id).delete()
+            raise
+
+        if status.is_success(response.status_code):
+            IdempotencyKey.all_objects.filter(id=entry.id).update(
+                status_code=response.status_code,
+                response=json.dumps(response.data, cls=JSONEncoder),
+                locked_until=None
+            )
+        else:
+            IdempotencyKey.all_objects.filter(id=entry.id).delete()
+
+        return response
+
+    return wrapper
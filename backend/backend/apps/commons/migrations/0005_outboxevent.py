@@ -0,0 +1,32 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:07
+
+from django.db import migrations, models
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('commons', '0004_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('task', models.CharField(max_length=255)),
+                ('args', models.TextField(default='[]')),
+                ('kwargs', models.TextField(default='{}')),
+            ],
+            options={
+                'abstract': False,
+            },
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
@@ -102,3 +102,55 @@ class Invite(CommonBaseModel):
         if self.id is None:
             self.invite_token = self.generate_key()
         return super().save(*args, **kwargs)
+
+
+class IdempotencyKey(CommonBaseModel):
+    """ Model Definition of IdempotencyKey.
+
+        This model stores the response of the requests made with Idempotency-Key header,
+        so that the retried requests are replied with the stored response.
+
+        Model fields includes:-
+        1. key: hash of the user, requested path and the Idempotency-Key header.
+        2. fingerprint: hash of the request data, to detect reuse of key for other data.
+        3. status_code: status code of the response, null while request is in progress.
+        4. response: JSON of the response data.
+        5. expires_at: time after which this key is evicted.
+        6. locked_until: time until which the request is in progress, after which a key
+           having no response is evicted, as its request is stopped.
+    """
+
+    key = models.CharField(
+        max_length=commons_constants.HASH_LENGTH, unique=True
+    )
+    fingerprint = models.CharField(max_length=commons_constants.HASH_LENGTH)
+    status_code = models.IntegerField(null=True)
+    response = models.TextField(blank=True)
+    expires_at = models.DateTimeField(db_index=True)
+    locked_until = models.DateTimeField(null=True)
+
+    def __str__(self):
+        """ Unicode representation of IdempotencyKey model. """
+        return f'{self.key}'
+
+
+class OutboxEvent(CommonBaseModel):
+    """ Model Definition of OutboxEvent.
+
+        This model stores the celery tasks enqueued in a transaction, so that they are
+        sent to the broker only if the transaction commits, and after the rows they
+        read are visible to the workers.
+
+        Model fields includes:-
+        1. task: name of the registered celery task.
+        2. args: JSON of the positional arguments of the task.
+        3. kwargs: JSON of the keyword arguments of the task.
+    """
+
+    task = models.CharField(max_length=commons_constants.TASK_NAME_MAX_LENGTH)
+    args = models.TextField(default='[]')
+    kwargs = models.TextField(default='{}')
+
+    def __str__(self):
+        """ Unicode representation of OutboxEvent model. """
+        return f'{self.task}'
@@ -0,0 +1,88 @@
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from celery import current_app
+
+from commons import models as commons_models
+
+logger = logging.getLogger(__name__)
+
+# Name of the task relaying the outbox events to the broker.
+RELAY_TASK = 'commons.tasks.relay_outbox_events_async'
+
+# Cache key set while a relay is scheduled, so that the transactions committed meanwhile
+# don't schedule another one.
+RELAY_SCHEDULED_KEY = 'outbox:relay-scheduled'
+
+
+def enqueue_task(task, *args, **kwargs):
+    """ Method to send the celery task to the broker after the current transaction commits.
+
+        Task is stored in the outbox in the current transaction, so it is not sent if the
+        transaction rolls back and the worker sees the rows written by the transaction.
+        Outbox is relayed to the broker shortly after the commit.
+    """
+
+    commons_models.OutboxEvent.all_objects.create(
+        task=task.name,
+        args=json.dumps(args, cls=DjangoJSONEncoder),
+        kwargs=json.dumps(kwargs, cls=DjangoJSONEncoder),
+    )
+    transaction.on_commit(schedule_relay)
+
+
+def schedule_relay():
+    """ Schedules the relay of the outbox after OUTBOX_RELAY_DELAY seconds, unless one is
+        already scheduled, so that the events committed meanwhile are relayed together.
+    """
+    if cache.add(RELAY_SCHEDULED_KEY, True, settings.OUTBOX_RELAY_DELAY):
+        current_app.tasks[RELAY_TASK].apply_async(countdown=settings.OUTBOX_RELAY_DELAY)
+
+
+def relay_events(batch_size=None):
+    """ Sends the outbox events to the broker in batches of OUTBOX_RELAY_BATCH_SIZE over a
+        single producer, deleting them in the same transaction. Returns the number of
+        events sent.
+
+        Events are locked while sending, so that concurrent relays send different events.
+        Events of a batch which failed midway are sent again by the next relay, so tasks
+        are sent at least once.
+    """
+
+    batch_size = batch_size or settings.OUTBOX_RELAY_BATCH_SIZE
+    sent = 0
+
+    while True:
+        with transaction.atomic():
+            events = list(
+                commons_models.OutboxEvent.all_objects.select_for_update(
+                    skip_locked=True
+                ).order_by('id')[:batch_size]
+            )
+            if not events:
+                return sent
+
+            with current_app.producer_or_acquire() as producer:
+                for event in events:
+                    args = json.loads(event.args)
+                    kwargs = json.loads(event.kwargs)
+                    task = current_app.tasks.get(event.task)
+                    if task is None:
+                        # Task not registered in this process, sending it by name.
+                        logger.warning('Relaying unregistered task %s', event.task)
+                        current_app.send_task(
+                            event.task, args, kwargs, producer=producer
+                        )
+                    else:
+                        task.apply_async(args, kwargs, producer=producer)
+
+            commons_models.OutboxEvent.all_objects.filter(
+                id__in=[event.id for event in events]
+            ).delete()
+
+        sent += len(events)
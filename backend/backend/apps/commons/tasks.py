@@ -1,7 +1,11 @@
+from django.db.models import Q
+from django.utils import timezone
+
 from celery import shared_task
 
+from commons import outbox as commons_outbox
 from commons.utils import send_invite_email
-from commons.models import Invite
+from commons.models import Invite, IdempotencyKey
 
 
 @shared_task
@@ -13,3 +17,20 @@ def send_invite_email_asyc(sender, receiver, receiver_email, token):
         invite.change_invite_status(Invite.SENT)
     except Exception as e:
         invite.change_invite_status(Invite.SENT_FAILED)
+
+
+@shared_task
+def delete_expired_idempotency_keys():
+    """ Deleting the idempotency keys whose responses are expired, and the keys of the
+        requests stopped before responding.
+    """
+    now = timezone.now()
+    IdempotencyKey.all_objects.filter(
+        Q(expires_at__lte=now) | Q(status_code=None, locked_until__lte=now)
+    ).delete()
+
+
+@shared_task
+def relay_outbox_events_async():
+    """ Sending the tasks stored in the outbox to the broker. """
+    return commons_outbox.relay_events()
@@ -1,3 +1,151 @@
-from django.test import TestCase
+import datetime
+import socketserver
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.core.mail import get_connection
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from celery import current_app
+from ddf import G
+
+from commons import outbox as commons_outbox
+from commons.models import IdempotencyKey, OutboxEvent
+from commons.tasks import delete_expired_idempotency_keys
+from commons.utils import send_bulk_mail
+
+
+class SMTPStandInHandler(socketserver.StreamRequestHandler):
+    """ Handler speaking just enough SMTP for smtplib, recording the received messages. """
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def handle(self):
+        self.server.connections += 1
+        self.reply('220 localhost')
+        recipients = []
+        for line in self.rfile:
+            command = line.decode().strip()
+            verb = command[:4].upper()
+            if verb in ('EHLO', 'HELO', 'NOOP'):
+                self.reply('250 localhost')
+            elif verb in ('MAIL', 'RSET'):
+                recipients = []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                address = command.split(':', 1)[1].strip(' <>')
+                if address in self.server.refused:
+                    self.reply('550 Mailbox unavailable')
+                else:
+                    recipients.append(address)
+                    self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                for data_line in self.rfile:
+                    if data_line == b'.\r\n':
+                        break
+                self.server.messages.append(recipients)
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class SMTPStandIn(socketserver.ThreadingTCPServer):
+    """ Local SMTP server for testing the emails sent over the network. """
+
+    daemon_threads = True
+
+    def __init__(self, refused=()):
+        super().__init__(('127.0.0.1', 0), SMTPStandInHandler)
+        self.refused = set(refused)
+        self.connections = 0
+        self.messages = []
+
+
+@override_settings(BULK_EMAIL_CHUNK_SIZE=10)
+class BulkMailTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.server = SMTPStandIn(refused=['refused@example.com'])
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def get_connection(self):
+        """ Method for getting SMTP connection to the stand-in server. """
+        return get_connection(
+            'django.core.mail.backends.smtp.EmailBackend',
+            host='127.0.0.1',
+            port=self.server.server_address[1],
+            use_tls=False,
+            username='',
+            password=''
+        )
+
+    def test_send_bulk_mail(self):
+        """ Test that each recipient gets its own message over a single connection, and
+            failed recipient doesn't stop the others.
+        """
+
+        recipients = [(f'user{index}@example.com', {'name': index}) for index in range(25)]
+        recipients.insert(13, ('refused@example.com', {'name': 'refused'}))
+
+        failures = send_bulk_mail(
+            'Subject',
+            'email_mandatory_questionnaire_info.html',
+            recipients,
+            {'title': 'title'},
+            connection=self.get_connection()
+        )
+
+        self.assertEqual(list(failures), ['refused@example.com'])
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(
+            self.server.messages,
+            [[f'user{index}@example.com'] for index in range(25)]
+        )
+
+
+class OutboxTestCase(TestCase):
+
+    def setUp(self):
+        self.key = G(IdempotencyKey, expires_at=timezone.now() - datetime.timedelta(hours=1))
+
+    def test_enqueue_task_rolled_back(self):
+        """ Test that the task enqueued in a rolled back transaction is never sent. """
+
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                commons_outbox.enqueue_task(delete_expired_idempotency_keys)
+                raise RuntimeError
+
+        self.assertFalse(OutboxEvent.all_objects.exists())
+
+    def test_relay_events(self):
+        """ Test that the enqueued tasks are run only when relayed, in batches sharing a
+            producer, and are removed from the outbox.
+        """
+
+        for _ in range(5):
+            commons_outbox.enqueue_task(delete_expired_idempotency_keys)
+        self.assertTrue(IdempotencyKey.all_objects.filter(id=self.key.id).exists())
+
+        with mock.patch.object(
+            current_app, 'producer_or_acquire', wraps=current_app.producer_or_acquire
+        ) as producer_or_acquire:
+            self.assertEqual(commons_outbox.relay_events(batch_size=2), 5)
+
+        # Producers acquired by the relay, the given producer is reused by the tasks.
+        self.assertEqual(
+            [call for call in producer_or_acquire.call_args_list if not call[0]],
+            [mock.call()] * 3
+        )
+        self.assertFalse(IdempotencyKey.all_objects.filter(id=self.key.id).exists())
+        self.assertFalse(OutboxEvent.all_objects.exists())
+        self.assertEqual(commons_outbox.relay_events(), 0)
@@ -1,9 +1,15 @@
+import itertools
+import logging
+import smtplib
+
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.template.loader import render_to_string
 from django.urls import reverse_lazy
 from django.utils.html import strip_tags
 
+logger = logging.getLogger(__name__)
+
 
 def send_invite_email(sender, receiver, receiver_email, token):
     """ Method to send the Email to the user. """
@@ -30,3 +36,80 @@ def send_invite_email(sender, receiver, receiver_email, token):
 
     email.attach_alternative(html_content, 'text/html')
     email.send()
+
+
+class MessageBatch(list):
+    """ List of email messages remembering how many of them are iterated by the backend,
+        so that the message which failed while sending is known.
+    """
+
+    iterated = 0
+
+    def __iter__(self):
+        self.iterated = 0
+        for message in super().__iter__():
+            self.iterated += 1
+            yield message
+
+
+def send_bulk_mail(subject, template_name, recipients, context=None, connection=None):
+    """ Method to send a personalised email to each of the recipients.
+
+        recipients is an iterable of (email, recipient context) pairs, message of each
+        recipient is rendered with the context updated by its recipient context, so no
+        recipient sees the address of another.
+        Messages are sent in chunks of BULK_EMAIL_CHUNK_SIZE over one SMTP connection,
+        a failed recipient doesn't stop the others. Given connection is left open if it
+        was already opened, so that the caller can reuse it for more emails.
+        Returns dictionary of email to the error of the recipients which failed.
+    """
+
+    context = context or {}
+    connection = connection or get_connection()
+    recipients = iter(recipients)
+    failures = {}
+
+    # Connection is opened once and closed after sending all the chunks.
+    opened = connection.open()
+    try:
+        while True:
+            chunk = list(itertools.islice(recipients, settings.BULK_EMAIL_CHUNK_SIZE))
+            if not chunk:
+                break
+
+            messages = MessageBatch()
+            for email, recipient_context in chunk:
+                html_content = render_to_string(
+                    template_name, {**context, **recipient_context}
+                )
+                message = EmailMultiAlternatives(
+                    subject,
+                    strip_tags(html_content),
+                    settings.EMAIL_HOST_USER,
+                    [email],
+                    connection=connection
+                )
+                message.attach_alternative(html_content, 'text/html')
+                messages.append(message)
+
+            while messages:
+                try:
+                    connection.send_messages(messages)
+                    break
+                except Exception as e:
+                    # Failed before sending any message, like failing to connect.
+                    if not messages.iterated:
+                        raise
+                    failed = messages[messages.iterated - 1]
+                    failures[failed.to[0]] = str(e)
+                    logger.warning('Sending email to %s failed: %s', failed.to[0], e)
+                    if isinstance(e, smtplib.SMTPServerDisconnected):
+                        connection.close()
+                        connection.open()
+                    # Continuing with the messages after the failed one.
+                    messages = MessageBatch(messages[messages.iterated:])
+    finally:
+        if opened:
+            connection.close()
+
+    return failures
@@ -41,9 +41,10 @@ class CompanyQuestionnaireAdmin(CommonAdmin):
 @admin.register(companies_modals.QuestionnaireRule)
 class QuestionnaireRuleAdmin(CommonAdmin):
     list_display = (
-        'company', 'questionnaire', 'rule_type', 'notification', 'is_active'
+        'company', 'questionnaire', 'rule_type', 'crontab', 'enabled', 'next_run_at',
+        'is_active'
     )
-    list_filter = ('rule_type', 'is_active')
+    list_filter = ('rule_type', 'enabled', 'is_active')
     ordering = ('-updated_at',)
 
     def company(self, obj):
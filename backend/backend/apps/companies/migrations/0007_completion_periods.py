@@ -0,0 +1,60 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:57
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def set_ordinals(apps, schema_editor):
+    """ Numbers the existing employees of each company in order of joining, and starts the
+        current period of the company questionnaires from their creation.
+    """
+    Company = apps.get_model('companies', 'Company')
+    Employee = apps.get_model('companies', 'Employee')
+    CompanyQuestionnaire = apps.get_model('companies', 'CompanyQuestionnaire')
+
+    last_ordinals = {}
+    for employee_id, company_id in Employee.all_objects.order_by(
+        'company_id', 'created_at', 'id'
+    ).values_list('id', 'company_id'):
+        last_ordinals[company_id] = last_ordinals.get(company_id, -1) + 1
+        Employee.all_objects.filter(id=employee_id).update(ordinal=last_ordinals[company_id])
+
+    for company_id, last_ordinal in last_ordinals.items():
+        Company.all_objects.filter(id=company_id).update(last_employee_ordinal=last_ordinal)
+
+    CompanyQuestionnaire.all_objects.update(period_started_at=models.F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0006_remove_questionnairerule_last_notified'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='last_employee_ordinal',
+            field=models.IntegerField(default=-1),
+        ),
+        migrations.AddField(
+            model_name='companyquestionnaire',
+            name='period',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='companyquestionnaire',
+            name='period_started_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='ordinal',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(set_ordinals, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='employee',
+            constraint=models.UniqueConstraint(fields=('company', 'ordinal'), name='employee_ordinal_unique'),
+        ),
+    ]
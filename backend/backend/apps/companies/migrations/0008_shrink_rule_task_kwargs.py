@@ -0,0 +1,39 @@
+import json
+
+from django.db import migrations
+from django.utils import timezone
+
+
+def shrink_rule_task_kwargs(apps, schema_editor):
+    """ Replaces the employee emails stored in the kwargs of the rule tasks by the ids of
+        the company, questionnaire and rule, recipients are resolved by the task.
+    """
+    QuestionnaireRule = apps.get_model('companies', 'QuestionnaireRule')
+    PeriodicTask = apps.get_model('django_celery_beat', 'PeriodicTask')
+    PeriodicTasks = apps.get_model('django_celery_beat', 'PeriodicTasks')
+
+    rules = QuestionnaireRule.all_objects.exclude(notification=None).values_list(
+        'id', 'notification_id', 'company_questionnaire__company_id',
+        'company_questionnaire__questionnaire_id'
+    )
+    for rule_id, notification_id, company_id, questionnaire_id in rules.iterator():
+        PeriodicTask.objects.filter(id=notification_id).update(kwargs=json.dumps({
+            'company_id': company_id,
+            'questionnaire_id': questionnaire_id,
+            'rule_id': rule_id,
+        }))
+
+    # Telling the beat scheduler to reload the changed tasks.
+    PeriodicTasks.objects.update_or_create(ident=1, defaults={'last_update': timezone.now()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_celery_beat', '0015_edit_solarschedule_events_choices'),
+        ('companies', '0007_completion_periods'),
+    ]
+
+    operations = [
+        migrations.RunPython(shrink_rule_task_kwargs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_celery_beat', '0015_edit_solarschedule_events_choices'),
+        ('companies', '0008_shrink_rule_task_kwargs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questionnairerule',
+            name='crontab',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, to='django_celery_beat.CrontabSchedule'),
+        ),
+        migrations.AddField(
+            model_name='questionnairerule',
+            name='enabled',
+            field=models.BooleanField(default=True),
+        ),
+        migrations.AddField(
+            model_name='questionnairerule',
+            name='next_run_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+from django.utils import timezone
+
+
+def move_rule_schedules(apps, schema_editor):
+    """ Moves the crontab and state of the periodic task of each rule to the rule, and
+        deletes the periodic tasks. Next run time is set by the rule scheduler.
+    """
+    QuestionnaireRule = apps.get_model('companies', 'QuestionnaireRule')
+    PeriodicTask = apps.get_model('django_celery_beat', 'PeriodicTask')
+    PeriodicTasks = apps.get_model('django_celery_beat', 'PeriodicTasks')
+
+    rules = QuestionnaireRule.all_objects.exclude(notification=None).values_list(
+        'id', 'notification_id', 'notification__crontab_id', 'notification__enabled'
+    )
+    notification_ids = []
+    for rule_id, notification_id, crontab_id, enabled in rules.iterator():
+        QuestionnaireRule.all_objects.filter(id=rule_id).update(
+            crontab_id=crontab_id, enabled=enabled, next_run_at=None, notification=None
+        )
+        notification_ids.append(notification_id)
+
+    PeriodicTask.objects.filter(id__in=notification_ids).delete()
+    # Telling the beat scheduler to reload the tasks.
+    PeriodicTasks.objects.update_or_create(ident=1, defaults={'last_update': timezone.now()})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_celery_beat', '0015_edit_solarschedule_events_choices'),
+        ('companies', '0009_questionnairerule_schedule'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_rule_schedules, migrations.RunPython.noop),
+    ]
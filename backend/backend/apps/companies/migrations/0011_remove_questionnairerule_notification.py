@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:11
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0010_move_rule_schedules'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='questionnairerule',
+            name='notification',
+        ),
+    ]
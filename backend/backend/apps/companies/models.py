@@ -1,8 +1,10 @@
 from django.conf import settings
 from django.contrib.postgres.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
 
-from django_celery_beat.models import PeriodicTask
+from django_celery_beat.models import CrontabSchedule
 
 from commons import constants as commons_constant
 from commons.models import CommonBaseModel
@@ -29,6 +31,7 @@ class Company(CommonBaseModel):
         8. about: text describing the company,
         9. logo: Company's logo.
         10. is_verified: Boolean denoting whether this company is verified or not. 
+        11. last_employee_ordinal: ordinal given to the last joined employee.
     """
 
     # name should be unique.
@@ -49,11 +52,24 @@ class Company(CommonBaseModel):
     about = models.TextField()
     logo = models.ImageField(upload_to="company_logos", blank=True)
     is_verified = models.BooleanField(default=False)
+    last_employee_ordinal = models.IntegerField(default=-1)
 
     def __str__(self):
         """ Unicode Representation of Company Model. """
         return f'{self.name}'
 
+    @staticmethod
+    def next_employee_ordinal(company_id):
+        """ Returns ordinal for a new employee of the company.
+
+            Ordinals are never reused, incrementing the counter locks the company row
+            until the end of the transaction, so concurrent joins get distinct ordinals.
+        """
+        with transaction.atomic():
+            companies = Company.all_objects.filter(id=company_id)
+            companies.update(last_employee_ordinal=F('last_employee_ordinal') + 1)
+            return companies.values_list('last_employee_ordinal', flat=True).get()
+
 
 class Employee(CommonBaseModel):
     """ Model Definition of Employee. 
@@ -62,6 +78,8 @@ class Employee(CommonBaseModel):
         1. user: User which is the employee.
         2. company: Company to which this employee object belongs to.
         3. is_company_admin: Boolean to check if the employee is also a company admin.
+        4. ordinal: sequence number of the employee in the company, position of the
+           employee's bit in the completion bitmaps of the company.
     """
 
     # TODO: Handling case for soft deleting this model on deletion of User
@@ -77,6 +95,12 @@ class Employee(CommonBaseModel):
         related_name='employees'
     )
     is_company_admin = models.BooleanField(default=False)
+    ordinal = models.PositiveIntegerField(default=0)
+
+    def save(self, *args, **kwargs):
+        if not self.id:
+            self.ordinal = Company.next_employee_ordinal(self.company_id)
+        super().save(*args, **kwargs)
 
     def __str__(self):
         """ Unicode Representation for Employee Model. """
@@ -84,6 +108,11 @@ class Employee(CommonBaseModel):
 
     class Meta:
         ordering = ['-created_at']
+        constraints = (
+            models.UniqueConstraint(
+                fields=["company", "ordinal"], name="employee_ordinal_unique"
+            ),
+        )
 
 
 class CompanyAdvice(CommonBaseModel):
@@ -118,6 +147,10 @@ class CompanyQuestionnaire(CommonBaseModel):
         Model Fields Includes:-
         1. company: Company to which this instance belongs to.
         2. questionnaire: The question which is enabled by the company.
+        3. currently_active: Boolean denoting whether the questionnaire is enabled.
+        4. period: number of the current notification period, a new period starts
+           each time employees are notified to fill the questionnaire.
+        5. period_started_at: start time of the current notification period.
     """
 
     company = models.ForeignKey(
@@ -131,6 +164,8 @@ class CompanyQuestionnaire(CommonBaseModel):
         related_name='company_questionnaires',
     )
     currently_active = models.BooleanField(default=True)
+    period = models.PositiveIntegerField(default=0)
+    period_started_at = models.DateTimeField(default=timezone.now)
 
     def __str__(self):
         """ Unicode representation of CompanyQuestionnaires Model. """
@@ -152,7 +187,9 @@ class QuestionnaireRule(CommonBaseModel):
         Model fields includes:-
         1. company_questionnaire: Foreign key to company and questionnaire relation.
         2. rule: the type of rule imposed by the company.
-        3. time: this denotes when questionnaire notification should be sent.
+        3. crontab: this denotes when questionnaire notification should be sent.
+        4. enabled: whether the questionnaire notification is sent.
+        5. next_run_at: next time the questionnaire notification should be sent.
     """
 
     # Choice mappings for questionnaire rule type.
@@ -176,11 +213,14 @@ class QuestionnaireRule(CommonBaseModel):
     rule_type = models.IntegerField(
         choices=RULE_CHOICES, default=commons_constant.RULE_DISABLE)
     # last_notified = models.DateTimeField(null=True, blank=True)
-    notification = models.OneToOneField(
-        PeriodicTask,
+    crontab = models.ForeignKey(
+        CrontabSchedule,
         null=True,
-        on_delete=models.CASCADE
+        on_delete=models.PROTECT
     )
+    enabled = models.BooleanField(default=True)
+    # Rules are dispatched in order of this index by the rule scheduler.
+    next_run_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
     def __str__(self):
         """ Unicode Representation of Questionnaire Rule Model. """
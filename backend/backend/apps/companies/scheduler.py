@@ -0,0 +1,80 @@
+import logging
+
+from django.utils import timezone
+
+from celery.utils.time import ffwd
+
+from companies import models as companies_models
+
+logger = logging.getLogger(__name__)
+
+
+def get_next_run_at(crontab, after):
+    """ Returns the first time after the given time matching the crontab, in the timezone
+        of the crontab. Returns None if the crontab never matches.
+    """
+
+    schedule = crontab.schedule
+    try:
+        last_run_at, delta, now = schedule.remaining_delta(
+            after.astimezone(schedule.tz), ffwd=ffwd
+        )
+    except RuntimeError:
+        # Crontab like 31st of February.
+        logger.warning('Crontab %s never matches', crontab.id)
+        return None
+    return schedule.tz.normalize(last_run_at + delta)
+
+
+def schedule_rule(rule, after=None):
+    """ Sets the next run time of the rule from its crontab, rule is not saved. """
+    rule.next_run_at = get_next_run_at(
+        rule.crontab, after or timezone.now()
+    ) if rule.crontab_id is not None else None
+
+
+def schedule_new_rules(now=None):
+    """ Sets the next run time of the enabled rules which are not scheduled yet, like the
+        rules moved from their periodic tasks. Returns the number of rules scheduled.
+    """
+
+    now = now or timezone.now()
+    rules = list(
+        companies_models.QuestionnaireRule.objects.filter(
+            enabled=True, next_run_at=None
+        ).exclude(crontab=None).select_related('crontab')
+    )
+    for rule in rules:
+        schedule_rule(rule, now)
+    companies_models.QuestionnaireRule.objects.bulk_update(rules, ['next_run_at'])
+    return len(rules)
+
+
+def pop_due_rules(now=None):
+    """ Returns (company id, questionnaire id, rule id) of the enabled rules due by now,
+        moving their next run time to the next match of their crontab. Must be called in
+        a transaction, so that the returned rules are sent in the same transaction.
+
+        Rules are popped in order of the next run time index, runs missed while the
+        scheduler was down are sent once. Rules of inactive company questionnaires are
+        moved without being returned, so they are not sent late when activated again.
+    """
+
+    now = now or timezone.now()
+    rules = list(
+        companies_models.QuestionnaireRule.objects.select_for_update(
+            skip_locked=True, of=('self',)
+        ).filter(
+            enabled=True, next_run_at__lte=now
+        ).select_related('crontab', 'company_questionnaire').order_by('next_run_at')
+    )
+    for rule in rules:
+        schedule_rule(rule, now)
+    companies_models.QuestionnaireRule.objects.bulk_update(rules, ['next_run_at'])
+
+    return [
+        (rule.company_questionnaire.company_id,
+         rule.company_questionnaire.questionnaire_id,
+         rule.id)
+        for rule in rules if rule.company_questionnaire.currently_active
+    ]
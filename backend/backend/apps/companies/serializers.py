@@ -9,6 +9,7 @@ from django_celery_beat.models import CrontabSchedule, PeriodicTask
 
 from accounts.serializers import BasicUserSerializer
 from commons import constants as commons_constants
+from commons.outbox import enqueue_task
 from companies import models as companies_models
 from companies import tasks as companies_tasks
 from companies.utils import generate_random_string, partially_hide_string
@@ -119,7 +120,8 @@ class CompanyInviteSerializer(serializers.Serializer):
                 first_name=data['first_name'],
                 last_name=last_name
             )
-            companies_tasks.send_company_invite_email_async.delay(
+            enqueue_task(
+                companies_tasks.send_company_invite_email_async,
                 data['receiver_email'],
                 invite.token
             )
@@ -141,7 +143,8 @@ class CompanyInviteSerializer(serializers.Serializer):
                 last_name=last_name
             )
 
-            companies_tasks.send_company_invite_email_async.delay(
+            enqueue_task(
+                companies_tasks.send_company_invite_email_async,
                 data['receiver_email'],
                 invite.token,
                 password=password
@@ -310,10 +313,7 @@ class CompanyQuestionnaireRuleSerializer(serializers.ModelSerializer):
 
     crontab = CrontabSchedulePeriodicTaskSerializer(
         many=False,
-        source='notification.crontab'
-    )
-    enabled = serializers.BooleanField(
-        source='notification.enabled'
+        read_only=True
     )
 
     class Meta:
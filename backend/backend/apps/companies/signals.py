@@ -1,11 +1,14 @@
 from django.dispatch import receiver
-from django.db.models.signals import pre_save
-from django.db.models import Subquery
-
-from django_celery_beat.models import PeriodicTask
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.utils import timezone
 
+from commons.outbox import enqueue_task
+from companies import scheduler as companies_scheduler
 from companies.models import Company, Employee, CompanyQuestionnaire, QuestionnaireRule
 from companies.tasks import send_company_verification_mail_async
+from surveys import availability as surveys_availability
+from surveys import inbox as surveys_inbox
+from surveys import rollups as surveys_rollups
 
 
 @receiver(pre_save, sender=Company)
@@ -19,31 +22,96 @@ def send_verification_confirmation_mail(sender, instance=None, **kwargs):
                 admin_email = Employee.objects.get(
                     pk=instance.id
                 ).user.email
-                send_company_verification_mail_async.delay(
-                    instance.name, admin_email
+                enqueue_task(
+                    send_company_verification_mail_async, instance.name, admin_email
                 )
             except:
                 pass
 
 
-@receiver(pre_save, sender=CompanyQuestionnaire)
-def change_questionnaire_rule_state(sender, instance, **kwargs):
-    """ 
-    Callback method for changing QuestionnaireRule's PeriodicTask's state (i.e enabled)
-    depending upon the new state of CompanyQuestionnaire object
+@receiver(pre_save, sender=QuestionnaireRule)
+def schedule_questionnaire_rule(sender, instance=None, **kwargs):
+    """ Method to set the next run time of a new rule, and of a rule whose crontab is
+        changed or which is enabled again.
     """
     if instance.id is not None:
-        before_state = CompanyQuestionnaire.objects.get(
+        before_state = QuestionnaireRule.all_objects.filter(
             id=instance.id
-        ).currently_active
+        ).values_list('crontab_id', 'enabled').first()
+        if before_state == (instance.crontab_id, instance.enabled):
+            return
 
-        after_state = instance.currently_active
+    if instance.enabled:
+        companies_scheduler.schedule_rule(instance)
 
-        if before_state != after_state:
-            PeriodicTask.objects.filter(
-                questionnairerule__in=Subquery(
-                    QuestionnaireRule.objects.filter(
-                        company_questionnaire_id=instance.id
-                    ).values_list('id', flat=True)
-                )
-            ).update(enabled=after_state)
+
+@receiver(post_save, sender=CompanyQuestionnaire)
+@receiver(post_delete, sender=CompanyQuestionnaire)
+def invalidate_available_questionnaires(sender, instance=None, **kwargs):
+    """ Method to discard cached available questionnaires of the company. """
+    surveys_availability.invalidate_company(instance.company_id)
+
+
+@receiver(pre_save, sender=Employee)
+def store_employee_state(sender, instance=None, **kwargs):
+    """ Method to store whether the employee was active before saving. """
+    if instance.id is not None:
+        instance._was_active = Employee.all_objects.filter(
+            id=instance.id
+        ).values_list('is_active', flat=True).first()
+
+
+@receiver(post_save, sender=Employee)
+def update_fill_rates_employee_count(sender, instance=None, created=False, **kwargs):
+    """ Method to update employee count of daily fill rates on joining or leaving of employee. """
+
+    if created:
+        if instance.is_active:
+            surveys_rollups.update_employee_counts(
+                instance.company_id, surveys_rollups.get_local_date(instance.created_at), 1
+            )
+    elif getattr(instance, '_was_active', None) not in (None, instance.is_active):
+        surveys_rollups.update_employee_counts(
+            instance.company_id, timezone.localdate(), 1 if instance.is_active else -1
+        )
+
+
+@receiver(post_delete, sender=Employee)
+def update_fill_rates_deleted_employee(sender, instance=None, **kwargs):
+    """ Method to update employee count of daily fill rates on deletion of employee. """
+    if instance.is_active:
+        surveys_rollups.update_employee_counts(
+            instance.company_id, timezone.localdate(), -1
+        )
+
+
+@receiver(post_save, sender=CompanyQuestionnaire)
+def update_company_inbox_items(sender, instance=None, created=False, **kwargs):
+    """ Method to add the questionnaire enabled by the company to the inbox of its employees,
+        and to remove it when the company questionnaire is deleted.
+    """
+    if created:
+        surveys_inbox.add_company_items(instance.company_id, instance.questionnaire_id)
+    elif not instance.is_active:
+        surveys_inbox.remove_company_items(instance.id)
+
+
+@receiver(post_save, sender=Employee)
+def update_employee_inbox_items(sender, instance=None, created=False, **kwargs):
+    """ Method to add the company's questionnaires to the inbox of a joining employee, and
+        to remove them when the employee leaves.
+    """
+    if created:
+        if instance.is_active:
+            surveys_inbox.add_employee_items(instance.company_id, instance.user_id)
+    elif getattr(instance, '_was_active', None) not in (None, instance.is_active):
+        if instance.is_active:
+            surveys_inbox.add_employee_items(instance.company_id, instance.user_id)
+        else:
+            surveys_inbox.remove_employee_items(instance.company_id, instance.user_id)
+
+
+@receiver(post_delete, sender=Employee)
+def remove_deleted_employee_inbox_items(sender, instance=None, **kwargs):
+    """ Method to remove the company's questionnaires from the inbox of a deleted employee. """
+    surveys_inbox.remove_employee_items(instance.company_id, instance.user_id)
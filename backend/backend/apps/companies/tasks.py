@@ -1,9 +1,16 @@
-from celery import shared_task
+from django.conf import settings
+from django.db import transaction
 
+from celery import group, shared_task
+
+from commons.outbox import enqueue_task
+from companies import scheduler as companies_scheduler
 from companies.utils import (send_company_invite_email,
                              send_company_verification_email,
                              send_company_questionnaire_notification)
-from companies.models import CompanyInvite
+from companies.models import CompanyInvite, Employee, QuestionnaireRule
+from surveys.completions import start_period
+from surveys.inbox import add_company_items
 
 
 @shared_task
@@ -28,11 +35,75 @@ def send_company_verification_mail_async(company_name, admin_email, **kwargs):
         pass
 
 
+def get_notification_recipients(company_id):
+    """ Yields emails of the active employees of the company, fetched in chunks of
+        NOTIFICATION_RECIPIENT_CHUNK_SIZE employees by keyset pagination on the id.
+    """
+
+    last_id = 0
+    while True:
+        employees = list(
+            Employee.objects.filter(
+                company_id=company_id, id__gt=last_id, user__is_active=True
+            ).order_by('id').values_list(
+                'id', 'user__email'
+            )[:settings.NOTIFICATION_RECIPIENT_CHUNK_SIZE]
+        )
+        if not employees:
+            return
+        for employee_id, email in employees:
+            yield email
+        last_id = employees[-1][0]
+
+
 @shared_task
-def send_company_questionnaire_notification_async(emails, company_id, questionnaire_id):
-    """ Celery task for sending questionnaire notification to all employee """
-    send_company_questionnaire_notification(
-        emails,
+def send_company_questionnaire_notification_async(company_id, questionnaire_id,
+                                                  rule_id=None, **kwargs):
+    """ Celery task for sending questionnaire notification to all employee
+
+        Recipients are the employees of the company at the time of sending, emails
+        stored in the kwargs of the rules created before are ignored.
+    """
+    if rule_id is not None and not QuestionnaireRule.objects.filter(id=rule_id).exists():
+        # Rule is deleted.
+        return {}
+
+    # Employees are asked to fill the questionnaire again from now.
+    start_period(company_id, questionnaire_id)
+    add_company_items(company_id, questionnaire_id)
+    return send_company_questionnaire_notification(
+        get_notification_recipients(company_id),
         company_id,
         questionnaire_id
     )
+
+
+@shared_task
+def send_rule_notifications_async(rules):
+    """ Celery task for sending questionnaire notifications of the due rules, given as
+        (company id, questionnaire id, rule id), as a group having one task per rule.
+
+        Each rule is sent by its own task, so that rules are sent concurrently and a failed
+        or lost rule doesn't stop or resend the others.
+    """
+    if rules:
+        group(
+            send_company_questionnaire_notification_async.si(
+                company_id, questionnaire_id, rule_id
+            ) for company_id, questionnaire_id, rule_id in rules
+        ).apply_async()
+    return len(rules)
+
+
+@shared_task
+def dispatch_due_rules_async():
+    """ Celery task run every minute, sending notifications of all the rules due by now as
+        a single task.
+    """
+    companies_scheduler.schedule_new_rules()
+    with transaction.atomic():
+        rules = companies_scheduler.pop_due_rules()
+        if rules:
+            # Enqueued in the transaction moving the rules, so a due rule isn't lost.
+            enqueue_task(send_rule_notifications_async, rules)
+    return len(rules)
@@ -1,12 +1,26 @@
-from django.test import TestCase
+import datetime
+import json
+from unittest import mock
+
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.core import mail
+from django.db import transaction
 from django.urls import reverse
+from django.utils import timezone
 
 from ddf import G
+from django_celery_beat.models import PeriodicTask
+from rest_framework import status
 from rest_framework.test import APITestCase
 
+from commons.models import OutboxEvent
+from companies import scheduler as companies_scheduler
+from companies import tasks as companies_tasks
 from companies.serializers import CompanyInviteSerializer
-from companies.models import Company, Employee, CompanyInvite
+from companies.models import (Company, Employee, CompanyInvite, CompanyQuestionnaire,
+                              QuestionnaireRule)
+from surveys.models import Questionnaire
 
 AUTH_USER = get_user_model()
 
@@ -63,3 +77,170 @@ class CompanyInviteAPITest(APITestCase):
     def test_company_invite(self):
         url = reverse('companies:company-invite')
         print(url)
+
+
+@override_settings(NOTIFICATION_RECIPIENT_CHUNK_SIZE=2)
+class QuestionnaireRuleAPITest(APITestCase):
+
+    def setUp(self):
+        self.company = G(Company)
+        self.admin = G(Employee, company=self.company, is_company_admin=True)
+        self.company_questionnaire = G(
+            CompanyQuestionnaire, company=self.company, questionnaire=G(Questionnaire)
+        )
+        self.client.force_authenticate(user=self.admin.user)
+
+    def get_url(self, company_questionnaire, rule=None):
+        """ Method for getting url of the rules of the company questionnaire. """
+        kwargs = {
+            'company_id': self.company.id,
+            'questionnaire_id': company_questionnaire.id
+        }
+        if rule is None:
+            return reverse('companies:rule-list', kwargs=kwargs)
+        return reverse('companies:rule-detail', kwargs={**kwargs, 'pk': rule.id})
+
+    def create_rule(self, company_questionnaire=None, cron=None):
+        """ Method for creating a rule of the company questionnaire. """
+        company_questionnaire = company_questionnaire or self.company_questionnaire
+        response = self.client.post(
+            self.get_url(company_questionnaire),
+            data={'cron': cron or {'minute': '0', 'hour': '9'}},
+            format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return QuestionnaireRule.objects.filter(
+            company_questionnaire=company_questionnaire
+        ).latest('id')
+
+    def get_recipients(self):
+        """ Method for getting the recipients of the sent emails. """
+        return sorted(email for message in mail.outbox for email in message.to)
+
+    def test_rule_scheduled(self):
+        """ Test that rule is scheduled at the next match of its crontab, without a
+            periodic task of its own.
+        """
+
+        now = timezone.now()
+        rule = self.create_rule()
+
+        expected = now.replace(hour=9, minute=0, second=0, microsecond=0)
+        if expected <= now:
+            expected += datetime.timedelta(days=1)
+        self.assertEqual(rule.next_run_at, expected)
+        self.assertFalse(PeriodicTask.objects.exists())
+
+    def test_rule_enabled_again(self):
+        """ Test that rule enabled again is scheduled from now instead of its missed run. """
+
+        rule = self.create_rule()
+        response = self.client.put(
+            self.get_url(self.company_questionnaire, rule), data={'enabled': False}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        QuestionnaireRule.objects.filter(id=rule.id).update(
+            next_run_at=timezone.now() - datetime.timedelta(days=3)
+        )
+
+        response = self.client.put(
+            self.get_url(self.company_questionnaire, rule), data={'enabled': True}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rule.refresh_from_db()
+        self.assertGreater(rule.next_run_at, timezone.now())
+
+    def test_dispatch_due_rules(self):
+        """ Test that all the due rules are sent as one task and moved to their next run,
+            leaving out the disabled, not due and inactive ones.
+        """
+
+        now = timezone.now()
+        past = now - datetime.timedelta(hours=1)
+        due_rules = [self.create_rule(), self.create_rule(cron={'minute': '*/15'})]
+        not_due_rule = self.create_rule()
+        disabled_rule = self.create_rule()
+        disabled_rule.enabled = False
+        disabled_rule.save()
+        inactive_rule = self.create_rule(G(
+            CompanyQuestionnaire, company=self.company, questionnaire=G(Questionnaire),
+            currently_active=False
+        ))
+        QuestionnaireRule.objects.exclude(id=not_due_rule.id).update(next_run_at=past)
+        # Rule moved from its periodic task isn't scheduled yet.
+        QuestionnaireRule.objects.filter(id=due_rules[1].id).update(next_run_at=None)
+
+        with transaction.atomic():
+            self.assertEqual(companies_scheduler.schedule_new_rules(now), 1)
+            rules = companies_scheduler.pop_due_rules(now + datetime.timedelta(minutes=15))
+
+        self.assertEqual(sorted(rule[2] for rule in rules), [rule.id for rule in due_rules])
+        for rule in due_rules + [inactive_rule]:
+            rule.refresh_from_db()
+            self.assertGreater(rule.next_run_at, now + datetime.timedelta(minutes=15))
+        disabled_rule.refresh_from_db()
+        self.assertEqual(disabled_rule.next_run_at, past)
+
+        # Due rules are sent by a single task enqueued with the moved rules.
+        QuestionnaireRule.objects.filter(id=due_rules[0].id).update(next_run_at=past)
+        self.assertEqual(companies_tasks.dispatch_due_rules_async(), 1)
+        event = OutboxEvent.all_objects.get()
+        self.assertEqual(event.task, companies_tasks.send_rule_notifications_async.name)
+        self.assertEqual(json.loads(event.args), [[[
+            self.company.id, self.company_questionnaire.questionnaire_id, due_rules[0].id
+        ]]])
+
+    def test_recipients_resolved_at_fire_time(self):
+        """ Test that the employees at the time of sending are notified, leaving out the
+            inactive users.
+        """
+
+        rule = self.create_rule()
+        employees = [G(Employee, company=self.company) for _ in range(3)]
+        employees[0].user.is_active = False
+        employees[0].user.save()
+
+        companies_tasks.send_rule_notifications_async([
+            (self.company.id, self.company_questionnaire.questionnaire_id, rule.id)
+        ])
+
+        self.assertEqual(
+            self.get_recipients(),
+            sorted(employee.user.email for employee in [self.admin] + employees[1:])
+        )
+
+    def test_rules_sent_by_separate_tasks(self):
+        """ Test that each due rule is sent by its own task, a failed rule doesn't stop
+            the others.
+        """
+
+        rules = [self.create_rule() for _ in range(3)]
+        sent = []
+
+        def send(company_id, questionnaire_id, rule_id=None):
+            sent.append(rule_id)
+            if rule_id == rules[0].id:
+                raise RuntimeError('Mail server is down')
+
+        with mock.patch.object(
+            companies_tasks.send_company_questionnaire_notification_async, 'run',
+            side_effect=send
+        ):
+            companies_tasks.send_rule_notifications_async([
+                (self.company.id, self.company_questionnaire.questionnaire_id, rule.id)
+                for rule in rules
+            ])
+
+        self.assertEqual(sent, [rule.id for rule in rules])
+
+    def test_deleted_rule(self):
+        """ Test that nothing is sent for a deleted rule. """
+
+        rule = self.create_rule()
+        rule.delete()
+
+        companies_tasks.send_rule_notifications_async([
+            (self.company.id, self.company_questionnaire.questionnaire_id, rule.id)
+        ])
+
+        self.assertEqual(self.get_recipients(), [])
@@ -10,6 +10,7 @@ from django.urls import reverse_lazy
 from django.utils.html import strip_tags
 
 from commons import constants as commons_constant
+from commons.utils import send_bulk_mail
 
 from commons.constants import DEFAULT_TOKEN_LENGTH, DEFAULT_RANDOM_STRING_LENGTH
 
@@ -84,21 +85,16 @@ def send_company_verification_email(name, email, **kwargs):
 
 
 def send_company_questionnaire_notification(emails, company_id, questionnaire_id):
-    """ Method for sending questionnaire notification email """
+    """ Method for sending questionnaire notification email to each of the employees.
+
+        Returns dictionary of email to the error of the employees which failed.
+    """
 
     base = settings.FRONTEND_IP
     link = f'{base}/surveys/company/{company_id}/questionnaire/{questionnaire_id}'
-    html_content = render_to_string(
-        'questionnaire_notification.html', {'link': link}
-    )
-    text_content = strip_tags(html_content)
-
-    email = EmailMultiAlternatives(
+    return send_bulk_mail(
         'Questionnaire notification',
-        text_content,
-        settings.EMAIL_HOST_USER,
-        emails
+        'questionnaire_notification.html',
+        ((email, {}) for email in emails),
+        {'link': link}
     )
-
-    email.attach_alternative(html_content, 'text/html')
-    email.send()
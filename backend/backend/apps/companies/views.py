@@ -1,5 +1,3 @@
-import json
-
 from django.db.models import F, Q, Subquery, OuterRef, Exists
 from django.db import transaction
 
@@ -7,10 +5,9 @@ from rest_framework import viewsets, mixins, generics, status, views
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 
-from django_celery_beat.models import PeriodicTask
-
 from accounts.mixins import SerializerMixin
 from commons import constants as commons_constants
+from commons.decorators import idempotent
 from commons.permissions import IsEmailVerified
 from companies import models as companies_models
 from companies import serializers as companies_serializer
@@ -69,6 +66,7 @@ class CompanyInviteAPIView(generics.GenericAPIView):
     serializer_class = companies_serializer.CompanyInviteSerializer
     permission_classes = [IsAuthenticated, IsCompanyAdmin, IsCompanyVerified]
 
+    @idempotent
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -234,8 +232,7 @@ class QuestionnaireRuleViewSet(viewsets.ModelViewSet):
         """ 
         Overriding create and doing following
         1. Serializing crontab and creating crontab model object
-        2. Filtering all company employee's email id (to send email notifications later)
-        3. Creating PeriodicTask model object
+        2. Creating QuestionnaireRule model object sending notifications to the employees
         """
 
         company_questionnaire_id = kwargs['questionnaire_id']
@@ -262,27 +259,9 @@ class QuestionnaireRuleViewSet(viewsets.ModelViewSet):
         crontabSerializer.is_valid(raise_exception=True)
         crontabSerializer.save()
 
-        # Retrieving company employee's email to pass as the argument in PeriodicTask object
-        emails = companies_models.Employee.objects.filter(
-            company=company_id
-        ).values_list("user__email", flat=True)
-
-        # keyword argument to be passed to PeriodicTask
-        task_kwargs = {
-            "emails": list(emails),
-            "questionnaire_id": questionnaire[0],
-            "company_id": company_id
-        }
-
-        notification = PeriodicTask.objects.create(
-            name=companies_utils.generate_random_string(),
+        # Rule is sent by the rule scheduler from the next match of the crontab.
+        companies_models.QuestionnaireRule.objects.create(
             crontab_id=crontabSerializer.data['id'],
-            task='companies.tasks.send_company_questionnaire_notification_async',
-            kwargs=json.dumps(task_kwargs),
-        )
-
-        company_questionnaire_rule = companies_models.QuestionnaireRule.objects.create(
-            notification=notification,
             company_questionnaire_id=company_questionnaire_id
         )
         return Response("Success", status=status.HTTP_201_CREATED)
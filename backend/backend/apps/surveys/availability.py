@@ -0,0 +1,58 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+
+from surveys import models as surveys_models
+
+# Cache key of the generation of the cached available questionnaires, changed whenever
+# questionnaires themselves change, so that entries of all the companies are discarded.
+GENERATION_KEY = 'available-questionnaires:generation'
+
+
+def get_generation():
+    """ Returns the current generation of the available questionnaires cache. """
+
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Starting a new generation, as entries of the lost generation may be stale.
+        generation = uuid.uuid4().hex
+        cache.add(GENERATION_KEY, generation, None)
+        generation = cache.get(GENERATION_KEY, generation)
+    return generation
+
+
+def get_cache_key(company_id):
+    """ Returns cache key of the available questionnaires of the company. """
+    return f'available-questionnaires:{get_generation()}:{company_id}'
+
+
+def get_available_questionnaire_ids(company_id):
+    """ Returns ids of the questionnaires not added by the company, newest first.
+
+        Ids are cached per company until the company's questionnaires or any
+        questionnaire changes.
+    """
+
+    key = get_cache_key(company_id)
+    questionnaire_ids = cache.get(key)
+    if questionnaire_ids is None:
+        questionnaire_ids = list(
+            surveys_models.Questionnaire.objects.exclude(
+                company_questionnaires__company=company_id
+            ).order_by('-created_at').values_list('id', flat=True)
+        )
+        cache.set(
+            key, questionnaire_ids, settings.AVAILABLE_QUESTIONNAIRES_CACHE_TIMEOUT
+        )
+    return questionnaire_ids
+
+
+def invalidate_company(company_id):
+    """ Removes the cached available questionnaires of the company. """
+    cache.delete(get_cache_key(company_id))
+
+
+def invalidate_all():
+    """ Discards the cached available questionnaires of all the companies. """
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, None)
@@ -0,0 +1,91 @@
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Prefetch
+
+from rest_framework.renderers import JSONRenderer
+
+from surveys import models as surveys_models
+from surveys import serializers as surveys_serializers
+
+# Rendered questionnaire bundle with its entity tag.
+Bundle = namedtuple('Bundle', ('etag', 'content'))
+
+
+def get_bundle_etag(questionnaire_id, content_version):
+    """ Returns strong entity tag of the bundle of a questionnaire's content version. """
+    return f'"{questionnaire_id}-{content_version}"'
+
+
+def get_bundle_cache_key(questionnaire_id, content_version):
+    """ Returns cache key of the bundle of a questionnaire's content version. """
+    return f'questionnaire-bundle:{questionnaire_id}:{content_version}'
+
+
+def build_bundle(questionnaire_id):
+    """ Loads and renders the questionnaire with all of its questions, choices and tips.
+
+        Returns None if the questionnaire doesn't exist.
+    """
+
+    questionnaire = surveys_models.Questionnaire.objects.prefetch_related(
+        Prefetch(
+            'questions',
+            queryset=surveys_models.Question.objects.order_by('id').prefetch_related(
+                Prefetch(
+                    'choices',
+                    queryset=surveys_models.Choice.objects.order_by('id')
+                )
+            )
+        ),
+        Prefetch('tips', queryset=surveys_models.Tip.objects.order_by('id')),
+    ).filter(id=questionnaire_id).first()
+
+    if questionnaire is None:
+        return None
+
+    content = JSONRenderer().render(
+        surveys_serializers.QuestionnaireBundleSerializer(questionnaire).data
+    )
+    return Bundle(
+        get_bundle_etag(questionnaire.id, questionnaire.content_version), content
+    )
+
+
+def get_bundle(questionnaire_id, content_version):
+    """ Returns the cached bundle of the questionnaire's content version, building it if required.
+
+        Bundle is cached by its content version, so changed questionnaires are never
+        served from the cache and there is nothing to invalidate.
+    """
+
+    key = get_bundle_cache_key(questionnaire_id, content_version)
+    bundle = cache.get(key)
+    if bundle is None:
+        bundle = build_bundle(questionnaire_id)
+        # Content may have changed after reading the version, caching only the
+        # bundle of the requested version.
+        if bundle is not None and bundle.etag == get_bundle_etag(
+            questionnaire_id, content_version
+        ):
+            cache.set(key, bundle, settings.QUESTIONNAIRE_BUNDLE_CACHE_TIMEOUT)
+    return bundle
+
+
+def bump_content_version(questionnaire_ids):
+    """ Increments content version of the given questionnaires. """
+    if questionnaire_ids:
+        surveys_models.Questionnaire.all_objects.filter(
+            id__in=questionnaire_ids
+        ).update(content_version=F('content_version') + 1)
+
+
+def bump_instance_content_version(questionnaire):
+    """ Increments content version of the questionnaire, and sets the new version on the
+        instance so that it always describes the stored content.
+    """
+    bump_content_version([questionnaire.id])
+    questionnaire.content_version = surveys_models.Questionnaire.all_objects.values_list(
+        'content_version', flat=True
+    ).get(id=questionnaire.id)
@@ -0,0 +1,166 @@
+from collections import defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from companies import models as companies_models
+from surveys import models as surveys_models
+
+
+def to_bits(bitmap):
+    """ Returns the bitmap stored as little endian bytes as an integer. """
+    return int.from_bytes(bytes(bitmap or b''), 'little')
+
+
+def to_bitmap(bits):
+    """ Returns the integer as little endian bytes for storing. """
+    return bits.to_bytes((bits.bit_length() + 7) // 8, 'little')
+
+
+def count_bits(bits):
+    """ Returns the number of set bits. """
+    return bin(bits).count('1')
+
+
+def get_ordinals(bits, after=None, limit=None):
+    """ Returns the positions of the set bits in increasing order, only the positions
+        greater than after and at most limit positions if given.
+    """
+    if after is not None:
+        bits &= ~((1 << (after + 1)) - 1)
+    ordinals = []
+    while bits and (limit is None or len(ordinals) < limit):
+        lowest = bits & -bits
+        ordinals.append(lowest.bit_length() - 1)
+        bits ^= lowest
+    return ordinals
+
+
+def get_employee_bits(company_id):
+    """ Returns the bitmap of the current employees of the company. """
+    bits = 0
+    for ordinal in companies_models.Employee.objects.filter(
+        company_id=company_id
+    ).order_by().values_list('ordinal', flat=True).iterator():
+        bits |= 1 << ordinal
+    return bits
+
+
+def get_completed_bits(company_questionnaire):
+    """ Returns the bitmap of the employees who have submitted the company questionnaire in
+        its current notification period.
+    """
+    return to_bits(
+        surveys_models.CompletionBitmap.objects.filter(
+            company_questionnaire_id=company_questionnaire.id,
+            period=company_questionnaire.period
+        ).values_list('bitmap', flat=True).first()
+    )
+
+
+def start_period(company_id, questionnaire_id):
+    """ Starts a new notification period of the company questionnaire, every employee is
+        pending in the new period until submitting again.
+    """
+    companies_models.CompanyQuestionnaire.all_objects.filter(
+        company_id=company_id, questionnaire_id=questionnaire_id
+    ).update(period=F('period') + 1, period_started_at=timezone.now())
+
+
+def add_completions(questionnaire_responses):
+    """ Sets the bits of the employees of the questionnaire responses in the completion
+        bitmaps of the current periods of their company questionnaires.
+    """
+
+    questionnaire_responses = [
+        questionnaire_response for questionnaire_response in questionnaire_responses
+        if questionnaire_response.company_id is not None
+    ]
+    if not questionnaire_responses:
+        return
+
+    company_ids = {response.company_id for response in questionnaire_responses}
+    ordinals = {
+        (company_id, user_id): ordinal
+        for company_id, user_id, ordinal in companies_models.Employee.objects.filter(
+            company_id__in=company_ids,
+            user_id__in={response.user_id for response in questionnaire_responses}
+        ).values_list('company_id', 'user_id', 'ordinal')
+    }
+    company_questionnaires = {
+        (company_questionnaire.company_id, company_questionnaire.questionnaire_id):
+        company_questionnaire
+        for company_questionnaire in companies_models.CompanyQuestionnaire.objects.filter(
+            company_id__in=company_ids,
+            questionnaire_id__in={
+                response.questionnaire_id for response in questionnaire_responses
+            }
+        ).only('id', 'company_id', 'questionnaire_id', 'period', 'period_started_at')
+    }
+
+    bits = defaultdict(int)
+    for questionnaire_response in questionnaire_responses:
+        ordinal = ordinals.get(
+            (questionnaire_response.company_id, questionnaire_response.user_id)
+        )
+        company_questionnaire = company_questionnaires.get(
+            (questionnaire_response.company_id, questionnaire_response.questionnaire_id)
+        )
+        # Submissions of non employees, of questionnaires not enabled by the company and
+        # the backdated ones of the previous periods are left out.
+        if ordinal is None or company_questionnaire is None or \
+                questionnaire_response.created_at < company_questionnaire.period_started_at:
+            continue
+        bits[(company_questionnaire.id, company_questionnaire.period)] |= 1 << ordinal
+
+    for (company_questionnaire_id, period), new_bits in bits.items():
+        with transaction.atomic():
+            # Locking the stored bitmap, so that concurrent updates are not lost.
+            bitmaps = surveys_models.CompletionBitmap.all_objects.select_for_update().filter(
+                company_questionnaire_id=company_questionnaire_id, period=period
+            )
+            stored = bitmaps.first()
+
+            if stored is None:
+                try:
+                    with transaction.atomic():
+                        surveys_models.CompletionBitmap.all_objects.create(
+                            company_questionnaire_id=company_questionnaire_id,
+                            period=period,
+                            bitmap=to_bitmap(new_bits),
+                        )
+                    continue
+                except IntegrityError:
+                    # Created by a concurrent submission of the same period.
+                    stored = bitmaps.get()
+
+            stored_bits = to_bits(stored.bitmap)
+            if stored_bits | new_bits != stored_bits:
+                stored.bitmap = to_bitmap(stored_bits | new_bits)
+                stored.save(update_fields=['bitmap', 'updated_at'])
+
+
+def rebuild_completions(company_questionnaire):
+    """ Recalculates the completion bitmap of the current period of the company
+        questionnaire from the stored responses.
+    """
+
+    rows = surveys_models.QuestionnaireResponse.objects.filter(
+        company_id=company_questionnaire.company_id,
+        questionnaire_id=company_questionnaire.questionnaire_id,
+        created_at__gte=company_questionnaire.period_started_at,
+    ).values('user_id')
+
+    bits = 0
+    for ordinal in companies_models.Employee.objects.filter(
+        company_id=company_questionnaire.company_id, user_id__in=rows
+    ).values_list('ordinal', flat=True):
+        bits |= 1 << ordinal
+
+    surveys_models.CompletionBitmap.all_objects.update_or_create(
+        company_questionnaire_id=company_questionnaire.id,
+        period=company_questionnaire.period,
+        defaults={'bitmap': to_bitmap(bits)}
+    )
+    return count_bits(bits)
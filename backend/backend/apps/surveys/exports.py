@@ -0,0 +1,90 @@
+import csv
+import zlib
+
+from django.conf import settings
+
+from surveys import models as surveys_models
+
+# Columns of the exported csv, having one row per answer.
+EXPORT_COLUMNS = (
+    'response_id', 'submitted_at', 'user_email', 'user_first_name', 'user_last_name',
+    'questionnaire_id', 'questionnaire_title', 'score', 'risk_level',
+    'question_id', 'question_text', 'user_input',
+)
+
+RISK_LEVELS = dict(surveys_models.QuestionnaireResponse.RISK_LEVELS)
+
+
+class Echo(object):
+    """ File like object which returns the written value instead of storing it. """
+
+    def write(self, value):
+        return value
+
+
+def get_export_rows(company_id, questionnaire_id=None, start=None, end=None):
+    """ Yields the answers of the company's questionnaire responses as flat csv rows.
+
+        Rows are read in chunks with a server side cursor where the database supports it,
+        so memory used doesn't depend on the number of responses.
+        start and end are dates, both inclusive.
+    """
+
+    qs = surveys_models.QuestionResponse.objects.filter(
+        questionnaire_response__company_id=company_id,
+        questionnaire_response__is_active=True
+    )
+    if questionnaire_id is not None:
+        qs = qs.filter(questionnaire_response__questionnaire_id=questionnaire_id)
+    if start is not None:
+        qs = qs.filter(questionnaire_response__created_at__date__gte=start)
+    if end is not None:
+        qs = qs.filter(questionnaire_response__created_at__date__lte=end)
+
+    rows = qs.order_by('questionnaire_response_id', 'id').values_list(
+        'questionnaire_response_id',
+        'questionnaire_response__created_at',
+        'questionnaire_response__user__email',
+        'questionnaire_response__user__first_name',
+        'questionnaire_response__user__last_name',
+        'questionnaire_response__questionnaire_id',
+        'questionnaire_response__questionnaire__title',
+        'questionnaire_response__score',
+        'questionnaire_response__risk_level',
+        'question_id',
+        'question__text',
+        'user_input',
+    ).iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+
+    for row in rows:
+        row = list(row)
+        row[1] = row[1].isoformat()
+        row[8] = RISK_LEVELS.get(row[8], row[8])
+        yield row
+
+
+def stream_csv(rows):
+    """ Yields the csv lines of the header and the rows. """
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_COLUMNS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_gzip(chunks, buffer_size=64 * 1024):
+    """ Yields gzip compressed bytes of the text chunks as they are compressed. """
+
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    buffer = []
+    buffered = 0
+    for chunk in chunks:
+        chunk = chunk.encode()
+        buffer.append(chunk)
+        buffered += len(chunk)
+        # Compressing in blocks, as compressing each line separately is slower.
+        if buffered >= buffer_size:
+            compressed = compressor.compress(b''.join(buffer))
+            buffer, buffered = [], 0
+            if compressed:
+                yield compressed
+    yield compressor.compress(b''.join(buffer)) + compressor.flush()
@@ -0,0 +1,174 @@
+import datetime
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.mail import get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from surveys import models as surveys_models
+from surveys.utils import send_mandatory_questionnaire_info
+
+AUTH_USER = get_user_model()
+
+
+def get_chunk_bounds(chunk_size):
+    """ Yields (start id, end id) of consecutive chunks of the users having chunk_size
+        users each, users of a chunk have id greater than start id and up to end id.
+
+        Bounds are found by keyset pagination on the id, so each chunk costs one indexed
+        query however many users there are.
+    """
+
+    start_id = 0
+    while True:
+        end_id = AUTH_USER.objects.filter(id__gt=start_id).order_by('id').values_list(
+            'id', flat=True
+        )[chunk_size - 1:chunk_size].first()
+        if end_id is None:
+            # Last chunk having less than chunk_size users.
+            end_id = AUTH_USER.objects.filter(id__gt=start_id).order_by('-id').values_list(
+                'id', flat=True
+            ).first()
+            if end_id is not None:
+                yield start_id, end_id
+            return
+        yield start_id, end_id
+        start_id = end_id
+
+
+def create_fanout(questionnaire_id):
+    """ Returns the mail fanout of the questionnaire, splitting the current users into
+        chunks of MAIL_FANOUT_CHUNK_SIZE, and whether it is created now.
+
+        Users are informed about a mandatory questionnaire only once, existing fanout is
+        returned as it is.
+    """
+
+    with transaction.atomic():
+        fanout, created = surveys_models.MailFanout.all_objects.get_or_create(
+            questionnaire_id=questionnaire_id
+        )
+        if not created:
+            return fanout, created
+
+        chunks = [
+            surveys_models.MailFanoutChunk(
+                fanout=fanout, start_id=start_id, end_id=end_id, cursor=start_id
+            ) for start_id, end_id in get_chunk_bounds(settings.MAIL_FANOUT_CHUNK_SIZE)
+        ]
+        surveys_models.MailFanoutChunk.all_objects.bulk_create(chunks)
+        fanout.chunk_count = len(chunks)
+        fanout.save(update_fields=['chunk_count', 'updated_at'])
+
+    return fanout, created
+
+
+def get_lanes(chunk_ids, concurrency):
+    """ Returns the chunk ids split into at most concurrency lanes, chunks of a lane are
+        sent one after another.
+    """
+    return [lane for lane in (chunk_ids[index::concurrency] for index in range(concurrency)) if lane]
+
+
+def get_stopped_filter(now=None):
+    """ Returns filter of the chunks being sent whose progress is not saved for
+        MAIL_FANOUT_CHUNK_TIMEOUT seconds, as their task is stopped.
+    """
+    now = now or timezone.now()
+    return Q(
+        status=surveys_models.MailFanoutChunk.SENDING,
+        updated_at__lt=now - datetime.timedelta(seconds=settings.MAIL_FANOUT_CHUNK_TIMEOUT)
+    )
+
+
+def get_resumable_chunks(fanout_id):
+    """ Returns the chunks of the fanout which failed or whose task is stopped. Pending
+        chunks are left out, as they are still queued by the tasks sending the fanout.
+    """
+    return surveys_models.MailFanoutChunk.all_objects.filter(fanout_id=fanout_id).filter(
+        Q(status=surveys_models.MailFanoutChunk.FAILED) | get_stopped_filter()
+    )
+
+
+def claim_chunk(chunk_id):
+    """ Marks the chunk as being sent if it is pending, failed or its task is stopped.
+        Returns whether the chunk is claimed, only one of the concurrent tasks sending
+        the chunk can claim it.
+    """
+    now = timezone.now()
+    return surveys_models.MailFanoutChunk.all_objects.filter(id=chunk_id).filter(
+        Q(status__in=[
+            surveys_models.MailFanoutChunk.PENDING, surveys_models.MailFanoutChunk.FAILED
+        ]) | get_stopped_filter(now)
+    ).update(status=surveys_models.MailFanoutChunk.SENDING, updated_at=now) > 0
+
+
+def send_chunk(chunk_id):
+    """ Sends the mandatory questionnaire email to the users of the chunk after its cursor.
+
+        Cursor and counts are saved after every BULK_EMAIL_CHUNK_SIZE users, so a failed
+        chunk is resumed from the user after the last saved batch. Chunk already sent, or
+        being sent by another task, is left as it is.
+    """
+
+    if not claim_chunk(chunk_id):
+        return
+
+    chunk = surveys_models.MailFanoutChunk.all_objects.select_related(
+        'fanout__questionnaire'
+    ).get(id=chunk_id)
+
+    questionnaire = chunk.fanout.questionnaire
+    connection = get_connection()
+    try:
+        connection.open()
+        while True:
+            users = list(
+                AUTH_USER.objects.filter(
+                    id__gt=chunk.cursor, id__lte=chunk.end_id
+                ).order_by('id').values_list(
+                    'id', 'email', 'first_name'
+                )[:settings.BULK_EMAIL_CHUNK_SIZE]
+            )
+            if not users:
+                break
+
+            failures = send_mandatory_questionnaire_info(
+                ((email, first_name) for user_id, email, first_name in users),
+                questionnaire.id,
+                questionnaire.title,
+                questionnaire.description,
+                connection=connection
+            )
+            sent_count = len(users) - len(failures)
+
+            with transaction.atomic():
+                surveys_models.MailFanoutChunk.all_objects.filter(id=chunk.id).update(
+                    cursor=users[-1][0],
+                    sent_count=F('sent_count') + sent_count,
+                    failed_count=F('failed_count') + len(failures),
+                    # Progress of the chunk, so that it isn't taken as stopped.
+                    updated_at=timezone.now(),
+                )
+                surveys_models.MailFanout.all_objects.filter(id=chunk.fanout_id).update(
+                    sent_count=F('sent_count') + sent_count,
+                    failed_count=F('failed_count') + len(failures),
+                )
+            chunk.cursor = users[-1][0]
+
+    except Exception as e:
+        # Recording the failure instead of raising, so that other chunks of the lane
+        # are still sent.
+        surveys_models.MailFanoutChunk.all_objects.filter(id=chunk.id).update(
+            status=surveys_models.MailFanoutChunk.FAILED, error=str(e)
+        )
+        return
+
+    finally:
+        connection.close()
+
+    surveys_models.MailFanoutChunk.all_objects.filter(id=chunk.id).update(
+        status=surveys_models.MailFanoutChunk.SENT, error=''
+    )
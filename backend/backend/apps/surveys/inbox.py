@@ -0,0 +1,179 @@
+import functools
+import itertools
+import operator
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
+
+from companies import models as companies_models
+from surveys import completions as surveys_completions
+from surveys import models as surveys_models
+
+AUTH_USER = get_user_model()
+
+# Number of inbox items inserted per statement.
+INSERT_BATCH_SIZE = 1000
+
+
+def create_items(items):
+    """ Inserts the inbox items in chunks of INSERT_BATCH_SIZE, leaving out the ones which
+        are already in the inbox. Items are read from the iterable one chunk at a time.
+    """
+    items = iter(items)
+    while True:
+        chunk = list(itertools.islice(items, INSERT_BATCH_SIZE))
+        if not chunk:
+            return
+        surveys_models.InboxItem.all_objects.bulk_create(chunk, ignore_conflicts=True)
+
+
+def add_company_items(company_id, questionnaire_id):
+    """ Adds the questionnaire enabled by the company to the inbox of its current employees. """
+
+    company_questionnaire_id = companies_models.CompanyQuestionnaire.objects.filter(
+        company_id=company_id, questionnaire_id=questionnaire_id
+    ).values_list('id', flat=True).first()
+    if company_questionnaire_id is None:
+        return
+
+    create_items(
+        surveys_models.InboxItem(
+            user_id=user_id,
+            questionnaire_id=questionnaire_id,
+            company_questionnaire_id=company_questionnaire_id,
+        ) for user_id in companies_models.Employee.objects.filter(
+            company_id=company_id
+        ).values_list('user_id', flat=True).iterator()
+    )
+
+
+def add_employee_items(company_id, user_id):
+    """ Adds the questionnaires enabled by the company to the inbox of a new employee. """
+    create_items(
+        surveys_models.InboxItem(
+            user_id=user_id,
+            questionnaire_id=questionnaire_id,
+            company_questionnaire_id=company_questionnaire_id,
+        ) for company_questionnaire_id, questionnaire_id in
+        companies_models.CompanyQuestionnaire.objects.filter(
+            company_id=company_id
+        ).values_list('id', 'questionnaire_id')
+    )
+
+
+def remove_employee_items(company_id, user_id):
+    """ Removes the questionnaires of the company from the inbox of a leaving employee. """
+    surveys_models.InboxItem.all_objects.filter(
+        user_id=user_id, company_questionnaire__company_id=company_id
+    ).delete()
+
+
+def remove_company_items(company_questionnaire_id):
+    """ Removes the company questionnaire from the inbox of all the employees. """
+    surveys_models.InboxItem.all_objects.filter(
+        company_questionnaire_id=company_questionnaire_id
+    ).delete()
+
+
+def add_mandatory_items(questionnaire_id):
+    """ Adds the mandatory questionnaire to the inbox of the users who haven't filled it.
+
+        Users are read in chunks of INSERT_BATCH_SIZE by keyset pagination on the id, so
+        each chunk is a bounded query and insert.
+    """
+
+    last_id = 0
+    while True:
+        user_ids = list(
+            AUTH_USER.objects.filter(id__gt=last_id).order_by('id').values_list(
+                'id', flat=True
+            )[:INSERT_BATCH_SIZE]
+        )
+        if not user_ids:
+            return
+        filled_user_ids = set(
+            surveys_models.QuestionnaireResponse.objects.filter(
+                questionnaire_id=questionnaire_id, company=None, user_id__in=user_ids
+            ).values_list('user_id', flat=True)
+        )
+        create_items(
+            surveys_models.InboxItem(user_id=user_id, questionnaire_id=questionnaire_id)
+            for user_id in user_ids if user_id not in filled_user_ids
+        )
+        last_id = user_ids[-1]
+
+
+def add_user_mandatory_items(user_id):
+    """ Adds the published mandatory questionnaires to the inbox of a new user. """
+    create_items(
+        surveys_models.InboxItem(user_id=user_id, questionnaire_id=questionnaire_id)
+        for questionnaire_id in surveys_models.Questionnaire.objects.filter(
+            is_published=True, is_mandatory=True
+        ).values_list('id', flat=True)
+    )
+
+
+def remove_mandatory_items(questionnaire_id):
+    """ Removes the questionnaire from the inbox of the users as it is no more mandatory. """
+    surveys_models.InboxItem.all_objects.filter(
+        questionnaire_id=questionnaire_id, company_questionnaire=None
+    ).delete()
+
+
+def clear_items(questionnaire_responses):
+    """ Removes the submitted questionnaires from the inbox of the users.
+
+        Company questionnaire is removed only by the submissions made in its current
+        notification period.
+    """
+
+    conditions = [
+        Q(
+            user_id=questionnaire_response.user_id,
+            questionnaire_id=questionnaire_response.questionnaire_id,
+            company_questionnaire__company_id=questionnaire_response.company_id,
+            company_questionnaire__period_started_at__lte=questionnaire_response.created_at,
+        ) if questionnaire_response.company_id is not None else Q(
+            user_id=questionnaire_response.user_id,
+            questionnaire_id=questionnaire_response.questionnaire_id,
+            company_questionnaire=None,
+        ) for questionnaire_response in questionnaire_responses
+    ]
+    if conditions:
+        surveys_models.InboxItem.all_objects.filter(
+            functools.reduce(operator.or_, conditions)
+        ).delete()
+
+
+def rebuild_inbox():
+    """ Recalculates the inbox of all the users from the completion bitmaps of the current
+        notification periods and the responses of the mandatory questionnaires.
+
+        Returns the number of inbox items created.
+    """
+
+    with transaction.atomic():
+        surveys_models.InboxItem.all_objects.all().delete()
+
+        for company_questionnaire in companies_models.CompanyQuestionnaire.objects.iterator():
+            pending_bits = surveys_completions.get_employee_bits(
+                company_questionnaire.company_id
+            ) & ~surveys_completions.get_completed_bits(company_questionnaire)
+            create_items(
+                surveys_models.InboxItem(
+                    user_id=user_id,
+                    questionnaire_id=company_questionnaire.questionnaire_id,
+                    company_questionnaire_id=company_questionnaire.id,
+                ) for user_id, ordinal in companies_models.Employee.objects.filter(
+                    company_id=company_questionnaire.company_id
+                ).values_list('user_id', 'ordinal')
+                if pending_bits >> ordinal & 1
+            )
+
+        for questionnaire_id in surveys_models.Questionnaire.objects.filter(
+            is_published=True, is_mandatory=True
+        ).values_list('id', flat=True):
+            add_mandatory_items(questionnaire_id)
+
+        return surveys_models.InboxItem.all_objects.count()
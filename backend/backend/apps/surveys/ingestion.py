@@ -0,0 +1,246 @@
+import json
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from surveys import models as surveys_models
+from surveys import submissions as surveys_submissions
+
+# Statuses of the queued submissions.
+PENDING = 'PENDING'
+PROCESSING = 'PROCESSING'
+PROCESSED = 'PROCESSED'
+FAILED = 'FAILED'
+
+
+class SubmissionQueue(object):
+    """ Durable local queue of the validated submissions waiting to be written to the database.
+
+        Queue is stored in a SQLite file, so that the submissions survive restarts and the
+        queue can be shared by the web and worker processes of the same host.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or settings.SUBMISSION_QUEUE_PATH
+        with self.connect() as db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS submission ('
+                'receipt TEXT PRIMARY KEY, user_id INTEGER NOT NULL, '
+                'payload TEXT NOT NULL, status TEXT NOT NULL, claimed_at REAL, '
+                'response_id INTEGER, score INTEGER, error TEXT)'
+            )
+            db.execute(
+                'CREATE INDEX IF NOT EXISTS submission_status '
+                'ON submission (status, claimed_at)'
+            )
+
+    @contextmanager
+    def connect(self):
+        """ Yields a new connection to the queue in autocommit mode. """
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def enqueue(self, user_id, payload):
+        """ Appends the payload to the queue and returns its receipt. """
+
+        receipt = uuid.uuid4().hex
+        with self.connect() as db:
+            db.execute(
+                'INSERT INTO submission (receipt, user_id, payload, status) '
+                'VALUES (?, ?, ?, ?)',
+                (receipt, user_id, json.dumps(payload), PENDING)
+            )
+        return receipt
+
+    def claim(self, limit):
+        """ Marks next pending submissions as processing and returns them as (receipt, payload).
+
+            Submissions claimed by a worker which didn't complete them within the claim
+            timeout are claimed again.
+        """
+
+        now = time.time()
+        with self.connect() as db:
+            # Taking the write lock before reading, so that two workers can't claim
+            # the same submissions.
+            db.execute('BEGIN IMMEDIATE')
+            try:
+                rows = db.execute(
+                    'SELECT receipt, payload FROM submission '
+                    'WHERE status = ? OR (status = ? AND claimed_at < ?) '
+                    'ORDER BY rowid LIMIT ?',
+                    (PENDING, PROCESSING,
+                     now - settings.SUBMISSION_QUEUE_CLAIM_TIMEOUT, limit)
+                ).fetchall()
+                db.executemany(
+                    'UPDATE submission SET status = ?, claimed_at = ? WHERE receipt = ?',
+                    [(PROCESSING, now, receipt) for receipt, payload in rows]
+                )
+            except Exception:
+                db.execute('ROLLBACK')
+                raise
+            db.execute('COMMIT')
+        return [(receipt, json.loads(payload)) for receipt, payload in rows]
+
+    def complete(self, results):
+        """ Stores the (response id, score) of the processed receipts. """
+        with self.connect() as db:
+            db.executemany(
+                'UPDATE submission SET status = ?, response_id = ?, score = ? '
+                'WHERE receipt = ?',
+                [
+                    (PROCESSED, response_id, score, receipt)
+                    for receipt, (response_id, score) in results.items()
+                ]
+            )
+
+    def fail(self, errors):
+        """ Stores the errors of the receipts which could not be processed, leaving
+            the receipts processed meanwhile by another worker unchanged.
+        """
+        with self.connect() as db:
+            db.executemany(
+                'UPDATE submission SET status = ?, error = ? '
+                'WHERE receipt = ? AND status != ?',
+                [(FAILED, error, receipt, PROCESSED) for receipt, error in errors.items()]
+            )
+
+    def get(self, receipt):
+        """ Returns the queued submission of the receipt as dictionary or None. """
+        with self.connect() as db:
+            row = db.execute(
+                'SELECT receipt, user_id, status, response_id, score, error '
+                'FROM submission WHERE receipt = ?',
+                (receipt,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(
+            zip(('receipt', 'user_id', 'status', 'response_id', 'score', 'error'), row)
+        )
+
+
+def dump_submission(validated_data):
+    """ Returns JSON serializable payload of validated data of QuestionnaireResponseSerializer. """
+
+    company = validated_data.get('company')
+    question_responses = []
+    for question_response in validated_data['question_responses']:
+        answer = {
+            'question_id': question_response['question_id'],
+            'user_input': question_response['user_input'],
+        }
+        if 'score' in question_response:
+            answer['score'] = str(question_response['score'])
+        question_responses.append(answer)
+
+    return {
+        'user_id': validated_data['user'].id,
+        'company_id': company.id if company else None,
+        'questionnaire_id': validated_data['questionnaire'].id,
+        'questionnaire_version_id': validated_data.get('questionnaire_version_id'),
+        'question_responses': question_responses,
+    }
+
+
+def load_submission(receipt, payload):
+    """ Returns submission accepted by submissions.create_questionnaire_responses from payload. """
+
+    submission = dict(payload, receipt=receipt)
+    submission['question_responses'] = [
+        dict(answer, score=Decimal(answer['score'])) if 'score' in answer else answer
+        for answer in payload['question_responses']
+    ]
+    return submission
+
+
+def enqueue_submission(validated_data, queue=None):
+    """ Appends the validated submission to the queue and returns the receipt. """
+    queue = queue or SubmissionQueue()
+    return queue.enqueue(
+        validated_data['user'].id, dump_submission(validated_data)
+    )
+
+
+def drain_submission_queue(queue=None, batch_size=None):
+    """ Writes the queued submissions to the database in micro batches.
+
+        Each batch is inserted with multi row inserts in a single transaction, if a
+        batch fails its submissions are inserted one by one to find the failed ones.
+        Failed submissions, including the ones whose payload can't be loaded, are marked
+        failed so that they never block the queue.
+        Returns number of submissions processed.
+    """
+
+    queue = queue or SubmissionQueue()
+    batch_size = batch_size or settings.SUBMISSION_QUEUE_BATCH_SIZE
+    processed = 0
+
+    while True:
+        claimed = queue.claim(batch_size)
+        if not claimed:
+            return processed
+
+        # Submissions written by a worker which stopped before completing them.
+        results = {
+            receipt: (response_id, score)
+            for receipt, response_id, score in
+            surveys_models.QuestionnaireResponse.all_objects.filter(
+                receipt__in=[receipt for receipt, payload in claimed]
+            ).values_list('receipt', 'id', 'score')
+        }
+        pending = []
+        errors = {}
+        for receipt, payload in claimed:
+            if receipt in results:
+                continue
+            # Bad payload fails alone instead of failing the batch again on every claim.
+            try:
+                pending.append(load_submission(receipt, payload))
+            except Exception as e:
+                errors[receipt] = str(e)
+
+        try:
+            with transaction.atomic():
+                questionnaire_responses = \
+                    surveys_submissions.create_questionnaire_responses(pending)
+        except Exception:
+            questionnaire_responses = []
+            for submission in pending:
+                try:
+                    with transaction.atomic():
+                        questionnaire_responses.extend(
+                            surveys_submissions.create_questionnaire_responses(
+                                [submission]
+                            )
+                        )
+                except IntegrityError as e:
+                    # Submission written meanwhile by a worker which claimed it again
+                    # after the claim timeout.
+                    written = surveys_models.QuestionnaireResponse.all_objects.filter(
+                        receipt=submission['receipt']
+                    ).values_list('id', 'score').first()
+                    if written is None:
+                        errors[submission['receipt']] = str(e)
+                    else:
+                        results[submission['receipt']] = written
+                except Exception as e:
+                    errors[submission['receipt']] = str(e)
+
+        for questionnaire_response in questionnaire_responses:
+            results[questionnaire_response.receipt] = (
+                questionnaire_response.id, questionnaire_response.score
+            )
+
+        queue.complete(results)
+        queue.fail(errors)
+        processed += len(claimed)
@@ -0,0 +1,70 @@
+import argparse
+import sys
+
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_date
+
+from surveys import exports as surveys_exports
+
+
+def date_argument(value):
+    """ Returns the date of a YYYY-MM-DD argument, rejecting badly formatted dates. """
+    try:
+        date = parse_date(value)
+    except ValueError:
+        date = None
+    if date is None:
+        raise argparse.ArgumentTypeError(f'{value} is not a valid date (YYYY-MM-DD).')
+    return date
+
+
+class Command(BaseCommand):
+    """ Command for exporting the questionnaire responses of a company as csv. """
+
+    help = 'Exports answers of the questionnaire responses of a company as csv.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('company', type=int, help='Id of the company.')
+        parser.add_argument(
+            '--questionnaire', type=int, default=None,
+            help='Id of the questionnaire to export, defaults to all.'
+        )
+        parser.add_argument(
+            '--start', type=date_argument, default=None,
+            help='Export responses submitted on or after this date (YYYY-MM-DD).'
+        )
+        parser.add_argument(
+            '--end', type=date_argument, default=None,
+            help='Export responses submitted on or before this date (YYYY-MM-DD).'
+        )
+        parser.add_argument(
+            '--output', default=None, help='Path of the output file, defaults to stdout.'
+        )
+        parser.add_argument(
+            '--gzip', action='store_true', help='Compress the output with gzip.'
+        )
+
+    def handle(self, *args, **options):
+        chunks = surveys_exports.stream_csv(
+            surveys_exports.get_export_rows(
+                options['company'],
+                questionnaire_id=options['questionnaire'],
+                start=options['start'],
+                end=options['end'],
+            )
+        )
+        if options['gzip']:
+            chunks = surveys_exports.stream_gzip(chunks)
+        else:
+            chunks = (chunk.encode() for chunk in chunks)
+
+        if options['output'] is None:
+            self.write_chunks(chunks, sys.stdout.buffer)
+        else:
+            with open(options['output'], 'wb') as file:
+                self.write_chunks(chunks, file)
+
+    def write_chunks(self, chunks, file):
+        """ Method to write the chunks to the binary file. """
+        for chunk in chunks:
+            file.write(chunk)
@@ -0,0 +1,236 @@
+import csv
+import itertools
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from companies import models as companies_models
+from surveys import models as surveys_models
+from surveys import scoring as surveys_scoring
+from surveys import submissions as surveys_submissions
+
+AUTH_USER = get_user_model()
+
+NDJSON = 'ndjson'
+CSV = 'csv'
+
+# Columns of the csv file, having one row per answer. Consecutive rows having same
+# submission value are answers of the same submission.
+CSV_COLUMNS = (
+    'submission', 'user', 'company', 'questionnaire', 'created_at', 'question', 'user_input'
+)
+
+
+def read_ndjson(file):
+    """ Yields (line number, record) of a file having one submission JSON per line.
+
+        Each line is like {"user": email, "company": id or null, "questionnaire": id,
+        "created_at": ISO 8601 time, "question_responses": [{"question": id, "user_input": text}]}.
+    """
+
+    for line_number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            # Invalid lines are reported and skipped while resolving.
+            yield line_number, None
+            continue
+        answers = (record.get('question_responses') or []) if isinstance(record, dict) else None
+        if not isinstance(answers, list) or not all(
+            isinstance(answer, dict) for answer in answers
+        ):
+            # Lines not having the shape of a submission are reported like invalid lines.
+            yield line_number, None
+            continue
+        yield line_number, {
+            'user': record.get('user'),
+            'company': record.get('company'),
+            'questionnaire': record.get('questionnaire'),
+            'created_at': record.get('created_at'),
+            'question_responses': [
+                {'question_id': answer.get('question'), 'user_input': answer.get('user_input')}
+                for answer in answers
+            ],
+        }
+
+
+def read_csv(file):
+    """ Yields (line number, record) of a csv file having one answer per row. """
+
+    reader = csv.DictReader(file)
+    missing = set(CSV_COLUMNS) - set(reader.fieldnames or ())
+    if missing:
+        raise CommandError(f'Missing columns: {", ".join(sorted(missing))}')
+
+    # Line number of each row is taken when it is read, as the grouping reads the first row
+    # of the next submission before yielding a submission.
+    numbered_rows = ((reader.line_num, row) for row in reader)
+    for key, group in itertools.groupby(numbered_rows, key=lambda item: item[1]['submission']):
+        line_numbers, rows = zip(*group)
+        yield line_numbers[0], {
+            'user': rows[0]['user'],
+            'company': rows[0]['company'] or None,
+            'questionnaire': rows[0]['questionnaire'],
+            'created_at': rows[0]['created_at'],
+            'question_responses': [
+                {'question_id': row['question'], 'user_input': row['user_input']}
+                for row in rows
+            ],
+        }
+
+
+def batched(iterable, size):
+    """ Yields lists of size items of the iterable. """
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    """ Command for importing historical questionnaire submissions from a NDJSON or CSV file. """
+
+    help = 'Imports questionnaire submissions from a NDJSON or CSV file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path of the file to import.')
+        parser.add_argument(
+            '--format', choices=(NDJSON, CSV), default=None,
+            help='Format of the file, guessed from the extension by default.'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of submissions inserted at once.'
+        )
+        parser.add_argument(
+            '--commit-every', type=int, default=10,
+            help='Number of batches inserted per transaction.'
+        )
+
+    def load_lookups(self):
+        """ Method to preload the lookups required for resolving the records. """
+
+        self.plans = surveys_scoring.build_scoring_plans()
+        for questionnaire_id in surveys_models.Questionnaire.all_objects.values_list(
+            'id', flat=True
+        ):
+            self.plans.setdefault(questionnaire_id, {})
+        self.company_ids = set(
+            companies_models.Company.all_objects.values_list('id', flat=True)
+        )
+
+    def resolve(self, record, user_ids):
+        """ Method for converting a record into the submission accepted by the writer. """
+
+        if record is None:
+            raise ValidationError('Invalid record.')
+
+        user_id = user_ids.get(record['user'])
+        if user_id is None:
+            raise ValidationError(f'Unknown user {record["user"]}.')
+
+        company_id = record['company']
+        if company_id is not None:
+            company_id = int(company_id)
+            if company_id not in self.company_ids:
+                raise ValidationError(f'Unknown company {company_id}.')
+
+        questionnaire_id = int(record['questionnaire'])
+        plan = self.plans.get(questionnaire_id)
+        if plan is None:
+            raise ValidationError(f'Unknown questionnaire {questionnaire_id}.')
+
+        question_responses = [
+            dict(answer, question_id=int(answer['question_id']))
+            for answer in record['question_responses']
+        ]
+        surveys_scoring.score_answers(plan, question_responses)
+
+        created_at = None
+        if record['created_at']:
+            created_at = parse_datetime(record['created_at'])
+            if created_at is None:
+                raise ValidationError(f'Invalid time {record["created_at"]}.')
+            if timezone.is_naive(created_at):
+                created_at = timezone.make_aware(created_at)
+
+        return {
+            'user_id': user_id,
+            'company_id': company_id,
+            'questionnaire_id': questionnaire_id,
+            'created_at': created_at,
+            'question_responses': question_responses,
+        }
+
+    def import_batch(self, batch):
+        """ Method to insert a batch of records, returns number of rows inserted. """
+
+        # Resolving users of the whole batch in a single query.
+        user_ids = dict(
+            AUTH_USER.all_objects.filter(
+                email__in={record['user'] for line_number, record in batch if record}
+            ).values_list('email', 'id')
+        )
+
+        submissions = []
+        for line_number, record in batch:
+            try:
+                submissions.append(self.resolve(record, user_ids))
+            except (ValidationError, TypeError, ValueError, KeyError) as e:
+                self.skipped += 1
+                message = e.messages[0] if isinstance(e, ValidationError) else repr(e)
+                self.stderr.write(f'Line {line_number}: {message}')
+
+        surveys_submissions.create_questionnaire_responses(submissions)
+        self.imported += len(submissions)
+        return sum(
+            1 + len(submission['question_responses']) for submission in submissions
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or (CSV if path.endswith('.csv') else NDJSON)
+        reader = read_csv if file_format == CSV else read_ndjson
+
+        self.load_lookups()
+        self.imported = self.skipped = 0
+        rows = 0
+        start = time.monotonic()
+
+        with open(path, newline='') as file:
+            transaction.set_autocommit(False)
+            try:
+                batches = batched(reader(file), options['batch_size'])
+                for batch_number, batch in enumerate(batches, 1):
+                    rows += self.import_batch(batch)
+
+                    if batch_number % options['commit_every'] == 0:
+                        transaction.commit()
+                        self.report(rows, start)
+
+                transaction.commit()
+            except BaseException:
+                transaction.rollback()
+                raise
+            finally:
+                transaction.set_autocommit(True)
+
+        self.report(rows, start)
+
+    def report(self, rows, start):
+        """ Method to write the progress of the import. """
+        elapsed = max(time.monotonic() - start, 1e-9)
+        self.stdout.write(
+            f'{self.imported} submissions imported, {self.skipped} skipped, '
+            f'{rows} rows in {elapsed:.1f}s ({rows / elapsed:.0f} rows/s).'
+        )
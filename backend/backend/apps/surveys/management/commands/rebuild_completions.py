@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from companies import models as companies_models
+from surveys.completions import rebuild_completions
+
+
+class Command(BaseCommand):
+    """ Command for rebuilding the completion bitmaps of the current notification periods
+        from the stored questionnaire responses.
+    """
+
+    help = 'Rebuilds completion bitmaps of the current periods from questionnaire responses.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company', type=int, action='append', dest='companies',
+            help='Id of the company to rebuild, can be repeated. Defaults to all.'
+        )
+
+    def handle(self, *args, **options):
+        company_questionnaires = companies_models.CompanyQuestionnaire.objects.all()
+        if options['companies']:
+            company_questionnaires = company_questionnaires.filter(
+                company_id__in=options['companies']
+            )
+
+        completed = 0
+        for company_questionnaire in company_questionnaires.iterator():
+            completed += rebuild_completions(company_questionnaire)
+        self.stdout.write(f'{completed} completions set.')
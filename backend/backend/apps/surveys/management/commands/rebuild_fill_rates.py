@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from surveys.rollups import rebuild_fill_rates
+
+
+class Command(BaseCommand):
+    """ Command for rebuilding the daily fill rates from the stored questionnaire responses. """
+
+    help = 'Rebuilds daily fill rates of the companies from questionnaire responses.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--company', type=int, action='append', dest='companies',
+            help='Id of the company to rebuild, can be repeated. Defaults to all.'
+        )
+
+    def handle(self, *args, **options):
+        created = rebuild_fill_rates(options['companies'])
+        self.stdout.write(f'{created} daily fill rates created.')
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from surveys.inbox import rebuild_inbox
+
+
+class Command(BaseCommand):
+    """ Command for rebuilding the inbox of the users from the completion bitmaps and the
+        responses of the mandatory questionnaires.
+    """
+
+    help = 'Rebuilds the pending questionnaires inbox of all the users.'
+
+    def handle(self, *args, **options):
+        created = rebuild_inbox()
+        self.stdout.write(f'{created} inbox items created.')
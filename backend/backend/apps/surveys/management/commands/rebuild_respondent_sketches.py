@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from surveys.rollups import rebuild_respondent_sketches
+
+
+class Command(BaseCommand):
+    """ Command for rebuilding the respondent sketches from the stored questionnaire responses. """
+
+    help = 'Rebuilds daily respondent sketches from questionnaire responses.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--questionnaire', type=int, action='append', dest='questionnaires',
+            help='Id of the questionnaire to rebuild, can be repeated. Defaults to all.'
+        )
+
+    def handle(self, *args, **options):
+        created = rebuild_respondent_sketches(options['questionnaires'])
+        self.stdout.write(f'{created} respondent sketches created.')
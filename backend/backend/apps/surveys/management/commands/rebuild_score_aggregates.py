@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from surveys.rollups import rebuild_score_aggregates
+
+
+class Command(BaseCommand):
+    """ Command for rebuilding the score aggregates from the stored questionnaire responses. """
+
+    help = 'Rebuilds score aggregates of the users from questionnaire responses.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--questionnaire', type=int, action='append', dest='questionnaires',
+            help='Id of the questionnaire to rebuild, can be repeated. Defaults to all.'
+        )
+
+    def handle(self, *args, **options):
+        created = rebuild_score_aggregates(options['questionnaires'])
+        self.stdout.write(f'{created} score aggregates created.')
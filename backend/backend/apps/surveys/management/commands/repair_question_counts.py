@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from surveys.utils import update_question_counts
+
+
+class Command(BaseCommand):
+    """ Command for correcting the stored question_count of questionnaires. """
+
+    help = 'Recalculates question_count of the questionnaires having an incorrect count.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--questionnaire', type=int, action='append', dest='questionnaires',
+            help='Id of the questionnaire to repair, can be repeated. Defaults to all.'
+        )
+
+    def handle(self, *args, **options):
+        repaired = update_question_counts(options['questionnaires'])
+        self.stdout.write(f'{repaired} questionnaires repaired.')
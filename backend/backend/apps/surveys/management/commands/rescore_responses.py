@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from surveys import models as surveys_models
+from surveys.rescoring import rescore_questionnaire
+from surveys.rollups import rebuild_score_aggregates, rebuild_score_counts
+
+
+class Command(BaseCommand):
+    """ Command for recalculating score and risk level of the stored questionnaire responses. """
+
+    help = 'Recalculates score and risk level of questionnaire responses with current weightages.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--questionnaire', type=int, action='append', dest='questionnaires',
+            help='Id of the questionnaire to rescore, can be repeated. Defaults to all.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=None,
+            help='Number of responses scored at once.'
+        )
+
+    def handle(self, *args, **options):
+        questionnaire_ids = options['questionnaires'] or \
+            surveys_models.Questionnaire.all_objects.values_list('id', flat=True)
+
+        for questionnaire_id in questionnaire_ids:
+            start = time.monotonic()
+            processed, updated = rescore_questionnaire(
+                questionnaire_id, chunk_size=options['chunk_size']
+            )
+            self.stdout.write(
+                f'Questionnaire {questionnaire_id}: {processed} responses processed, '
+                f'{updated} updated in {time.monotonic() - start:.2f}s.'
+            )
+
+        # Aggregates and histograms are made of the old scores.
+        rebuild_score_aggregates(options['questionnaires'])
+        rebuild_score_counts(options['questionnaires'])
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from surveys import models as surveys_models
+from surveys.tasks import resume_mail_fanout_async
+
+
+class Command(BaseCommand):
+    """ Command for resending the failed chunks of the mandatory questionnaire email. """
+
+    help = 'Sends the chunks of the mandatory questionnaire email which failed or stopped.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('questionnaire', type=int, help='Id of the questionnaire.')
+
+    def handle(self, *args, **options):
+        fanout = surveys_models.MailFanout.all_objects.filter(
+            questionnaire_id=options['questionnaire']
+        ).first()
+        if fanout is None:
+            raise CommandError('Questionnaire has no mail fanout.')
+
+        resume_mail_fanout_async.delay(fanout.id)
+        self.stdout.write(
+            f'{fanout.sent_count} sent and {fanout.failed_count} failed so far, '
+            f'resuming the failed and stopped chunks.'
+        )
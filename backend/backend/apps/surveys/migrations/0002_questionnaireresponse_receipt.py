@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questionnaireresponse',
+            name='receipt',
+            field=models.CharField(blank=True, editable=False, max_length=32, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0002_questionnaireresponse_receipt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questionnaire',
+            name='content_version',
+            field=models.PositiveIntegerField(default=1, editable=False),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:44
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0003_questionnaire_content_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionnaireVersion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('content_version', models.PositiveIntegerField()),
+                ('snapshot', models.TextField(editable=False)),
+                ('questionnaire', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='surveys.Questionnaire')),
+            ],
+            options={
+                'unique_together': {('questionnaire', 'content_version')},
+            },
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='questionnaireresponse',
+            name='questionnaire_version',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='questionnaire_responses', to='surveys.QuestionnaireVersion'),
+        ),
+    ]
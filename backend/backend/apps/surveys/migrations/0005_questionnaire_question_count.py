@@ -0,0 +1,32 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:45
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def set_question_counts(apps, schema_editor):
+    """ Sets question_count of the existing questionnaires. """
+    Questionnaire = apps.get_model('surveys', 'Questionnaire')
+    counts = Questionnaire.questions.through.objects.values(
+        'questionnaire_id'
+    ).annotate(count=Count('id')).order_by()
+    for row in counts:
+        Questionnaire.objects.filter(id=row['questionnaire_id']).update(
+            question_count=row['count']
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0004_questionnaireversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='questionnaire',
+            name='question_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(set_question_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0006_remove_questionnairerule_last_notified'),
+        ('surveys', '0005_questionnaire_question_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyFillRate',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('date', models.DateField()),
+                ('attempted_by', models.PositiveIntegerField(default=0)),
+                ('employee_count', models.PositiveIntegerField(default=0)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_fill_rates', to='companies.Company')),
+                ('questionnaire', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_fill_rates', to='surveys.Questionnaire')),
+            ],
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dailyfillrate',
+            constraint=models.UniqueConstraint(fields=('company', 'questionnaire', 'date'), name='daily_fill_rate_unique'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:48
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('companies', '0006_remove_questionnairerule_last_notified'),
+        ('surveys', '0006_dailyfillrate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreAggregate',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('response_count', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.BigIntegerField(default=0)),
+                ('average_score', models.FloatField(default=0)),
+                ('last_score', models.IntegerField(null=True)),
+                ('last_submitted_at', models.DateTimeField()),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_aggregates', to='companies.Company')),
+                ('questionnaire', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_aggregates', to='surveys.Questionnaire')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_aggregates', to=settings.AUTH_USER_MODEL)),
+            ],
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='scoreaggregate',
+            index=models.Index(fields=['company', 'questionnaire', '-average_score'], name='score_aggregate_top'),
+        ),
+        migrations.AddConstraint(
+            model_name='scoreaggregate',
+            constraint=models.UniqueConstraint(fields=('company', 'user', 'questionnaire'), name='score_aggregate_unique'),
+        ),
+    ]
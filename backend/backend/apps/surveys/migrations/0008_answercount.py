@@ -0,0 +1,38 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0006_remove_questionnairerule_last_notified'),
+        ('surveys', '0007_scoreaggregate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnswerCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('period', models.DateField()),
+                ('answer', models.TextField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answer_counts', to='companies.Company')),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answer_counts', to='surveys.Question')),
+                ('questionnaire', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answer_counts', to='surveys.Questionnaire')),
+            ],
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='answercount',
+            constraint=models.UniqueConstraint(fields=('company', 'questionnaire', 'period', 'question', 'answer'), name='answer_count_unique'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0006_remove_questionnairerule_last_notified'),
+        ('surveys', '0008_answercount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('period', models.DateField()),
+                ('score', models.IntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_counts', to='companies.Company')),
+                ('questionnaire', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_counts', to='surveys.Questionnaire')),
+            ],
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='scorecount',
+            constraint=models.UniqueConstraint(fields=('company', 'questionnaire', 'period', 'score'), name='score_count_unique'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:55
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0006_remove_questionnairerule_last_notified'),
+        ('surveys', '0009_scorecount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RespondentSketch',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('date', models.DateField()),
+                ('registers', models.BinaryField()),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='respondent_sketches', to='companies.Company')),
+                ('questionnaire', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='respondent_sketches', to='surveys.Questionnaire')),
+            ],
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='respondentsketch',
+            constraint=models.UniqueConstraint(fields=('company', 'questionnaire', 'date'), name='respondent_sketch_unique'),
+        ),
+    ]
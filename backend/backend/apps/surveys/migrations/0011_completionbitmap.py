@@ -0,0 +1,35 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0007_completion_periods'),
+        ('surveys', '0010_respondentsketch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompletionBitmap',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('period', models.PositiveIntegerField()),
+                ('bitmap', models.BinaryField(default=b'')),
+                ('company_questionnaire', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='completion_bitmaps', to='companies.CompanyQuestionnaire')),
+            ],
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='completionbitmap',
+            constraint=models.UniqueConstraint(fields=('company_questionnaire', 'period'), name='completion_bitmap_unique'),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 2.2.16 on 2026-10-18 05:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0007_completion_periods'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('surveys', '0011_completionbitmap'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InboxItem',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company_questionnaire', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='inbox_items', to='companies.CompanyQuestionnaire')),
+                ('questionnaire', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_items', to='surveys.Questionnaire')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inbox_items', to=settings.AUTH_USER_MODEL)),
+            ],
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='inboxitem',
+            constraint=models.UniqueConstraint(condition=models.Q(company_questionnaire__isnull=False), fields=('user', 'company_questionnaire'), name='inbox_item_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='inboxitem',
+            constraint=models.UniqueConstraint(condition=models.Q(company_questionnaire__isnull=True), fields=('user', 'questionnaire'), name='mandatory_inbox_item_unique'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0012_inboxitem'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailFanout',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('chunk_count', models.PositiveIntegerField(default=0)),
+                ('sent_count', models.PositiveIntegerField(default=0)),
+                ('failed_count', models.PositiveIntegerField(default=0)),
+                ('questionnaire', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='mail_fanout', to='surveys.Questionnaire')),
+            ],
+            options={
+                'abstract': False,
+            },
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MailFanoutChunk',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('start_id', models.PositiveIntegerField()),
+                ('end_id', models.PositiveIntegerField()),
+                ('cursor', models.PositiveIntegerField()),
+                ('status', models.IntegerField(choices=[(0, 'PENDING'), (1, 'SENT'), (2, 'FAILED')], default=0)),
+                ('sent_count', models.PositiveIntegerField(default=0)),
+                ('failed_count', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('fanout', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='surveys.MailFanout')),
+            ],
+            options={
+                'ordering': ['start_id'],
+            },
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('surveys', '0013_mailfanout'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mailfanoutchunk',
+            name='status',
+            field=models.IntegerField(choices=[(0, 'PENDING'), (1, 'SENT'), (2, 'FAILED'), (3, 'SENDING')], default=0),
+        ),
+    ]
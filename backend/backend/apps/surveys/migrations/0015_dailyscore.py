@@ -0,0 +1,40 @@
+# Generated by Django 2.2.16 on 2026-10-18 06:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0011_remove_questionnairerule_notification'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('surveys', '0014_mailfanoutchunk_sending'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyScore',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('date', models.DateField()),
+                ('response_count', models.PositiveIntegerField(default=0)),
+                ('score_sum', models.BigIntegerField(default=0)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_scores', to='companies.Company')),
+                ('questionnaire', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_scores', to='surveys.Questionnaire')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_scores', to=settings.AUTH_USER_MODEL)),
+            ],
+            managers=[
+                ('all_objects', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='dailyscore',
+            constraint=models.UniqueConstraint(fields=('company', 'questionnaire', 'user', 'date'), name='daily_score_unique'),
+        ),
+    ]
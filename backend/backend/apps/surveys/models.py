@@ -55,6 +55,10 @@ class Questionnaire(CommonBaseModel):
         3. is_ublished: Boolean field to denote whether this questionnaire is published or not.
         4. published_on: date on which this questionnaire is published.
         5. questions: The questions belonging to this questionnaire.
+        6. content_version: version of the questionnaire's content, incremented on change
+           of the questionnaire, its questions, choices or tips.
+        7. question_count: number of questions of the questionnaire, kept in sync with
+           questions by m2m_changed signal.
     """
 
     title = models.CharField(max_length=commons_constant.MAX_LENGTH)
@@ -65,11 +69,62 @@ class Questionnaire(CommonBaseModel):
     is_published = models.BooleanField(default=False)
     published_on = models.DateTimeField(null=True, blank=True, editable=False)
     is_mandatory = models.BooleanField(default=False)
+    content_version = models.PositiveIntegerField(default=1, editable=False)
+    question_count = models.PositiveIntegerField(default=0, editable=False)
+
+    # Fields maintained by queryset updates, which save() of an existing questionnaire
+    # never writes back from a possibly stale instance.
+    UPDATED_BY_QUERY_FIELDS = ('content_version', 'question_count')
 
     def __str__(self):
         """ Unicode Representation of Questionnaire's Model. """
         return f'{self.title}'
 
+    def save(self, *args, **kwargs):
+        """ Method for saving the questionnaire leaving out the fields updated by query,
+            unless it is being created.
+        """
+        if not self._state.adding and not kwargs.get('force_insert'):
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None:
+                update_fields = [
+                    field.name for field in self._meta.concrete_fields
+                    if not field.primary_key
+                ]
+            kwargs['update_fields'] = [
+                field for field in update_fields
+                if field not in self.UPDATED_BY_QUERY_FIELDS
+            ]
+        return super().save(*args, **kwargs)
+
+
+class QuestionnaireVersion(CommonBaseModel):
+    """ Model definition of QuestionnaireVersion.
+
+        This model stores immutable snapshot of the questions, choices and weightages of a
+        questionnaire for one of its content versions.
+
+        Model fields includes:-
+        1. questionnaire: Questionnaire of which this is a version.
+        2. content_version: content version of the questionnaire when snapshot was taken.
+        3. snapshot: JSON list of the questions with their choices and weightages.
+    """
+
+    questionnaire = models.ForeignKey(
+        Questionnaire,
+        on_delete=models.CASCADE,
+        related_name='versions'
+    )
+    content_version = models.PositiveIntegerField()
+    snapshot = models.TextField(editable=False)
+
+    def __str__(self):
+        """ Unicode representation of QuestionnaireVersion Model. """
+        return f'{self.questionnaire_id} - v{self.content_version}'
+
+    class Meta:
+        unique_together = ('questionnaire', 'content_version')
+
 
 class Choice(CommonBaseModel):
     """ Model definition of Choice.
@@ -111,6 +166,10 @@ class QuestionnaireResponse(CommonBaseModel):
         1. user: User who made this submission.
         2. company: Company for which this questionnaire is filled.
         3. questionnaire: Questionnaire which is filled.
+        4. score: risk score of the submission.
+        5. risk_level: risk level according to the score.
+        6. receipt: receipt id given for the submission queued for write behind ingestion.
+        7. questionnaire_version: version of the questionnaire which is answered.
     """
 
     # Constant for risk levels
@@ -151,10 +210,26 @@ class QuestionnaireResponse(CommonBaseModel):
         on_delete=models.CASCADE,
         related_name='questionnaire_responses'
     )
+    # null for the responses submitted before versioning of questionnaires.
+    questionnaire_version = models.ForeignKey(
+        QuestionnaireVersion,
+        on_delete=models.CASCADE,
+        related_name='questionnaire_responses',
+        null=True,
+        blank=True
+    )
     score = models.IntegerField(null=True)
 
     risk_level = models.IntegerField(choices=RISK_LEVELS, default=LOW)
 
+    receipt = models.CharField(
+        max_length=commons_constant.RECEIPT_LENGTH,
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False
+    )
+
     def __str__(self):
         """ Unicode representation of QuestionnaireResponse Model. """
         return f'{self.questionnaire.title}'
@@ -226,3 +301,437 @@ class Tip(CommonBaseModel):
     def __str__(self):
         """ Unicode respresentation of Tip Model. """
         return f'{self.questionnaire.id} - {self.risk_level}'
+
+
+class DailyFillRate(CommonBaseModel):
+    """ Model Definition of DailyFillRate.
+
+        This model stores the daily rollup of the submissions of a questionnaire made for
+        a company, which is updated on each submission.
+
+        Model Fields Includes:-
+        1. company: Company for which the questionnaire is filled.
+        2. questionnaire: Questionnaire which is filled.
+        3. date: date of the submissions.
+        4. attempted_by: number of submissions made on the date.
+        5. employee_count: number of employees of the company on the date.
+    """
+
+    company = models.ForeignKey(
+        'companies.Company',
+        on_delete=models.CASCADE,
+        related_name='daily_fill_rates'
+    )
+    questionnaire = models.ForeignKey(
+        Questionnaire,
+        on_delete=models.CASCADE,
+        related_name='daily_fill_rates'
+    )
+    date = models.DateField()
+    attempted_by = models.PositiveIntegerField(default=0)
+    employee_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        """ Unicode representation of DailyFillRate Model. """
+        return f'{self.company_id} - {self.questionnaire_id} - {self.date}'
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=["company", "questionnaire", "date"], name="daily_fill_rate_unique"
+            ),
+        )
+
+
+class ScoreAggregate(CommonBaseModel):
+    """ Model Definition of ScoreAggregate.
+
+        This model stores running aggregates of the scores of a user's submissions of a
+        questionnaire made for a company, which are updated on each submission.
+
+        Model Fields Includes:-
+        1. company: Company for which the questionnaire is filled.
+        2. user: User who filled the questionnaire.
+        3. questionnaire: Questionnaire which is filled.
+        4. response_count: number of submissions.
+        5. score_sum: sum of the scores of the submissions.
+        6. average_score: average score of the submissions, stored for ordering.
+        7. last_score: score of the latest submission.
+        8. last_submitted_at: time of the latest submission.
+    """
+
+    company = models.ForeignKey(
+        'companies.Company',
+        on_delete=models.CASCADE,
+        related_name='score_aggregates'
+    )
+    user = models.ForeignKey(
+        AUTH_USER,
+        on_delete=models.CASCADE,
+        related_name='score_aggregates'
+    )
+    questionnaire = models.ForeignKey(
+        Questionnaire,
+        on_delete=models.CASCADE,
+        related_name='score_aggregates'
+    )
+    response_count = models.PositiveIntegerField(default=0)
+    score_sum = models.BigIntegerField(default=0)
+    average_score = models.FloatField(default=0)
+    last_score = models.IntegerField(null=True)
+    last_submitted_at = models.DateTimeField()
+
+    def __str__(self):
+        """ Unicode representation of ScoreAggregate Model. """
+        return f'{self.company_id} - {self.user_id} - {self.questionnaire_id}'
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=["company", "user", "questionnaire"], name="score_aggregate_unique"
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=["company", "questionnaire", "-average_score"],
+                name="score_aggregate_top"
+            ),
+        )
+
+
+class DailyScore(CommonBaseModel):
+    """ Model Definition of DailyScore.
+
+        This model stores the scores of a user's submissions of a questionnaire made for a
+        company in a day, so that the average score in a window of days is summed from them.
+
+        Model Fields Includes:-
+        1. company: Company for which the questionnaire is filled.
+        2. user: User who filled the questionnaire.
+        3. questionnaire: Questionnaire which is filled.
+        4. date: Date of the submissions.
+        5. response_count: number of submissions in the day.
+        6. score_sum: sum of the scores of the submissions in the day.
+    """
+
+    company = models.ForeignKey(
+        'companies.Company',
+        on_delete=models.CASCADE,
+        related_name='daily_scores'
+    )
+    user = models.ForeignKey(
+        AUTH_USER,
+        on_delete=models.CASCADE,
+        related_name='daily_scores'
+    )
+    questionnaire = models.ForeignKey(
+        Questionnaire,
+        on_delete=models.CASCADE,
+        related_name='daily_scores'
+    )
+    date = models.DateField()
+    response_count = models.PositiveIntegerField(default=0)
+    score_sum = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        """ Unicode representation of DailyScore Model. """
+        return f'{self.company_id} - {self.user_id} - {self.questionnaire_id} - {self.date}'
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=["company", "questionnaire", "user", "date"],
+                name="daily_score_unique"
+            ),
+        )
+
+
+class AnswerCount(CommonBaseModel):
+    """ Model Definition of AnswerCount.
+
+        This model stores the number of times a choice is answered for a question in the
+        submissions of a questionnaire made for a company in a month.
+
+        Model Fields Includes:-
+        1. company: Company for which the questionnaire is filled.
+        2. questionnaire: Questionnaire which is filled.
+        3. period: first date of the month of the submissions.
+        4. question: Question which is answered.
+        5. answer: the selected choice text.
+        6. count: number of times the answer is given.
+    """
+
+    company = models.ForeignKey(
+        'companies.Company',
+        on_delete=models.CASCADE,
+        related_name='answer_counts'
+    )
+    questionnaire = models.ForeignKey(
+        Questionnaire,
+        on_delete=models.CASCADE,
+        related_name='answer_counts'
+    )
+    period = models.DateField()
+    question = models.ForeignKey(
+        Question,
+        on_delete=models.CASCADE,
+        related_name='answer_counts'
+    )
+    answer = models.TextField()
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        """ Unicode representation of AnswerCount Model. """
+        return f'{self.question_id} - {self.answer}'
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=["company", "questionnaire", "period", "question", "answer"],
+                name="answer_count_unique"
+            ),
+        )
+
+
+class ScoreCount(CommonBaseModel):
+    """ Model Definition of ScoreCount.
+
+        This model stores the histogram of scores of the submissions of a questionnaire
+        made for a company in a month, one row per score.
+
+        Model Fields Includes:-
+        1. company: Company for which the questionnaire is filled.
+        2. questionnaire: Questionnaire which is filled.
+        3. period: first date of the month of the submissions.
+        4. score: risk score of the submissions.
+        5. count: number of submissions having the score.
+    """
+
+    company = models.ForeignKey(
+        'companies.Company',
+        on_delete=models.CASCADE,
+        related_name='score_counts'
+    )
+    questionnaire = models.ForeignKey(
+        Questionnaire,
+        on_delete=models.CASCADE,
+        related_name='score_counts'
+    )
+    period = models.DateField()
+    score = models.IntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        """ Unicode representation of ScoreCount Model. """
+        return f'{self.company_id} - {self.questionnaire_id} - {self.period}'
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=["company", "questionnaire", "period", "score"],
+                name="score_count_unique"
+            ),
+        )
+
+
+class RespondentSketch(CommonBaseModel):
+    """ Model Definition of RespondentSketch.
+
+        This model stores the HyperLogLog sketch of the users who have submitted a
+        questionnaire for a company in a day, sketches of the days are merged for
+        estimating the unique respondents of a date range.
+
+        Model Fields Includes:-
+        1. company: Company for which the questionnaire is filled.
+        2. questionnaire: Questionnaire which is filled.
+        3. date: date of the submissions in the current timezone.
+        4. registers: compressed registers of the sketch.
+    """
+
+    company = models.ForeignKey(
+        'companies.Company',
+        on_delete=models.CASCADE,
+        related_name='respondent_sketches'
+    )
+    questionnaire = models.ForeignKey(
+        Questionnaire,
+        on_delete=models.CASCADE,
+        related_name='respondent_sketches'
+    )
+    date = models.DateField()
+    registers = models.BinaryField()
+
+    def __str__(self):
+        """ Unicode representation of RespondentSketch Model. """
+        return f'{self.company_id} - {self.questionnaire_id} - {self.date}'
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=["company", "questionnaire", "date"],
+                name="respondent_sketch_unique"
+            ),
+        )
+
+
+class CompletionBitmap(CommonBaseModel):
+    """ Model Definition of CompletionBitmap.
+
+        This model stores which employees of a company have submitted a questionnaire in
+        a notification period, as a bitmap having the bit at employee's ordinal set.
+
+        Model Fields Includes:-
+        1. company_questionnaire: Questionnaire enabled by the company.
+        2. period: number of the notification period of the company questionnaire.
+        3. bitmap: little endian bytes of the bitmap.
+    """
+
+    company_questionnaire = models.ForeignKey(
+        'companies.CompanyQuestionnaire',
+        on_delete=models.CASCADE,
+        related_name='completion_bitmaps'
+    )
+    period = models.PositiveIntegerField()
+    bitmap = models.BinaryField(default=b'')
+
+    def __str__(self):
+        """ Unicode representation of CompletionBitmap Model. """
+        return f'{self.company_questionnaire_id} - {self.period}'
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=["company_questionnaire", "period"],
+                name="completion_bitmap_unique"
+            ),
+        )
+
+
+class InboxItem(CommonBaseModel):
+    """ Model Definition of InboxItem.
+
+        This model stores a questionnaire which the user has to fill, added when the
+        employees of a company are notified about the questionnaire or when a mandatory
+        questionnaire is published, and removed on submission.
+
+        Model Fields Includes:-
+        1. user: User who has to fill the questionnaire.
+        2. questionnaire: Questionnaire to be filled.
+        3. company_questionnaire: Company questionnaire for which the questionnaire is to
+           be filled, null for the mandatory questionnaires.
+    """
+
+    user = models.ForeignKey(
+        AUTH_USER,
+        on_delete=models.CASCADE,
+        related_name='inbox_items'
+    )
+    questionnaire = models.ForeignKey(
+        Questionnaire,
+        on_delete=models.CASCADE,
+        related_name='inbox_items'
+    )
+    company_questionnaire = models.ForeignKey(
+        'companies.CompanyQuestionnaire',
+        on_delete=models.CASCADE,
+        related_name='inbox_items',
+        null=True,
+        blank=True
+    )
+
+    def __str__(self):
+        """ Unicode representation of InboxItem Model. """
+        return f'{self.user_id} - {self.questionnaire_id}'
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=["user", "company_questionnaire"],
+                condition=models.Q(company_questionnaire__isnull=False),
+                name="inbox_item_unique"
+            ),
+            models.UniqueConstraint(
+                fields=["user", "questionnaire"],
+                condition=models.Q(company_questionnaire__isnull=True),
+                name="mandatory_inbox_item_unique"
+            ),
+        )
+
+
+class MailFanout(CommonBaseModel):
+    """ Model Definition of MailFanout.
+
+        This model stores the progress of sending the mandatory questionnaire email to all
+        the users, which is split into chunks of users sent by separate tasks.
+
+        Model Fields Includes:-
+        1. questionnaire: Mandatory questionnaire about which the users are informed.
+        2. chunk_count: number of chunks of the users.
+        3. sent_count: number of users to which email is sent.
+        4. failed_count: number of users to which email couldn't be sent.
+    """
+
+    questionnaire = models.OneToOneField(
+        Questionnaire,
+        on_delete=models.CASCADE,
+        related_name='mail_fanout'
+    )
+    chunk_count = models.PositiveIntegerField(default=0)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        """ Unicode representation of MailFanout Model. """
+        return f'{self.questionnaire_id} - {self.sent_count}/{self.failed_count}'
+
+
+class MailFanoutChunk(CommonBaseModel):
+    """ Model Definition of MailFanoutChunk.
+
+        This model stores a range of user ids of a mail fanout and the progress of sending
+        email to them, users up to the cursor are already processed.
+
+        Model Fields Includes:-
+        1. fanout: Mail fanout of which this is a chunk.
+        2. start_id: users having id greater than this are in the chunk.
+        3. end_id: users having id up to this are in the chunk.
+        4. cursor: id of the last user processed.
+        5. status: whether the chunk is pending, being sent, sent or failed, sending chunk
+           is claimed by the task sending it.
+        6. sent_count: number of users to which email is sent.
+        7. failed_count: number of users to which email couldn't be sent.
+        8. error: error due to which the chunk failed.
+    """
+    # Constants for chunk statuses.
+    PENDING = 0
+    SENT = 1
+    FAILED = 2
+    SENDING = 3
+
+    # Choices for chunk statuses.
+    STATUS_CHOICES = (
+        (PENDING, 'PENDING'),
+        (SENT, 'SENT'),
+        (FAILED, 'FAILED'),
+        (SENDING, 'SENDING'),
+    )
+
+    fanout = models.ForeignKey(
+        MailFanout,
+        on_delete=models.CASCADE,
+        related_name='chunks'
+    )
+    start_id = models.PositiveIntegerField()
+    end_id = models.PositiveIntegerField()
+    cursor = models.PositiveIntegerField()
+    status = models.IntegerField(choices=STATUS_CHOICES, default=PENDING)
+    sent_count = models.PositiveIntegerField(default=0)
+    failed_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    def __str__(self):
+        """ Unicode representation of MailFanoutChunk Model. """
+        return f'{self.fanout_id} - {self.start_id}:{self.end_id}'
+
+    class Meta:
+        ordering = ['start_id']
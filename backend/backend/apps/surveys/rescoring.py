@@ -0,0 +1,166 @@
+import numpy as np
+
+from django.conf import settings
+from django.db import transaction
+
+from surveys import models as surveys_models
+from surveys import scoring as surveys_scoring
+from surveys import trends as surveys_trends
+
+# Score used for the responses which aren't scored yet.
+UNSCORED = -1
+
+
+def compile_answer_lookup(plan):
+    """ Returns lookup of (question id, choice text) to answer code and weightage of each code.
+
+        Code 0 is reserved for the answers which are not part of the score, i.e. answers of
+        text questions or answers which are no longer a choice of the question.
+    """
+
+    answer_codes = {}
+    # Weightages are truncated to integer, same as done while submitting.
+    weightages = [0]
+    for question_id, question_plan in plan.items():
+        if question_plan.question_type == surveys_models.Question.TEXT:
+            continue
+        for text, weightage in question_plan.choices.items():
+            answer_codes[(question_id, text)] = len(weightages)
+            weightages.append(int(weightage))
+
+    return answer_codes, np.array(weightages, dtype=np.int64)
+
+
+def get_risk_levels(scores):
+    """ Vectorized version of scoring.get_risk_level. """
+
+    RISK_RANGES = surveys_models.QuestionnaireResponse.RANGES
+
+    conditions = []
+    levels = []
+    for name, level in (
+        ('MEDIUM', surveys_models.QuestionnaireResponse.MEDIUM),
+        ('HIGH', surveys_models.QuestionnaireResponse.HIGH),
+    ):
+        conditions.append(
+            (scores >= RISK_RANGES[name].start) & (scores < RISK_RANGES[name].stop)
+        )
+        levels.append(level)
+
+    return np.select(
+        conditions, levels, default=surveys_models.QuestionnaireResponse.LOW
+    )
+
+
+def score_chunk(response_ids, answer_response_ids, answer_codes, weightages):
+    """ Calculates scores and risk levels of a chunk of questionnaire responses.
+
+        response_ids: sorted ids of the questionnaire responses of the chunk.
+        answer_response_ids: questionnaire response id of each question response.
+        answer_codes: answer code (from compile_answer_lookup) of each question response.
+        Returns arrays of scores and risk levels in order of response_ids.
+    """
+
+    # Position of the questionnaire response of each answer, used for grouping.
+    groups = np.searchsorted(response_ids, answer_response_ids)
+    scored = answer_codes > 0
+
+    totals = np.bincount(
+        groups[scored],
+        weights=weightages[answer_codes[scored]],
+        minlength=len(response_ids)
+    ).astype(np.int64)
+    counts = np.bincount(groups[scored], minlength=len(response_ids))
+
+    scores = np.zeros(len(response_ids), dtype=np.int64)
+    np.floor_divide(totals, counts, out=scores, where=counts > 0)
+
+    return scores, get_risk_levels(scores)
+
+
+def rescore_questionnaire(questionnaire_id, chunk_size=None):
+    """ Recalculates score and risk level of all the responses of a questionnaire.
+
+        Responses are processed in chunks of chunk_size by their id and only the
+        responses whose score or risk level is changed are updated.
+        Returns the number of responses processed and updated.
+    """
+
+    chunk_size = chunk_size or settings.RESCORE_CHUNK_SIZE
+    answer_lookup, weightages = compile_answer_lookup(
+        surveys_scoring.build_scoring_plan(questionnaire_id)
+    )
+
+    processed = updated = 0
+    last_id = 0
+
+    while True:
+        rows = list(
+            surveys_models.QuestionnaireResponse.all_objects.filter(
+                questionnaire_id=questionnaire_id, id__gt=last_id
+            ).order_by('id').values_list('id', 'score', 'risk_level')[:chunk_size]
+        )
+        if not rows:
+            break
+
+        response_ids = np.fromiter(
+            (row[0] for row in rows), dtype=np.int64, count=len(rows)
+        )
+        old_scores = np.fromiter(
+            (UNSCORED if row[1] is None else row[1] for row in rows),
+            dtype=np.int64, count=len(rows)
+        )
+        old_risk_levels = np.fromiter(
+            (row[2] for row in rows), dtype=np.int64, count=len(rows)
+        )
+        last_id = rows[-1][0]
+
+        answers = list(
+            surveys_models.QuestionResponse.all_objects.filter(
+                questionnaire_response_id__in=response_ids.tolist()
+            ).values_list('questionnaire_response_id', 'question_id', 'user_input')
+        )
+        answer_response_ids = np.fromiter(
+            (answer[0] for answer in answers), dtype=np.int64, count=len(answers)
+        )
+        answer_codes = np.fromiter(
+            (answer_lookup.get((answer[1], answer[2]), 0) for answer in answers),
+            dtype=np.int64, count=len(answers)
+        )
+
+        scores, risk_levels = score_chunk(
+            response_ids, answer_response_ids, answer_codes, weightages
+        )
+
+        changed = np.flatnonzero(
+            (scores != old_scores) | (risk_levels != old_risk_levels)
+        )
+        with transaction.atomic():
+            surveys_models.QuestionnaireResponse.all_objects.bulk_update(
+                [
+                    surveys_models.QuestionnaireResponse(
+                        id=int(response_ids[index]),
+                        score=int(scores[index]),
+                        risk_level=int(risk_levels[index]),
+                    ) for index in changed
+                ],
+                ['score', 'risk_level'],
+                batch_size=settings.RESCORE_UPDATE_BATCH_SIZE
+            )
+
+        processed += len(rows)
+        updated += len(changed)
+
+    if updated:
+        # Cached risk trends are made of the old risk levels.
+        surveys_trends.invalidate_risk_trends()
+    return processed, updated
+
+
+def get_questionnaires_of_question(question_id):
+    """ Returns ids of the questionnaires having the given question. """
+    return list(
+        surveys_models.Questionnaire.questions.through.objects.filter(
+            question_id=question_id
+        ).values_list('questionnaire_id', flat=True)
+    )
@@ -0,0 +1,598 @@
+import bisect
+import math
+from collections import Counter, defaultdict
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Cast, Trunc, TruncDate
+from django.utils import timezone
+
+from companies import models as companies_models
+from surveys import models as surveys_models
+from surveys import scoring as surveys_scoring
+from surveys.sketches import HyperLogLog
+
+def get_local_date(value):
+    """ Returns date of the datetime in the current time zone, same as TruncDate. """
+    return timezone.localtime(value).date()
+
+
+def get_period(value):
+    """ Returns first date of the month of the datetime in the current time zone. """
+    return get_local_date(value).replace(day=1)
+
+
+def count_employees(company_id, date):
+    """ Returns the number of employees of the company on the date.
+
+        Employee is counted from the date of joining until the date of leaving, date of
+        leaving of an inactive employee is the date of its last update.
+    """
+    return companies_models.Employee.all_objects.filter(
+        company_id=company_id, created_at__date__lte=date
+    ).filter(
+        Q(is_active=True) | Q(updated_at__date__gt=date)
+    ).count()
+
+
+def add_fill_rates(questionnaire_responses):
+    """ Adds the questionnaire responses to the daily fill rates of their companies. """
+
+    counts = Counter(
+        (
+            questionnaire_response.company_id,
+            questionnaire_response.questionnaire_id,
+            get_local_date(questionnaire_response.created_at),
+        )
+        for questionnaire_response in questionnaire_responses
+        if questionnaire_response.company_id is not None
+    )
+
+    for (company_id, questionnaire_id, date), count in counts.items():
+        fill_rates = surveys_models.DailyFillRate.all_objects.filter(
+            company_id=company_id, questionnaire_id=questionnaire_id, date=date
+        )
+        if fill_rates.update(attempted_by=F('attempted_by') + count):
+            continue
+
+        try:
+            with transaction.atomic():
+                surveys_models.DailyFillRate.all_objects.create(
+                    company_id=company_id,
+                    questionnaire_id=questionnaire_id,
+                    date=date,
+                    attempted_by=count,
+                    employee_count=count_employees(company_id, date),
+                )
+        except IntegrityError:
+            # Created by a concurrent submission of the same day.
+            fill_rates.update(attempted_by=F('attempted_by') + count)
+
+
+def update_employee_counts(company_id, since, change):
+    """ Changes the employee count of the company's daily fill rates from the given date. """
+    surveys_models.DailyFillRate.all_objects.filter(
+        company_id=company_id, date__gte=since
+    ).update(employee_count=F('employee_count') + change)
+
+
+def rebuild_fill_rates(company_ids=None):
+    """ Recalculates the daily fill rates of the companies from the stored responses.
+
+        Rebuilds the fill rates of all the companies if company_ids is None.
+        Returns the number of daily fill rates created.
+    """
+
+    responses = surveys_models.QuestionnaireResponse.objects.filter(
+        company__isnull=False
+    )
+    employees = companies_models.Employee.all_objects.all()
+    fill_rates = surveys_models.DailyFillRate.all_objects.all()
+    if company_ids is not None:
+        responses = responses.filter(company_id__in=company_ids)
+        employees = employees.filter(company_id__in=company_ids)
+        fill_rates = fill_rates.filter(company_id__in=company_ids)
+
+    # Sorted dates of joining and leaving of the employees of each company.
+    joined = defaultdict(list)
+    left = defaultdict(list)
+    for company_id, created_at, updated_at, is_active in employees.values_list(
+        'company_id', 'created_at', 'updated_at', 'is_active'
+    ):
+        joined[company_id].append(get_local_date(created_at))
+        if not is_active:
+            left[company_id].append(get_local_date(updated_at))
+    for dates in (*joined.values(), *left.values()):
+        dates.sort()
+
+    rows = responses.annotate(date=TruncDate('created_at')).order_by().values(
+        'company_id', 'questionnaire_id', 'date'
+    ).annotate(attempted_by=Count('id'))
+
+    new_fill_rates = [
+        surveys_models.DailyFillRate(
+            company_id=row['company_id'],
+            questionnaire_id=row['questionnaire_id'],
+            date=row['date'],
+            attempted_by=row['attempted_by'],
+            employee_count=(
+                bisect.bisect_right(joined[row['company_id']], row['date']) -
+                bisect.bisect_right(left[row['company_id']], row['date'])
+            ),
+        ) for row in rows
+    ]
+
+    with transaction.atomic():
+        fill_rates.delete()
+        surveys_models.DailyFillRate.all_objects.bulk_create(
+            new_fill_rates, batch_size=1000
+        )
+    return len(new_fill_rates)
+
+
+def add_score_aggregates(questionnaire_responses):
+    """ Adds the scores of the questionnaire responses to the running aggregates of their users. """
+
+    aggregates = {}
+    for questionnaire_response in questionnaire_responses:
+        if questionnaire_response.company_id is None or questionnaire_response.score is None:
+            continue
+        key = (
+            questionnaire_response.company_id,
+            questionnaire_response.user_id,
+            questionnaire_response.questionnaire_id,
+        )
+        count, total, last_score, last_submitted_at = aggregates.get(
+            key, (0, 0, None, None)
+        )
+        if last_submitted_at is None or questionnaire_response.created_at >= last_submitted_at:
+            last_score = questionnaire_response.score
+            last_submitted_at = questionnaire_response.created_at
+        aggregates[key] = (
+            count + 1, total + questionnaire_response.score, last_score, last_submitted_at
+        )
+
+    for (company_id, user_id, questionnaire_id), aggregate in aggregates.items():
+        count, total, last_score, last_submitted_at = aggregate
+        score_aggregates = surveys_models.ScoreAggregate.all_objects.filter(
+            company_id=company_id, user_id=user_id, questionnaire_id=questionnaire_id
+        )
+        # Backdated submissions doesn't change the latest submission.
+        is_latest = Q(last_submitted_at__lte=last_submitted_at)
+        changes = {
+            'response_count': F('response_count') + count,
+            'score_sum': F('score_sum') + total,
+            'average_score': Cast(
+                F('score_sum') + total, FloatField()
+            ) / (F('response_count') + count),
+            'last_score': Case(
+                When(is_latest, then=Value(last_score)), default=F('last_score')
+            ),
+            'last_submitted_at': Case(
+                When(is_latest, then=Value(last_submitted_at)),
+                default=F('last_submitted_at')
+            ),
+        }
+        if score_aggregates.update(**changes):
+            continue
+
+        try:
+            with transaction.atomic():
+                surveys_models.ScoreAggregate.all_objects.create(
+                    company_id=company_id,
+                    user_id=user_id,
+                    questionnaire_id=questionnaire_id,
+                    response_count=count,
+                    score_sum=total,
+                    average_score=total / count,
+                    last_score=last_score,
+                    last_submitted_at=last_submitted_at,
+                )
+        except IntegrityError:
+            # Created by a concurrent submission of the same user.
+            score_aggregates.update(**changes)
+
+    add_daily_scores(questionnaire_responses)
+
+
+def add_daily_scores(questionnaire_responses):
+    """ Adds the scores of the questionnaire responses to the daily scores of their users. """
+
+    daily_scores = defaultdict(lambda: [0, 0])
+    for questionnaire_response in questionnaire_responses:
+        if questionnaire_response.company_id is None or questionnaire_response.score is None:
+            continue
+        daily_score = daily_scores[(
+            questionnaire_response.company_id,
+            questionnaire_response.user_id,
+            questionnaire_response.questionnaire_id,
+            get_local_date(questionnaire_response.created_at),
+        )]
+        daily_score[0] += 1
+        daily_score[1] += questionnaire_response.score
+
+    for (company_id, user_id, questionnaire_id, date), (count, total) in daily_scores.items():
+        rows = surveys_models.DailyScore.all_objects.filter(
+            company_id=company_id, user_id=user_id, questionnaire_id=questionnaire_id,
+            date=date
+        )
+        changes = {
+            'response_count': F('response_count') + count,
+            'score_sum': F('score_sum') + total,
+        }
+        if rows.update(**changes):
+            continue
+
+        try:
+            with transaction.atomic():
+                surveys_models.DailyScore.all_objects.create(
+                    company_id=company_id,
+                    user_id=user_id,
+                    questionnaire_id=questionnaire_id,
+                    date=date,
+                    response_count=count,
+                    score_sum=total,
+                )
+        except IntegrityError:
+            # Created by a concurrent submission of the same user.
+            rows.update(**changes)
+
+
+def rebuild_score_aggregates(questionnaire_ids=None):
+    """ Recalculates the score aggregates and daily scores of the questionnaires from the
+        stored responses.
+
+        Rebuilds the aggregates of all the questionnaires if questionnaire_ids is None.
+        Returns the number of score aggregates created.
+    """
+
+    responses = surveys_models.QuestionnaireResponse.objects.filter(
+        company__isnull=False, score__isnull=False
+    )
+    score_aggregates = surveys_models.ScoreAggregate.all_objects.all()
+    daily_scores = surveys_models.DailyScore.all_objects.all()
+    if questionnaire_ids is not None:
+        responses = responses.filter(questionnaire_id__in=questionnaire_ids)
+        score_aggregates = score_aggregates.filter(questionnaire_id__in=questionnaire_ids)
+        daily_scores = daily_scores.filter(questionnaire_id__in=questionnaire_ids)
+
+    aggregates = {}
+    new_daily_scores = {}
+    for company_id, user_id, questionnaire_id, score, created_at in responses.order_by(
+        'created_at', 'id'
+    ).values_list(
+        'company_id', 'user_id', 'questionnaire_id', 'score', 'created_at'
+    ).iterator():
+        aggregate = aggregates.get((company_id, user_id, questionnaire_id))
+        if aggregate is None:
+            aggregate = aggregates[(company_id, user_id, questionnaire_id)] = \
+                surveys_models.ScoreAggregate(
+                    company_id=company_id,
+                    user_id=user_id,
+                    questionnaire_id=questionnaire_id,
+                )
+        aggregate.response_count += 1
+        aggregate.score_sum += score
+        aggregate.average_score = aggregate.score_sum / aggregate.response_count
+        # Responses are in order of time, so the last one is the latest.
+        aggregate.last_score = score
+        aggregate.last_submitted_at = created_at
+
+        date = get_local_date(created_at)
+        daily_score = new_daily_scores.get((company_id, user_id, questionnaire_id, date))
+        if daily_score is None:
+            daily_score = new_daily_scores[(company_id, user_id, questionnaire_id, date)] = \
+                surveys_models.DailyScore(
+                    company_id=company_id,
+                    user_id=user_id,
+                    questionnaire_id=questionnaire_id,
+                    date=date,
+                )
+        daily_score.response_count += 1
+        daily_score.score_sum += score
+
+    with transaction.atomic():
+        score_aggregates.delete()
+        surveys_models.ScoreAggregate.all_objects.bulk_create(
+            aggregates.values(), batch_size=1000
+        )
+        daily_scores.delete()
+        surveys_models.DailyScore.all_objects.bulk_create(
+            new_daily_scores.values(), batch_size=1000
+        )
+    return len(aggregates)
+
+
+def add_counts(model, key_columns, counts):
+    """ Adds the counts to the count column of the model's rows, creating missing rows.
+
+        key_columns are the columns of the model's unique constraint and counts is a
+        dictionary of the values of key columns to the count to add.
+    """
+
+    for key, count in counts.items():
+        rows = model.all_objects.filter(**dict(zip(key_columns, key)))
+        if rows.update(count=F('count') + count):
+            continue
+
+        try:
+            with transaction.atomic():
+                model.all_objects.create(count=count, **dict(zip(key_columns, key)))
+        except IntegrityError:
+            # Created by a concurrent submission.
+            rows.update(count=F('count') + count)
+
+
+def add_answer_counts(question_responses):
+    """ Adds the answers of MCQ and Binary questions to the monthly answer counts.
+
+        Answers are classified by the questionnaire version their response is scored with,
+        responses submitted before versioning by the current questions.
+    """
+
+    question_responses = [
+        question_response for question_response in question_responses
+        if question_response.questionnaire_response.company_id is not None
+    ]
+    questionnaire_responses = [
+        question_response.questionnaire_response for question_response in question_responses
+    ]
+    version_plans = surveys_scoring.get_version_scoring_plans({
+        questionnaire_response.questionnaire_version_id
+        for questionnaire_response in questionnaire_responses
+        if questionnaire_response.questionnaire_version_id is not None
+    })
+    unversioned_ids = {
+        questionnaire_response.questionnaire_id
+        for questionnaire_response in questionnaire_responses
+        if questionnaire_response.questionnaire_version_id is None
+    }
+    current_plans = surveys_scoring.build_scoring_plans(unversioned_ids) \
+        if unversioned_ids else {}
+
+    counts = Counter()
+    for question_response in question_responses:
+        questionnaire_response = question_response.questionnaire_response
+        if questionnaire_response.questionnaire_version_id is None:
+            plan = current_plans[questionnaire_response.questionnaire_id]
+        else:
+            plan = version_plans.get(questionnaire_response.questionnaire_version_id, {})
+        question_plan = plan.get(question_response.question_id)
+        # Text answers are not counted.
+        if question_plan is None or \
+                question_plan.question_type == surveys_models.Question.TEXT:
+            continue
+        counts[(
+            questionnaire_response.company_id,
+            questionnaire_response.questionnaire_id,
+            get_period(questionnaire_response.created_at),
+            question_response.question_id,
+            question_response.user_input,
+        )] += 1
+
+    if not counts:
+        return
+
+    add_counts(
+        surveys_models.AnswerCount,
+        ('company_id', 'questionnaire_id', 'period', 'question_id', 'answer'),
+        counts
+    )
+
+
+def add_score_counts(questionnaire_responses):
+    """ Adds the scores of the questionnaire responses to the monthly score histograms. """
+
+    counts = Counter(
+        (
+            questionnaire_response.company_id,
+            questionnaire_response.questionnaire_id,
+            get_period(questionnaire_response.created_at),
+            questionnaire_response.score,
+        )
+        for questionnaire_response in questionnaire_responses
+        if questionnaire_response.company_id is not None and
+        questionnaire_response.score is not None
+    )
+    if counts:
+        add_counts(
+            surveys_models.ScoreCount,
+            ('company_id', 'questionnaire_id', 'period', 'score'),
+            counts
+        )
+
+
+def get_percentiles(company_id, questionnaire_id, start, end, percentiles):
+    """ Returns the scores at the percentiles of the submissions from month start to end.
+
+        Histograms of scores of the months are merged in the database, as scores are
+        integers from 0 to 100 the merged histogram has at most 101 rows and the
+        percentiles are exact, using nearest rank.
+        Returns the number of submissions and a dictionary of percentile to the score.
+    """
+
+    histogram = list(
+        surveys_models.ScoreCount.objects.filter(
+            company_id=company_id,
+            questionnaire_id=questionnaire_id,
+            period__gte=start,
+            period__lte=end
+        ).order_by('score').values('score').annotate(
+            count=Sum('count')
+        ).values_list('score', 'count')
+    )
+
+    total = sum(count for score, count in histogram)
+    if not total:
+        return total, {percentile: None for percentile in percentiles}
+
+    scores = {}
+    for percentile in percentiles:
+        # Nearest rank, the smallest score having at least percentile% of scores upto it.
+        rank = max(math.ceil(percentile / 100 * total), 1)
+        cumulative = 0
+        for score, count in histogram:
+            cumulative += count
+            if cumulative >= rank:
+                scores[percentile] = score
+                break
+    return total, scores
+
+
+def rebuild_score_counts(questionnaire_ids=None):
+    """ Recalculates the score histograms of the questionnaires from the stored responses.
+
+        Rebuilds the histograms of all the questionnaires if questionnaire_ids is None.
+        Returns the number of score counts created.
+    """
+
+    responses = surveys_models.QuestionnaireResponse.objects.filter(
+        company__isnull=False, score__isnull=False
+    )
+    score_counts = surveys_models.ScoreCount.all_objects.all()
+    if questionnaire_ids is not None:
+        responses = responses.filter(questionnaire_id__in=questionnaire_ids)
+        score_counts = score_counts.filter(questionnaire_id__in=questionnaire_ids)
+
+    rows = responses.annotate(
+        period=Trunc('created_at', 'month', tzinfo=timezone.get_current_timezone())
+    ).order_by().values('company_id', 'questionnaire_id', 'period', 'score').annotate(
+        count=Count('id')
+    )
+
+    new_score_counts = [
+        surveys_models.ScoreCount(
+            company_id=row['company_id'],
+            questionnaire_id=row['questionnaire_id'],
+            period=get_local_date(row['period']),
+            score=row['score'],
+            count=row['count'],
+        ) for row in rows
+    ]
+
+    with transaction.atomic():
+        score_counts.delete()
+        surveys_models.ScoreCount.all_objects.bulk_create(
+            new_score_counts, batch_size=1000
+        )
+    return len(new_score_counts)
+
+
+def add_respondent_sketches(questionnaire_responses):
+    """ Adds the users of the questionnaire responses to the daily respondent sketches. """
+
+    sketches = defaultdict(HyperLogLog)
+    for questionnaire_response in questionnaire_responses:
+        if questionnaire_response.company_id is None:
+            continue
+        sketches[(
+            questionnaire_response.company_id,
+            questionnaire_response.questionnaire_id,
+            get_local_date(questionnaire_response.created_at),
+        )].add(questionnaire_response.user_id)
+
+    for (company_id, questionnaire_id, date), sketch in sketches.items():
+        with transaction.atomic():
+            # Locking the stored sketch, so that concurrent merges are not lost.
+            stored_sketches = surveys_models.RespondentSketch.all_objects.select_for_update(
+            ).filter(company_id=company_id, questionnaire_id=questionnaire_id, date=date)
+            stored = stored_sketches.first()
+
+            if stored is None:
+                try:
+                    with transaction.atomic():
+                        surveys_models.RespondentSketch.all_objects.create(
+                            company_id=company_id,
+                            questionnaire_id=questionnaire_id,
+                            date=date,
+                            registers=sketch.to_bytes(),
+                        )
+                    continue
+                except IntegrityError:
+                    # Created by a concurrent submission of the same day.
+                    stored = stored_sketches.get()
+
+            sketch.merge(HyperLogLog.from_bytes(stored.registers))
+            stored.registers = sketch.to_bytes()
+            stored.save(update_fields=['registers', 'updated_at'])
+
+
+def count_respondents(company_id, questionnaire_id, start, end):
+    """ Returns the estimated number of unique users who have submitted the questionnaire
+        for the company from start to end date, both inclusive.
+
+        Daily sketches of the range are merged, so a user submitting in many days of the
+        range is counted once.
+    """
+
+    sketch = HyperLogLog()
+    for registers in surveys_models.RespondentSketch.objects.filter(
+        company_id=company_id,
+        questionnaire_id=questionnaire_id,
+        date__gte=start,
+        date__lte=end
+    ).values_list('registers', flat=True).iterator():
+        sketch.merge(HyperLogLog.from_bytes(registers))
+    return sketch.count()
+
+
+def rebuild_respondent_sketches(questionnaire_ids=None):
+    """ Recalculates the daily respondent sketches of the questionnaires from the stored
+        responses.
+
+        Rebuilds the sketches of all the questionnaires if questionnaire_ids is None.
+        Returns the number of sketches created.
+    """
+
+    responses = surveys_models.QuestionnaireResponse.objects.filter(
+        company__isnull=False
+    )
+    respondent_sketches = surveys_models.RespondentSketch.all_objects.all()
+    if questionnaire_ids is not None:
+        responses = responses.filter(questionnaire_id__in=questionnaire_ids)
+        respondent_sketches = respondent_sketches.filter(
+            questionnaire_id__in=questionnaire_ids
+        )
+
+    # Responses of a day are consecutive in this order, so a single sketch is kept in
+    # memory at a time.
+    rows = responses.order_by('company_id', 'questionnaire_id', 'created_at').values_list(
+        'company_id', 'questionnaire_id', 'created_at', 'user_id'
+    )
+
+    created = 0
+    with transaction.atomic():
+        respondent_sketches.delete()
+
+        new_sketches = []
+        key = sketch = None
+        for company_id, questionnaire_id, created_at, user_id in rows.iterator():
+            row_key = (company_id, questionnaire_id, get_local_date(created_at))
+            if row_key != key:
+                if key is not None:
+                    new_sketches.append(get_respondent_sketch(key, sketch))
+                key, sketch = row_key, HyperLogLog()
+            sketch.add(user_id)
+
+            if len(new_sketches) >= 1000:
+                surveys_models.RespondentSketch.all_objects.bulk_create(new_sketches)
+                created += len(new_sketches)
+                new_sketches = []
+
+        if key is not None:
+            new_sketches.append(get_respondent_sketch(key, sketch))
+        surveys_models.RespondentSketch.all_objects.bulk_create(new_sketches)
+        created += len(new_sketches)
+
+    return created
+
+
+def get_respondent_sketch(key, sketch):
+    """ Returns unsaved RespondentSketch of the (company id, questionnaire id, date) key. """
+    company_id, questionnaire_id, date = key
+    return surveys_models.RespondentSketch(
+        company_id=company_id,
+        questionnaire_id=questionnaire_id,
+        date=date,
+        registers=sketch.to_bytes(),
+    )
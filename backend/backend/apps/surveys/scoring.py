@@ -0,0 +1,328 @@
+import json
+import threading
+from collections import OrderedDict, namedtuple
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import F
+
+from commons import constants as commons_constants
+from surveys import models as surveys_models
+
+# Default number of questionnaire scoring plans kept in memory per process.
+DEFAULT_SCORING_PLAN_CACHE_SIZE = 128
+
+# Compiled information of a question required for validating and scoring a submission.
+# choices maps the choice text to its weightage.
+QuestionPlan = namedtuple('QuestionPlan', ('question_type', 'choices'))
+
+
+class ScoringPlan(dict):
+    """ Scoring plan of a questionnaire version, maps question id to its QuestionPlan. """
+
+    def __init__(self, question_plans=(), version_id=None):
+        super().__init__(question_plans)
+        # Id of the QuestionnaireVersion from which the plan is loaded.
+        self.version_id = version_id
+
+
+class LRUCache(object):
+    """ Thread safe, bounded least recently used cache. """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """ Returns the value stored for the key, or None if not present. """
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        """ Stores the value and evicts the least recently used entry if full. """
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """ Removes the key from the cache if present. """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_matching(self, predicate):
+        """ Removes all the entries for which predicate(key, value) is true. """
+        with self._lock:
+            for key in [k for k, v in self._data.items() if predicate(k, v)]:
+                del self._data[key]
+
+    def clear(self):
+        """ Removes all the entries from the cache. """
+        with self._lock:
+            self._data.clear()
+
+
+_scoring_plans = LRUCache(
+    getattr(
+        settings, 'SCORING_PLAN_CACHE_SIZE', DEFAULT_SCORING_PLAN_CACHE_SIZE
+    )
+)
+
+
+def build_scoring_plans(questionnaire_ids=None):
+    """ Loads the scoring plans of the questionnaires from the database in a single query.
+
+        Loads plans of all the questionnaires if questionnaire_ids is None.
+        Returns a dictionary mapping questionnaire id to its scoring plan, which is
+        a dictionary mapping question id to its QuestionPlan.
+    """
+
+    # Soft deleted questions and choices are left out, like in the questionnaire bundle.
+    rows = surveys_models.Questionnaire.questions.through.objects.filter(
+        question__is_active=True
+    )
+    if questionnaire_ids is not None:
+        rows = rows.filter(questionnaire_id__in=questionnaire_ids)
+
+    rows = rows.order_by('question__choices__id').values_list(
+        'questionnaire_id',
+        'question_id',
+        'question__question_type',
+        'question__choices__text',
+        'question__choices__weightage',
+        'question__choices__is_active',
+    )
+
+    plans = {
+        questionnaire_id: {} for questionnaire_id in questionnaire_ids or ()
+    }
+    for questionnaire_id, question_id, question_type, choice_text, weightage, \
+            choice_is_active in rows:
+        question_plan = plans.setdefault(questionnaire_id, {}).setdefault(
+            question_id, QuestionPlan(question_type, {})
+        )
+        # Questions without any choice gives a row with empty choice text.
+        if choice_text is not None and choice_is_active:
+            # In case of duplicate choice text first one is used for scoring.
+            question_plan.choices.setdefault(choice_text, weightage)
+
+    return plans
+
+
+def build_scoring_plan(questionnaire_id):
+    """ Loads the scoring plan of a questionnaire from the database in a single query.
+
+        Returns a dictionary mapping question id to its QuestionPlan.
+    """
+    return build_scoring_plans([questionnaire_id])[questionnaire_id]
+
+
+def build_questionnaire_snapshot(questionnaire_id):
+    """ Returns the questions of a questionnaire with their choices as JSON serializable list. """
+
+    # Soft deleted questions and choices are left out, like in the questionnaire bundle.
+    rows = surveys_models.Questionnaire.questions.through.objects.filter(
+        questionnaire_id=questionnaire_id, question__is_active=True
+    ).order_by('question_id', 'question__choices__id').values_list(
+        'question_id',
+        'question__text',
+        'question__question_type',
+        'question__choices__id',
+        'question__choices__text',
+        'question__choices__weightage',
+        'question__choices__is_active',
+    )
+
+    questions = OrderedDict()
+    for question_id, text, question_type, choice_id, choice_text, weightage, \
+            choice_is_active in rows:
+        question = questions.setdefault(question_id, {
+            'id': question_id,
+            'text': text,
+            'question_type': question_type,
+            'choices': [],
+        })
+        if choice_id is not None and choice_is_active:
+            question['choices'].append({
+                'id': choice_id, 'text': choice_text, 'weightage': str(weightage)
+            })
+
+    return list(questions.values())
+
+
+def freeze_questionnaire_version(questionnaire_id):
+    """ Returns the QuestionnaireVersion of current content of the questionnaire.
+
+        Snapshot of the content is stored the first time a content version is frozen,
+        afterwards the same version is returned until the content changes. Content
+        version already frozen for other content is never reused, questionnaire is moved
+        to a new content version instead.
+    """
+
+    versions = surveys_models.Questionnaire.all_objects.filter(
+        id=questionnaire_id
+    ).values_list('content_version', flat=True)
+
+    while True:
+        content_version = versions.first()
+        while True:
+            snapshot = json.dumps(build_questionnaire_snapshot(questionnaire_id))
+            # Content changed while taking the snapshot, taking it again so that the
+            # snapshot matches its content version.
+            current_version = versions.first()
+            if current_version == content_version:
+                break
+            content_version = current_version
+
+        version, created = surveys_models.QuestionnaireVersion.all_objects.get_or_create(
+            questionnaire_id=questionnaire_id,
+            content_version=content_version,
+            defaults={'snapshot': snapshot}
+        )
+        if created or version.snapshot == snapshot:
+            return version
+
+        # Version frozen for other content, moving to the next version unless a
+        # concurrent change has already moved it.
+        surveys_models.Questionnaire.all_objects.filter(
+            id=questionnaire_id, content_version=content_version
+        ).update(content_version=F('content_version') + 1)
+
+
+def load_scoring_plan(version):
+    """ Returns ScoringPlan from the snapshot of a QuestionnaireVersion. """
+
+    plan = ScoringPlan(version_id=version.id)
+    for question in json.loads(version.snapshot):
+        choices = {}
+        for choice in question['choices']:
+            # In case of duplicate choice text first one is used for scoring.
+            choices.setdefault(choice['text'], Decimal(choice['weightage']))
+        plan[question['id']] = QuestionPlan(question['question_type'], choices)
+    return plan
+
+
+def get_scoring_plan(questionnaire_id, content_version=None):
+    """ Returns the cached scoring plan of current version of a questionnaire.
+
+        Plan is loaded from the frozen QuestionnaireVersion, so the version id of the
+        plan tells which version a submission scored with it has answered. Plans are
+        cached by the content version, which is read if not given, so that a change made
+        by any process is seen by the others.
+    """
+
+    if content_version is None:
+        content_version = surveys_models.Questionnaire.all_objects.filter(
+            id=questionnaire_id
+        ).values_list('content_version', flat=True).first()
+
+    plan = _scoring_plans.get((questionnaire_id, content_version))
+    if plan is None:
+        version = freeze_questionnaire_version(questionnaire_id)
+        plan = load_scoring_plan(version)
+        _scoring_plans.set((questionnaire_id, version.content_version), plan)
+    return plan
+
+
+def get_version_scoring_plans(version_ids):
+    """ Returns a dictionary mapping id of the QuestionnaireVersions to their scoring plans.
+
+        Plans are loaded from the frozen snapshots of the versions, reusing the cached
+        plans, without freezing the current content of the questionnaires.
+    """
+
+    plans = {}
+    missing_ids = []
+    for version_id, questionnaire_id, content_version in \
+            surveys_models.QuestionnaireVersion.all_objects.filter(
+                id__in=version_ids
+            ).values_list('id', 'questionnaire_id', 'content_version'):
+        plan = _scoring_plans.get((questionnaire_id, content_version))
+        if plan is None:
+            missing_ids.append(version_id)
+        else:
+            plans[version_id] = plan
+
+    if missing_ids:
+        for version in surveys_models.QuestionnaireVersion.all_objects.filter(
+            id__in=missing_ids
+        ):
+            plan = plans[version.id] = load_scoring_plan(version)
+            _scoring_plans.set((version.questionnaire_id, version.content_version), plan)
+    return plans
+
+
+def invalidate_questionnaire(questionnaire_id):
+    """ Removes the scoring plans of the given questionnaire from the cache. """
+    _scoring_plans.delete_matching(lambda key, plan: key[0] == questionnaire_id)
+
+
+def invalidate_question(question_id):
+    """ Removes the scoring plan of every cached questionnaire having the given question. """
+    _scoring_plans.delete_matching(lambda key, plan: question_id in plan)
+
+
+def clear_scoring_plans():
+    """ Removes all the scoring plans from the cache. """
+    _scoring_plans.clear()
+
+
+def score_answers(plan, question_responses):
+    """ Validates the answers of a submission against the scoring plan of the questionnaire.
+
+        All the questions of the questionnaire should be answered, and answers of MCQ or
+        Binary questions should be a choice of the question. Score, weightage of the selected
+        choice, is set in the answers of MCQ or Binary questions.
+    """
+
+    if len(question_responses) != len(plan):
+        raise ValidationError(commons_constants.EMPTY_RESPONSE)
+
+    for question_response in question_responses:
+        question_plan = plan.get(question_response.get('question_id'))
+
+        if question_plan is None:
+            raise ValidationError(
+                commons_constants.SHOULD_BELONG_TO_SAME_QUESTIONNAIRE
+            )
+
+        if question_plan.question_type != surveys_models.Question.TEXT:
+            weightage = question_plan.choices.get(
+                question_response.get('user_input')
+            )
+            if weightage is None:
+                raise ValidationError(commons_constants.INVALID_USER_INPUT)
+            # Weightage of the selected choice, used for calculating risk score.
+            question_response['score'] = weightage
+
+
+def get_risk_level(score):
+    """ Returns the risk level of a submission for the given score. """
+
+    RISK_RANGES = surveys_models.QuestionnaireResponse.RANGES
+
+    if score in RISK_RANGES['MEDIUM']:
+        return surveys_models.QuestionnaireResponse.MEDIUM
+
+    if score in RISK_RANGES['HIGH']:
+        return surveys_models.QuestionnaireResponse.HIGH
+
+    return surveys_models.QuestionnaireResponse.LOW
+
+
+def calculate_score(weightages):
+    """ Returns the risk score for the weightages of the selected choices.
+
+        Risk score is the average of the weightages of MCQ and Binary questions,
+        text questions are not part of the score.
+    """
+
+    if not weightages:
+        return 0
+    return sum(int(weightage) for weightage in weightages) // len(weightages)
@@ -1,12 +1,17 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 
+from django.conf import settings
 from django.db import transaction
+from django.utils import timezone
 
 from rest_framework import serializers
 
 from commons import constants as commons_constants
 from companies import models as companies_models
 from surveys import models as surveys_models
+from surveys import scoring as surveys_scoring
+from surveys import submissions as surveys_submissions
+from surveys import trends as surveys_trends
 
 
 class ChoiceSerializer(serializers.ModelSerializer):
@@ -38,7 +43,7 @@ class QuestionSerializer(serializers.ModelSerializer):
 class QuestionnaireSerializer(serializers.ModelSerializer):
     """ Serializer class for Questionnaire Model. """
 
-    question_counts = serializers.CharField(source="count")
+    question_counts = serializers.CharField(source="question_count")
 
     class Meta:
         model = surveys_models.Questionnaire
@@ -50,8 +55,36 @@ class QuestionnaireSerializer(serializers.ModelSerializer):
         )
 
 
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """ Primary key related field which looks up the instances prefetched in the context.
+
+        context['prefetched'] maps a model to a dictionary of its instances by primary key,
+        lookups of models not prefetched are made against the queryset.
+    """
+
+    def to_internal_value(self, data):
+        prefetched = self.context.get('prefetched', {}).get(self.queryset.model)
+        if prefetched is None:
+            return super().to_internal_value(data)
+
+        try:
+            instance = prefetched.get(int(data))
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if instance is None:
+            self.fail('does_not_exist', pk_value=data)
+        return instance
+
+
 class QuestionResponseSerializer(serializers.ModelSerializer):
-    """ Serializer class for QuestionResponse Model. """
+    """ Serializer class for QuestionResponse Model.
+
+        Question and user input are validated against the questionnaire's scoring
+        plan by QuestionnaireResponseSerializer, as question alone doesn't tell
+        to which questionnaire the response belongs to.
+    """
+
+    question = serializers.IntegerField(source="question_id")
 
     class Meta:
         model = surveys_models.QuestionResponse
@@ -61,24 +94,6 @@ class QuestionResponseSerializer(serializers.ModelSerializer):
             "user_input",
         )
 
-    def validate(self, attr):
-        """ Validating provided question_responses are valid. """
-
-        question = attr.get("question")
-        user_input = attr.get("user_input")
-
-        if question.question_type != surveys_models.Question.TEXT:
-            if not question.choices.filter(text=user_input).exists():
-                raise serializers.ValidationError(
-                    commons_constants.INVALID_USER_INPUT
-                )
-            else:
-                attr['score'] = question.choices.filter(
-                    text=user_input
-                ).first().weightage
-
-        return attr
-
 
 class QuestionnaireResponseSerializer(serializers.ModelSerializer):
     """ Serializer class for QuestionnaireResponse Model. """
@@ -87,6 +102,14 @@ class QuestionnaireResponseSerializer(serializers.ModelSerializer):
     user = serializers.PrimaryKeyRelatedField(
         read_only=True, default=serializers.CurrentUserDefault()
     )
+    company = PrefetchedPrimaryKeyRelatedField(
+        queryset=companies_models.Company.all_objects.all(),
+        required=False,
+        allow_null=True
+    )
+    questionnaire = PrefetchedPrimaryKeyRelatedField(
+        queryset=surveys_models.Questionnaire.all_objects.all()
+    )
 
     class Meta:
         model = surveys_models.QuestionnaireResponse
@@ -98,84 +121,102 @@ class QuestionnaireResponseSerializer(serializers.ModelSerializer):
         )
 
     def validate(self, attr):
-        """ Method to validate if all the questions belong to the same questionnaire. """
+        """ Method to validate if all the questions belong to the same questionnaire
+            and answers given are valid choices of the questions.
+        """
 
         questionnaire = attr.get("questionnaire")
         question_responses = attr.get("question_responses")
 
-        question_in_questionnaire = questionnaire.questions.all()
-
-        if len(question_responses) != question_in_questionnaire.count():
-            raise serializers.ValidationError(
-                commons_constants.EMPTY_RESPONSE
-            )
-
-        for question_response in question_responses:
-            question = question_response.get("question")
-
-            if question not in question_in_questionnaire:
-                raise serializers.ValidationError(
-                    commons_constants.SHOULD_BELONG_TO_SAME_QUESTIONNAIRE
-                )
+        plan = surveys_scoring.get_scoring_plan(
+            questionnaire.id, questionnaire.content_version
+        )
+        surveys_scoring.score_answers(plan, question_responses)
 
         # Getting the current user from the request.
         attr['user'] = self.context['request'].user
+        attr['questionnaire_version_id'] = plan.version_id
         return attr
 
     @transaction.atomic
     def create(self, validated_data):
         """ Method to create question response and questionnaire response objects. """
+        return surveys_submissions.create_questionnaire_responses(
+            [validated_data]
+        )[0]
 
-        # Getting out question responses.
-        question_responses = validated_data.pop("question_responses")
-
-        # creation of questionnaire response object.
-        questionnaire_response = \
-            surveys_models.QuestionnaireResponse.objects.create(
-                **validated_data
-            )
-
-        # Variables for storing risk score for the submission
-        mcq_or_binary_questions = 0
-        total_weightage = 0
-
-        # List of questions in the response
-        questions = []
 
-        for question in question_responses:
-            # If question is not of type TEXT we can take get the weightage
-            # for the selected option
-            if question.get('question').question_type != surveys_models.Question.TEXT:
-                mcq_or_binary_questions += 1
-                total_weightage += int(question.get('score'))
-                question.pop('score')
+class QuestionnaireResponseBatchSerializer(serializers.Serializer):
+    """ Serializer class for submitting many questionnaire responses at once.
 
-            questions.append(
-                surveys_models.QuestionResponse(
-                    **question, questionnaire_response=questionnaire_response
-                )
-            )
+        Each submission is validated by QuestionnaireResponseSerializer independently,
+        valid submissions are created together and invalid ones are reported with
+        their errors.
+    """
 
-        # creating question responses in bulk.
-        surveys_models.QuestionResponse.objects.bulk_create(questions)
+    submissions = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=settings.SUBMISSION_BATCH_MAX_SIZE
+    )
 
-        # Calculating risk score of the submission
-        if mcq_or_binary_questions != 0:
-            questionnaire_response.score = total_weightage//mcq_or_binary_questions
-        else:
-            questionnaire_response.score = 0
+    def get_prefetched(self, submissions):
+        """ Method to fetch questionnaires and companies of all the submissions together. """
+
+        def get_ids(key):
+            ids = set()
+            for submission in submissions:
+                try:
+                    ids.add(int(submission.get(key)))
+                except (TypeError, ValueError):
+                    pass
+            return ids
+
+        return {
+            surveys_models.Questionnaire:
+                surveys_models.Questionnaire.all_objects.in_bulk(
+                    get_ids('questionnaire')
+                ),
+            companies_models.Company:
+                companies_models.Company.all_objects.in_bulk(
+                    get_ids('company')
+                ),
+        }
 
-        RISK_RANGES = questionnaire_response.RANGES
+    @transaction.atomic
+    def save(self, **kwargs):
+        """ Method to create the valid submissions.
 
-        if questionnaire_response.score in RISK_RANGES['MEDIUM']:
-            questionnaire_response.risk_level = questionnaire_response.MEDIUM
+            Returns a list having for each submission either the created
+            QuestionnaireResponse or the errors of the submission.
+        """
 
-        if questionnaire_response.score in RISK_RANGES['HIGH']:
-            questionnaire_response.risk_level = questionnaire_response.HIGH
+        submissions = self.validated_data['submissions']
+        context = dict(
+            self.context, prefetched=self.get_prefetched(submissions)
+        )
 
-        questionnaire_response.save(update_fields=['score', 'risk_level'])
+        results = []
+        valid_submissions = []
+        for submission in submissions:
+            serializer = QuestionnaireResponseSerializer(
+                data=submission, context=context
+            )
+            if serializer.is_valid():
+                valid_submissions.append(serializer.validated_data)
+                results.append(None)
+            else:
+                results.append(serializer.errors)
 
-        return questionnaire_response
+        questionnaire_responses = iter(
+            surveys_submissions.create_questionnaire_responses(
+                valid_submissions
+            )
+        )
+        return [
+            next(questionnaire_responses) if errors is None else errors
+            for errors in results
+        ]
 
 
 class TipsSerializer(serializers.ModelSerializer):
@@ -189,15 +230,35 @@ class TipsSerializer(serializers.ModelSerializer):
         )
 
 
+class QuestionnaireBundleSerializer(serializers.ModelSerializer):
+    """ Serializer class for a Questionnaire with all of its questions, choices and tips. """
+
+    questions = QuestionSerializer(many=True)
+    tips = TipsSerializer(many=True)
+
+    class Meta:
+        model = surveys_models.Questionnaire
+        fields = (
+            "id",
+            "title",
+            "description",
+            "is_mandatory",
+            "content_version",
+            "questions",
+            "tips",
+        )
+
+
 class PendingQuestionnairesSerializer(serializers.ModelSerializer):
     """ Serializer Class for Pending Company Questionnaires of the user. """
 
-    company_name = serializers.SerializerMethodField()
+    id = serializers.IntegerField(source="company_questionnaire_id")
+    company = serializers.IntegerField(source="company_questionnaire.company_id")
+    company_name = serializers.CharField(source="company_questionnaire.company.name")
     questionnaire_title = serializers.CharField(source="questionnaire.title")
-    company_name = serializers.CharField(source="company.name")
 
     class Meta:
-        model = companies_models.CompanyQuestionnaire
+        model = surveys_models.InboxItem
         fields = (
             'id',
             'company',
@@ -207,13 +268,28 @@ class PendingQuestionnairesSerializer(serializers.ModelSerializer):
         )
 
 
+class PendingEmployeeSerializer(serializers.ModelSerializer):
+    """ Serializer class for the employees who haven't submitted a questionnaire. """
+    username = serializers.CharField(source="user.get_full_name")
+    email = serializers.EmailField(source="user.email")
+
+    class Meta:
+        model = companies_models.Employee
+        fields = (
+            'id',
+            'user',
+            'username',
+            'email',
+        )
+
+
 class MandatoryQuestionnairesSerializer(serializers.ModelSerializer):
     """ Serializer class for mandatory questionnaires. """
-    questionnaire_title = serializers.CharField(source="title")
-    questionnaire = serializers.IntegerField(source="id")
+    id = serializers.IntegerField(source="questionnaire_id")
+    questionnaire_title = serializers.CharField(source="questionnaire.title")
 
     class Meta:
-        model = surveys_models.Questionnaire
+        model = surveys_models.InboxItem
         fields = (
             'id',
             'questionnaire_title',
@@ -270,3 +346,145 @@ class PotentialEmployeesSerializer(serializers.ModelSerializer):
             'user',
             'username',
         )
+
+
+class RiskLeaderboardSerializer(serializers.ModelSerializer):
+    """ Serializer class for the score aggregates of the employees in the risk leaderboard. """
+    username = serializers.CharField(source="user.get_full_name")
+
+    class Meta:
+        model = surveys_models.ScoreAggregate
+        fields = (
+            'user',
+            'username',
+            'response_count',
+            'average_score',
+            'last_score',
+            'last_submitted_at',
+        )
+
+
+class WindowRiskLeaderboardSerializer(RiskLeaderboardSerializer):
+    """ Serializer class for the employees in the risk leaderboard of a window of days,
+        submissions and average score are of the window.
+    """
+    response_count = serializers.IntegerField(source='window_response_count')
+    average_score = serializers.FloatField(source='window_average_score')
+
+
+class QuestionnaireCompletionParamsSerializer(serializers.Serializer):
+    """ Serializer class for query parameters of the completion of a questionnaire, after is
+        the next cursor of the previous page of pending employees.
+    """
+    after = serializers.IntegerField(min_value=0, required=False)
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.COMPLETION_PENDING_MAX_SIZE,
+        default=settings.COMPLETION_PENDING_DEFAULT_SIZE
+    )
+
+
+class RiskLeaderboardParamsSerializer(serializers.Serializer):
+    """ Serializer class for query parameters of the risk leaderboard. """
+    window = serializers.IntegerField(min_value=1, required=False)
+    limit = serializers.IntegerField(
+        min_value=1,
+        max_value=settings.LEADERBOARD_MAX_SIZE,
+        default=settings.LEADERBOARD_DEFAULT_SIZE
+    )
+
+
+class ResponseExportParamsSerializer(serializers.Serializer):
+    """ Serializer class for query parameters of the export of questionnaire responses. """
+    questionnaire = serializers.IntegerField(required=False)
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attr):
+        """ Method to validate that the date range is not reversed. """
+        if attr.get('start') and attr.get('end') and attr['start'] > attr['end']:
+            raise serializers.ValidationError(commons_constants.INVALID_DATE_RANGE)
+        return attr
+
+
+class AnswerDistributionParamsSerializer(serializers.Serializer):
+    """ Serializer class for query parameters of the answer distribution, period is YYYY-MM. """
+    period = serializers.DateField(input_formats=['%Y-%m'], required=False)
+
+
+class RiskTrendParamsSerializer(serializers.Serializer):
+    """ Serializer class for query parameters of the risk trend.
+
+        start and end dates default to the last RISK_TREND_DEFAULT_BUCKETS buckets.
+    """
+    bucket = serializers.ChoiceField(
+        choices=surveys_trends.BUCKETS, default=surveys_trends.DAY
+    )
+    questionnaire = serializers.IntegerField(required=False)
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attr):
+        """ Method to validate the date range and number of buckets in it. """
+
+        attr.setdefault('end', timezone.localdate())
+        if 'start' not in attr:
+            start = surveys_trends.get_bucket_start(attr['end'], attr['bucket'])
+            for index in range(settings.RISK_TREND_DEFAULT_BUCKETS - 1):
+                start = surveys_trends.get_bucket_start(
+                    start - timedelta(days=1), attr['bucket']
+                )
+            attr['start'] = start
+
+        if attr['start'] > attr['end']:
+            raise serializers.ValidationError(commons_constants.INVALID_DATE_RANGE)
+        if len(surveys_trends.get_bucket_starts(
+            attr['start'], attr['end'], attr['bucket']
+        )) > settings.RISK_TREND_MAX_BUCKETS:
+            raise serializers.ValidationError(commons_constants.TOO_MANY_BUCKETS)
+        return attr
+
+
+class ScorePercentilesParamsSerializer(serializers.Serializer):
+    """ Serializer class for query parameters of the score percentiles.
+
+        start and end are months (YYYY-MM) both inclusive, defaulting to the current month.
+        percentile can be repeated.
+    """
+    start = serializers.DateField(input_formats=['%Y-%m'], required=False)
+    end = serializers.DateField(input_formats=['%Y-%m'], required=False)
+    percentile = serializers.ListField(
+        child=serializers.FloatField(min_value=0, max_value=100),
+        max_length=settings.SCORE_PERCENTILES_MAX_SIZE,
+        required=False
+    )
+
+    def validate(self, attr):
+        """ Method to set the defaults and validate the months range. """
+
+        current_month = timezone.localdate().replace(day=1)
+        attr.setdefault('end', current_month)
+        attr.setdefault('start', min(attr['end'], current_month))
+        attr['percentile'] = attr.get('percentile') or \
+            settings.SCORE_PERCENTILES_DEFAULT
+        if attr['start'] > attr['end']:
+            raise serializers.ValidationError(commons_constants.INVALID_DATE_RANGE)
+        return attr
+
+
+class UniqueRespondentsParamsSerializer(serializers.Serializer):
+    """ Serializer class for query parameters of the unique respondents.
+
+        start and end dates are inclusive and default to today.
+    """
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+
+    def validate(self, attr):
+        """ Method to set the defaults and validate the date range. """
+
+        attr.setdefault('end', timezone.localdate())
+        attr.setdefault('start', min(attr['end'], timezone.localdate()))
+        if attr['start'] > attr['end']:
+            raise serializers.ValidationError(commons_constants.INVALID_DATE_RANGE)
+        return attr
@@ -1,10 +1,26 @@
 import datetime
 
 from django.dispatch import receiver
-from django.db.models.signals import pre_save, post_save
+from django.utils import timezone
+from django.db.models.signals import (pre_save, post_save, pre_delete, post_delete,
+                                      m2m_changed)
 
-from surveys.models import Questionnaire
-from surveys.tasks import send_questionnaire_notification_to_company_async, send_mandatory_questionnaire_info_async
+from commons.outbox import enqueue_task
+from surveys import availability as surveys_availability
+from surveys import bundles as surveys_bundles
+from surveys import completions as surveys_completions
+from surveys import inbox as surveys_inbox
+from surveys import rollups as surveys_rollups
+from surveys import scoring as surveys_scoring
+from surveys import trends as surveys_trends
+from surveys.submissions import questionnaire_responses_created
+from surveys.models import Questionnaire, Question, Choice, Tip
+from surveys.rescoring import get_questionnaires_of_question
+from surveys.utils import update_question_counts
+from surveys.tasks import (send_questionnaire_notification_to_company_async,
+                           send_mandatory_questionnaire_info_async,
+                           add_mandatory_inbox_items_async,
+                           rescore_questionnaire_responses_async)
 
 
 @receiver(pre_save, sender=Questionnaire)
@@ -23,7 +39,8 @@ def publish_date_update(sender, instance=None, **kwargs):
             # updating the published_on
             instance.published_on = datetime.datetime.now()
             # Sending notifications to the company admins.
-            send_questionnaire_notification_to_company_async.delay(
+            enqueue_task(
+                send_questionnaire_notification_to_company_async,
                 instance.title,
                 instance.id,
                 instance.description,
@@ -36,7 +53,8 @@ def sending_emails_to_companies(sender, instance=None, created=False, **kwargs):
 
     if created and instance.is_published:
         # Only if the questionnaiure is just created and published.
-        send_questionnaire_notification_to_company_async.delay(
+        enqueue_task(
+            send_questionnaire_notification_to_company_async,
             instance.title,
             instance.id,
             instance.description,
@@ -47,4 +65,244 @@ def sending_emails_to_companies(sender, instance=None, created=False, **kwargs):
 def sending_emails_for_mandatory_questionnaires(sender, instance=None, created=False, **kwargs):
     """ Method for sending emails to the user about the mandatory questionnaires. """
     if instance.is_published and instance.is_mandatory:
-        send_mandatory_questionnaire_info_async.delay(instance.id)
+        enqueue_task(send_mandatory_questionnaire_info_async, instance.id)
+
+
+def is_inbox_mandatory(is_active, is_published, is_mandatory):
+    """ Returns whether the questionnaire should be in the inbox of all the users. """
+    return bool(is_active and is_published and is_mandatory)
+
+
+@receiver(pre_save, sender=Questionnaire)
+def store_inbox_mandatory_state(sender, instance=None, **kwargs):
+    """ Method to store whether the questionnaire was in the inbox of all the users. """
+    if instance.id is not None:
+        state = Questionnaire.all_objects.filter(id=instance.id).values_list(
+            'is_active', 'is_published', 'is_mandatory'
+        ).first()
+        instance._was_inbox_mandatory = state is not None and is_inbox_mandatory(*state)
+
+
+@receiver(post_save, sender=Questionnaire)
+def update_mandatory_inbox_items(sender, instance=None, created=False, **kwargs):
+    """ Method to add or remove the questionnaire from the inbox of the users when it
+        becomes published and mandatory or it is no more.
+    """
+
+    was_inbox_mandatory = getattr(instance, '_was_inbox_mandatory', False)
+    if is_inbox_mandatory(instance.is_active, instance.is_published, instance.is_mandatory):
+        # Users are added only once, later saves like fixing a typo leave the inbox.
+        if created or not was_inbox_mandatory:
+            enqueue_task(add_mandatory_inbox_items_async, instance.id)
+    elif was_inbox_mandatory:
+        surveys_inbox.remove_mandatory_items(instance.id)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def invalidate_question_scoring_plans(sender, instance=None, **kwargs):
+    """ Method to invalidate scoring plans of questionnaires having the changed question. """
+    surveys_scoring.invalidate_question(instance.id)
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def invalidate_choice_scoring_plans(sender, instance=None, **kwargs):
+    """ Method to invalidate scoring plans of questionnaires having the changed choice. """
+    surveys_scoring.invalidate_question(instance.question_id)
+
+
+@receiver(m2m_changed, sender=Questionnaire.questions.through)
+def invalidate_questionnaire_scoring_plans(sender, instance=None, action=None,
+                                           reverse=False, pk_set=None, **kwargs):
+    """ Method to invalidate scoring plans on change of questions of questionnaires. """
+
+    if not action.startswith('post_'):
+        return
+
+    if not reverse:
+        # Questions of the questionnaire instance are changed.
+        surveys_scoring.invalidate_questionnaire(instance.id)
+    elif pk_set:
+        # Questionnaires of the question instance are changed.
+        for questionnaire_id in pk_set:
+            surveys_scoring.invalidate_questionnaire(questionnaire_id)
+    else:
+        # Question is cleared from all of its questionnaires.
+        surveys_scoring.invalidate_question(instance.id)
+
+
+@receiver(pre_save, sender=Choice)
+def rescore_on_weightage_change(sender, instance=None, **kwargs):
+    """ Method to rescore the stored responses if weightage of an existing choice is changed. """
+
+    if instance.id is None:
+        return
+
+    before_weightage = Choice.all_objects.filter(
+        id=instance.id
+    ).values_list('weightage', flat=True).first()
+
+    if before_weightage is not None and before_weightage != instance.weightage:
+        questionnaire_ids = get_questionnaires_of_question(instance.question_id)
+        if questionnaire_ids:
+            # Rescoring after commit, so that the task reads the new weightage.
+            enqueue_task(rescore_questionnaire_responses_async, questionnaire_ids)
+
+
+@receiver(post_save, sender=Questionnaire)
+def bump_questionnaire_content_version(sender, instance=None, created=False, **kwargs):
+    """ Method to increment content version on change of the questionnaire. """
+    if not created:
+        surveys_bundles.bump_instance_content_version(instance)
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def bump_question_content_version(sender, instance=None, **kwargs):
+    """ Method to increment content version of questionnaires having the changed question. """
+
+    # Questionnaires of a permanently deleted question are stored before deletion.
+    questionnaire_ids = getattr(instance, '_deleted_questionnaire_ids', None)
+    if questionnaire_ids is None:
+        questionnaire_ids = get_questionnaires_of_question(instance.id)
+    surveys_bundles.bump_content_version(questionnaire_ids)
+
+
+@receiver(post_save, sender=Choice)
+@receiver(post_delete, sender=Choice)
+def bump_choice_content_version(sender, instance=None, **kwargs):
+    """ Method to increment content version of questionnaires having the changed choice. """
+    surveys_bundles.bump_content_version(
+        get_questionnaires_of_question(instance.question_id)
+    )
+
+
+@receiver(post_save, sender=Tip)
+@receiver(post_delete, sender=Tip)
+def bump_tip_content_version(sender, instance=None, **kwargs):
+    """ Method to increment content version of the questionnaire of the changed tip. """
+    surveys_bundles.bump_content_version([instance.questionnaire_id])
+
+
+@receiver(m2m_changed, sender=Questionnaire.questions.through)
+def bump_questions_content_version(sender, instance=None, action=None,
+                                   reverse=False, pk_set=None, **kwargs):
+    """ Method to increment content version on change of questions of questionnaires. """
+
+    if reverse and action == 'pre_clear':
+        # Questionnaires of the question are not known after clearing.
+        instance._cleared_questionnaire_ids = get_questionnaires_of_question(instance.id)
+        return
+
+    if not action.startswith('post_'):
+        return
+
+    if not reverse:
+        surveys_bundles.bump_instance_content_version(instance)
+    elif pk_set:
+        surveys_bundles.bump_content_version(pk_set)
+    else:
+        surveys_bundles.bump_content_version(
+            getattr(instance, '_cleared_questionnaire_ids', None)
+        )
+
+
+@receiver(post_save, sender=Questionnaire)
+def freeze_published_questionnaire_version(sender, instance=None, **kwargs):
+    """ Method to freeze the version of a published questionnaire's current content. """
+    if instance.is_published:
+        surveys_scoring.freeze_questionnaire_version(instance.id)
+
+
+@receiver(m2m_changed, sender=Questionnaire.questions.through)
+def update_questionnaire_question_counts(sender, instance=None, action=None,
+                                         reverse=False, pk_set=None, **kwargs):
+    """ Method to update question_count on change of questions of questionnaires. """
+
+    if not action.startswith('post_'):
+        return
+
+    if not reverse:
+        update_question_counts([instance.id])
+        # Keeping the instance in sync with the stored count.
+        instance.question_count = Questionnaire.all_objects.values_list(
+            'question_count', flat=True
+        ).get(id=instance.id)
+    elif pk_set:
+        update_question_counts(pk_set)
+    else:
+        # Questionnaires stored by bump_questions_content_version before clearing.
+        update_question_counts(getattr(instance, '_cleared_questionnaire_ids', []))
+
+
+@receiver(pre_delete, sender=Question)
+def store_question_questionnaires(sender, instance=None, **kwargs):
+    """ Method to store questionnaires of the question being deleted permanently. """
+    instance._deleted_questionnaire_ids = get_questionnaires_of_question(instance.id)
+
+
+@receiver(post_delete, sender=Question)
+def update_deleted_question_counts(sender, instance=None, **kwargs):
+    """ Method to update question_count of questionnaires of the permanently deleted question. """
+    update_question_counts(getattr(instance, '_deleted_questionnaire_ids', []))
+
+
+@receiver(post_save, sender=Questionnaire)
+@receiver(post_delete, sender=Questionnaire)
+def invalidate_available_questionnaires(sender, instance=None, **kwargs):
+    """ Method to discard cached available questionnaires of companies on change of questionnaire. """
+    surveys_availability.invalidate_all()
+
+
+@receiver(questionnaire_responses_created)
+def add_daily_fill_rates(sender, questionnaire_responses=None, **kwargs):
+    """ Method to add the created questionnaire responses to the daily fill rates. """
+    surveys_rollups.add_fill_rates(questionnaire_responses)
+
+
+@receiver(questionnaire_responses_created)
+def add_score_aggregates(sender, questionnaire_responses=None, **kwargs):
+    """ Method to add scores of the created questionnaire responses to the score aggregates. """
+    surveys_rollups.add_score_aggregates(questionnaire_responses)
+
+
+@receiver(questionnaire_responses_created)
+def add_answer_counts(sender, question_responses=None, **kwargs):
+    """ Method to add answers of the created questionnaire responses to the answer counts. """
+    surveys_rollups.add_answer_counts(question_responses)
+
+
+@receiver(questionnaire_responses_created)
+def invalidate_risk_trends(sender, questionnaire_responses=None, **kwargs):
+    """ Method to discard the cached risk trend buckets on backdated submissions. """
+    start_of_today = surveys_trends.get_start_of_day(timezone.localdate())
+    if any(
+        questionnaire_response.created_at < start_of_today
+        for questionnaire_response in questionnaire_responses
+    ):
+        surveys_trends.invalidate_risk_trends()
+
+
+@receiver(questionnaire_responses_created)
+def add_score_counts(sender, questionnaire_responses=None, **kwargs):
+    """ Method to add scores of the created questionnaire responses to the score histograms. """
+    surveys_rollups.add_score_counts(questionnaire_responses)
+
+
+@receiver(questionnaire_responses_created)
+def add_respondent_sketches(sender, questionnaire_responses=None, **kwargs):
+    """ Method to add users of the created questionnaire responses to the respondent sketches. """
+    surveys_rollups.add_respondent_sketches(questionnaire_responses)
+
+
+@receiver(questionnaire_responses_created)
+def add_completions(sender, questionnaire_responses=None, **kwargs):
+    """ Method to mark the employees of the created questionnaire responses as completed. """
+    surveys_completions.add_completions(questionnaire_responses)
+
+
+@receiver(questionnaire_responses_created)
+def clear_inbox_items(sender, questionnaire_responses=None, **kwargs):
+    """ Method to remove the submitted questionnaires from the inbox of the users. """
+    surveys_inbox.clear_items(questionnaire_responses)
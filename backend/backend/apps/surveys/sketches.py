@@ -0,0 +1,87 @@
+import hashlib
+import math
+import zlib
+
+import numpy as np
+
+# Number of index bits of the HyperLogLog sketches, sketch has 2 ** PRECISION registers
+# and standard error of 1.04 / sqrt(2 ** PRECISION), about 1.6%.
+# Changing it makes the stored sketches unmergeable with the new ones.
+PRECISION = 12
+
+# Number of bits of the hashes of the values.
+HASH_BITS = 64
+
+
+def get_hash(value):
+    """ Returns 64 bit hash of the value, same across processes. """
+    return int.from_bytes(
+        hashlib.blake2b(str(value).encode(), digest_size=HASH_BITS // 8).digest(), 'big'
+    )
+
+
+class HyperLogLog(object):
+    """ HyperLogLog sketch for estimating number of distinct values.
+
+        Each register keeps the maximum rank, position of the first set bit, of the hashes
+        falling in it. Sketches are merged by taking maximum of each register, so sketch
+        of a union is the merge of sketches of its parts.
+    """
+
+    def __init__(self, registers=None, precision=PRECISION):
+        self.precision = precision
+        self.size = 1 << precision
+        if registers is None:
+            registers = np.zeros(self.size, dtype=np.uint8)
+        if len(registers) != self.size:
+            raise ValueError(f'Expected {self.size} registers, got {len(registers)}.')
+        self.registers = registers
+
+    def add(self, value):
+        """ Adds the value to the sketch. """
+        hash_value = get_hash(value)
+        index = hash_value >> (HASH_BITS - self.precision)
+        remaining = hash_value & ((1 << (HASH_BITS - self.precision)) - 1)
+        rank = HASH_BITS - self.precision - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def update(self, values):
+        """ Adds all the values to the sketch. """
+        for value in values:
+            self.add(value)
+
+    def merge(self, other):
+        """ Merges the other sketch into this sketch. """
+        if other.precision != self.precision:
+            raise ValueError('Sketches of different precision can not be merged.')
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self):
+        """ Returns estimated number of distinct values added to the sketch. """
+
+        size = self.size
+        alpha = 0.7213 / (1 + 1.079 / size)
+        estimate = alpha * size * size / float(
+            np.sum(np.ldexp(1.0, -self.registers.astype(np.int32)))
+        )
+
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * size and zeros:
+            # Linear counting is more accurate for small cardinalities.
+            estimate = size * math.log(size / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self):
+        """ Returns compressed registers for storing the sketch, mostly empty sketches
+            of small cardinalities compress to a few bytes.
+        """
+        return zlib.compress(self.registers.tobytes())
+
+    @classmethod
+    def from_bytes(cls, data, precision=PRECISION):
+        """ Returns sketch from the compressed registers returned by to_bytes. """
+        return cls(
+            np.frombuffer(zlib.decompress(bytes(data)), dtype=np.uint8).copy(),
+            precision=precision
+        )
@@ -0,0 +1,237 @@
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+
+from django.conf import settings
+from django.utils import timezone
+
+from surveys import models as surveys_models
+
+# Columns of the snapshot, one row per answer, with their types. Codes are indexes
+# into the dictionaries of the snapshot.
+COLUMNS = (
+    ('response_id', np.int64),
+    ('submitted_at', 'datetime64[s]'),
+    ('user_id', np.int64),
+    ('questionnaire_id', np.int64),
+    ('score', np.int16),
+    ('risk_level', np.int8),
+    ('question_code', np.int32),
+    ('answer_code', np.int32),
+)
+
+# Score of the responses which aren't scored.
+UNSCORED = -1
+
+# Answer code of the answers to text questions, free text isn't written to the snapshot.
+TEXT_ANSWER = -1
+
+META_FILE = 'meta.json'
+QUESTION_IDS_FILE = 'question_ids.npy'
+ANSWERS_FILE = 'answers.json'
+
+
+def get_snapshot_path(company_id, directory=None):
+    """ Returns path of the snapshot of the company, a link to the directory of its
+        current version.
+    """
+    return os.path.join(
+        directory or settings.ANALYTICS_SNAPSHOT_DIR, f'company-{company_id}'
+    )
+
+
+def swap_snapshot(path, version_path):
+    """ Points the snapshot path to the directory of the new version, replacing the link
+        atomically, so that readers always find a complete snapshot. Previous version is
+        deleted after the swap.
+    """
+
+    old_version_path = os.path.realpath(path) if os.path.islink(path) else None
+    if os.path.isdir(path) and old_version_path is None:
+        # Snapshot written before the snapshots were versioned, moved to a version.
+        old_version_path = os.path.join(
+            os.path.dirname(path), f'.{os.path.basename(path)}-{uuid.uuid4().hex}'
+        )
+        os.rename(path, old_version_path)
+        os.symlink(os.path.basename(old_version_path), path)
+
+    link_path = f'{version_path}.link'
+    os.symlink(os.path.basename(version_path), link_path)
+    try:
+        os.replace(link_path, path)
+    except BaseException:
+        os.remove(link_path)
+        raise
+
+    if old_version_path:
+        shutil.rmtree(old_version_path, ignore_errors=True)
+
+
+class Encoder(object):
+    """ Dictionary encoder assigning codes to values in order of first appearance. """
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def encode(self, value):
+        """ Returns the code of the value. """
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+def write_company_snapshot(company_id, directory=None, chunk_size=None):
+    """ Writes the answers of the company's questionnaire responses as columnar snapshot.
+
+        Each column is a typed .npy file, which can be memory mapped by the reader.
+        Question ids and answers to choice questions are dictionary encoded, answers to
+        text questions have TEXT_ANSWER code. Snapshot is written in the
+        directory of a new version, which the snapshot path is switched to once complete.
+        Returns the number of rows written.
+    """
+
+    chunk_size = chunk_size or settings.ANALYTICS_SNAPSHOT_CHUNK_SIZE
+    path = get_snapshot_path(company_id, directory)
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+
+    answers = surveys_models.QuestionResponse.objects.filter(
+        questionnaire_response__company_id=company_id,
+        questionnaire_response__is_active=True
+    )
+    # Answers created while writing are left for the next snapshot.
+    last_id = answers.order_by('-id').values_list('id', flat=True).first() or 0
+    answers = answers.filter(id__lte=last_id)
+    count = answers.count()
+
+    version_path = os.path.join(parent, f'.{os.path.basename(path)}-{uuid.uuid4().hex}')
+    os.makedirs(version_path)
+    try:
+        columns = {
+            name: np.lib.format.open_memmap(
+                os.path.join(version_path, f'{name}.npy'),
+                mode='w+', dtype=dtype, shape=(count,)
+            ) for name, dtype in COLUMNS
+        }
+        questions = Encoder()
+        user_inputs = Encoder()
+
+        rows = answers.order_by('id').values_list(
+            'questionnaire_response_id',
+            'questionnaire_response__created_at',
+            'questionnaire_response__user_id',
+            'questionnaire_response__questionnaire_id',
+            'questionnaire_response__score',
+            'questionnaire_response__risk_level',
+            'question_id',
+            'user_input',
+            'question__question_type',
+        ).iterator(chunk_size=chunk_size)
+
+        written = 0
+        for index, row in enumerate(rows):
+            if index == count:
+                break
+            columns['response_id'][index] = row[0]
+            columns['submitted_at'][index] = np.datetime64(
+                int(row[1].timestamp()), 's'
+            )
+            columns['user_id'][index] = row[2]
+            columns['questionnaire_id'][index] = row[3]
+            columns['score'][index] = UNSCORED if row[4] is None else row[4]
+            columns['risk_level'][index] = row[5]
+            columns['question_code'][index] = questions.encode(row[6])
+            columns['answer_code'][index] = (
+                TEXT_ANSWER if row[8] == surveys_models.Question.TEXT
+                else user_inputs.encode(row[7])
+            )
+            written = index + 1
+
+        for column in columns.values():
+            column.flush()
+        del columns
+
+        np.save(
+            os.path.join(version_path, QUESTION_IDS_FILE),
+            np.array(questions.values, dtype=np.int64)
+        )
+        with open(os.path.join(version_path, ANSWERS_FILE), 'w') as file:
+            json.dump(user_inputs.values, file)
+        with open(os.path.join(version_path, META_FILE), 'w') as file:
+            json.dump({
+                'company_id': company_id,
+                'rows': written,
+                'created_at': timezone.now().isoformat(),
+                'columns': {name: np.dtype(dtype).str for name, dtype in COLUMNS},
+            }, file)
+
+        swap_snapshot(path, version_path)
+    except BaseException:
+        # Previous snapshot is left as it is.
+        shutil.rmtree(version_path, ignore_errors=True)
+        raise
+
+    return written
+
+
+class Snapshot(object):
+    """ Reader of a company's columnar snapshot.
+
+        Columns are memory mapped numpy arrays, available as snapshot['column'].
+        question_ids and answers decode question_code and answer_code columns, answers
+        to text questions aren't decodable.
+    """
+
+    def __init__(self, company_id, directory=None):
+        # Resolving the version once, so that all the files are of the same version even
+        # if a new snapshot is swapped in while reading.
+        self.path = os.path.realpath(get_snapshot_path(company_id, directory))
+        with open(os.path.join(self.path, META_FILE)) as file:
+            self.meta = json.load(file)
+        rows = self.meta['rows']
+        self.columns = {
+            name: np.load(os.path.join(self.path, f'{name}.npy'), mmap_mode='r')[:rows]
+            for name in self.meta['columns']
+        }
+        self.question_ids = np.load(os.path.join(self.path, QUESTION_IDS_FILE))
+        with open(os.path.join(self.path, ANSWERS_FILE)) as file:
+            self.answers = json.load(file)
+
+    def __len__(self):
+        return self.meta['rows']
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def question_code(self, question_id):
+        """ Returns code of the question in the question_code column, or None. """
+        codes = np.flatnonzero(self.question_ids == question_id)
+        return int(codes[0]) if len(codes) else None
+
+    def answer_counts(self, question_id):
+        """ Returns a dictionary of answer to its count for the question. """
+        code = self.question_code(question_id)
+        if code is None:
+            return {}
+        answer_codes = self['answer_code'][self['question_code'] == code]
+        answer_codes = answer_codes[answer_codes != TEXT_ANSWER]
+        counts = np.bincount(answer_codes, minlength=len(self.answers))
+        return {
+            self.answers[answer_code]: int(counts[answer_code])
+            for answer_code in np.flatnonzero(counts)
+        }
+
+
+def write_snapshots(directory=None):
+    """ Writes the snapshots of all the companies having questionnaire responses. """
+    company_ids = surveys_models.QuestionnaireResponse.objects.filter(
+        company__isnull=False
+    ).order_by().values_list('company_id', flat=True).distinct()
+    for company_id in company_ids:
+        write_company_snapshot(company_id, directory)
@@ -0,0 +1,97 @@
+from django.db import connection
+from django.dispatch import Signal
+
+from surveys import models as surveys_models
+from surveys import scoring as surveys_scoring
+
+# Sent inside the transaction after questionnaire responses are created, for keeping
+# the data derived from the responses up to date.
+questionnaire_responses_created = Signal(
+    providing_args=['questionnaire_responses', 'question_responses']
+)
+
+
+def build_questionnaire_response(submission):
+    """ Returns unsaved QuestionnaireResponse and QuestionResponse objects of a submission.
+
+        submission is the validated data of QuestionnaireResponseSerializer, where
+        responses of MCQ or Binary questions are having score, weightage of the selected choice.
+    """
+
+    submission = dict(submission)
+    answers = submission.pop('question_responses')
+
+    score = surveys_scoring.calculate_score(
+        [answer['score'] for answer in answers if 'score' in answer]
+    )
+    questionnaire_response = surveys_models.QuestionnaireResponse(
+        score=score,
+        risk_level=surveys_scoring.get_risk_level(score),
+        **submission
+    )
+    question_responses = [
+        surveys_models.QuestionResponse(
+            questionnaire_response=questionnaire_response,
+            question_id=answer['question_id'],
+            user_input=answer['user_input'],
+        ) for answer in answers
+    ]
+    return questionnaire_response, question_responses
+
+
+def create_questionnaire_responses(submissions):
+    """ Creates the questionnaire responses of the submissions with set based writes.
+
+        All questionnaire responses are inserted in one statement followed by one
+        statement for all the question responses, hence should be called inside a transaction.
+        Submission can have created_at, for keeping the time of submissions imported from
+        other systems.
+        Returns the created QuestionnaireResponse objects in order of submissions.
+    """
+
+    # Time of submissions is overwritten on insertion, as created_at is auto_now_add.
+    created_at = [submission.get('created_at') for submission in submissions]
+
+    questionnaire_responses = []
+    question_responses = []
+
+    for submission in submissions:
+        questionnaire_response, answers = build_questionnaire_response(
+            submission
+        )
+        questionnaire_responses.append(questionnaire_response)
+        question_responses.extend(answers)
+
+    if connection.features.can_return_ids_from_bulk_insert:
+        surveys_models.QuestionnaireResponse.objects.bulk_create(
+            questionnaire_responses
+        )
+    else:
+        # Database can't return the ids of bulk inserted rows, which are required
+        # for inserting question responses.
+        for questionnaire_response in questionnaire_responses:
+            questionnaire_response.save()
+
+    # Ids of questionnaire responses are assigned after question responses were built.
+    for question_response in question_responses:
+        question_response.questionnaire_response_id = \
+            question_response.questionnaire_response.id
+
+    surveys_models.QuestionResponse.objects.bulk_create(question_responses)
+
+    backdated = []
+    for questionnaire_response, submitted_at in zip(questionnaire_responses, created_at):
+        if submitted_at is not None:
+            questionnaire_response.created_at = submitted_at
+            backdated.append(questionnaire_response)
+    if backdated:
+        surveys_models.QuestionnaireResponse.all_objects.bulk_update(
+            backdated, ['created_at']
+        )
+
+    questionnaire_responses_created.send(
+        sender=surveys_models.QuestionnaireResponse,
+        questionnaire_responses=questionnaire_responses,
+        question_responses=question_responses
+    )
+    return questionnaire_responses
@@ -1,9 +1,17 @@
+import os
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from celery import shared_task
+from celery import chain, group, shared_task
 
 from companies.models import Employee
-from surveys.utils import send_questionnaire_notification_to_company, send_mandatory_questionnaire_info
-from surveys.models import Questionnaire
+from surveys.fanouts import create_fanout, get_lanes, get_resumable_chunks, send_chunk
+from surveys.inbox import add_mandatory_items
+from surveys.ingestion import drain_submission_queue
+from surveys.utils import send_questionnaire_notification_to_company
+from surveys.rescoring import rescore_questionnaire
+from surveys.rollups import rebuild_score_aggregates, rebuild_score_counts
+from surveys.snapshots import write_snapshots
 
 AUTH_USER = get_user_model()
 
@@ -12,26 +20,85 @@ AUTH_USER = get_user_model()
 def send_questionnaire_notification_to_company_async(title, id, description):
     """ Sending Company admins information about newly added questionnaire. """
 
-    # Getting all the active company admins.
+    # Getting all the active company admins, once even if admin of many companies.
     company_admins = Employee.objects.filter(
         is_company_admin=True
-    ).values_list('user__email', flat=True)
+    ).order_by().values_list('user__email', 'user__first_name').distinct()
 
-    # Sending mail to all the company admins
-    send_questionnaire_notification_to_company(
+    # Sending mail to each of the company admins, returning the failed ones.
+    return send_questionnaire_notification_to_company(
         company_admins, title, id, description
     )
 
 
 @shared_task
 def send_mandatory_questionnaire_info_async(questionnaireId):
-    """ Async task for sending email for mandatory question to the users. """
-    user_emails = AUTH_USER.objects.all().values_list('email', flat=True)
-    questionnaire = Questionnaire.objects.get(id=questionnaireId)
-    try:
-        send_mandatory_questionnaire_info(
-            user_emails, questionnaireId, questionnaire.title,
-            questionnaire.description
-        )
-    except Exception as e:
-        pass
+    """ Async task for sending email for mandatory question to the users.
+
+        Users are split into chunks sent by MAIL_FANOUT_CONCURRENCY lanes of tasks, users
+        are informed only once about a questionnaire.
+    """
+    fanout, created = create_fanout(questionnaireId)
+    if created:
+        dispatch_mail_fanout(fanout.chunks.all())
+
+
+@shared_task
+def send_mandatory_mail_chunk_async(chunk_id):
+    """ Async task for sending email for mandatory question to a chunk of the users. """
+    send_chunk(chunk_id)
+
+
+@shared_task
+def resume_mail_fanout_async(fanout_id):
+    """ Async task for sending the chunks of a mail fanout which failed or whose task is
+        stopped, chunks still queued or being sent are left to their tasks.
+    """
+    return dispatch_mail_fanout(get_resumable_chunks(fanout_id))
+
+
+def dispatch_mail_fanout(chunks):
+    """ Method to send the chunks of a fanout as a group of chains, so that at most
+        MAIL_FANOUT_CONCURRENCY chunks are sent at a time.
+
+        Returns the number of chunks dispatched.
+    """
+
+    chunk_ids = list(chunks.order_by('start_id').values_list('id', flat=True))
+    lanes = get_lanes(chunk_ids, settings.MAIL_FANOUT_CONCURRENCY)
+    if lanes:
+        group(
+            chain(send_mandatory_mail_chunk_async.si(chunk_id) for chunk_id in lane)
+            for lane in lanes
+        ).apply_async()
+    return len(chunk_ids)
+
+
+@shared_task
+def add_mandatory_inbox_items_async(questionnaire_id):
+    """ Async task for adding the mandatory questionnaire to the inbox of the users. """
+    add_mandatory_items(questionnaire_id)
+
+
+@shared_task
+def rescore_questionnaire_responses_async(questionnaire_ids):
+    """ Async task for recalculating score and risk level of the responses of questionnaires. """
+    for questionnaire_id in questionnaire_ids:
+        rescore_questionnaire(questionnaire_id)
+    # Aggregates and histograms are made of the old scores.
+    rebuild_score_aggregates(questionnaire_ids)
+    rebuild_score_counts(questionnaire_ids)
+
+
+@shared_task
+def drain_submission_queue_async():
+    """ Async task for writing the queued submissions to the database. """
+    # Nothing to drain if the write behind ingestion was never used.
+    if os.path.exists(settings.SUBMISSION_QUEUE_PATH):
+        drain_submission_queue()
+
+
+@shared_task
+def write_analytics_snapshots_async():
+    """ Async task for writing the columnar snapshots of the companies' responses. """
+    write_snapshots()
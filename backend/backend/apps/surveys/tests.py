@@ -1,3 +1,2129 @@
-from django.test import TestCase
+import csv
+import datetime
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import F
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ddf import G
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from commons import constants as commons_constant
+from commons import models as commons_models
+from commons.decorators import get_hash
+from companies import models as companies_models
+from companies import tasks as companies_tasks
+from surveys import completions as surveys_completions
+from surveys import fanouts as surveys_fanouts
+from surveys import inbox as surveys_inbox
+from surveys import models as surveys_models
+from surveys import ingestion as surveys_ingestion
+from surveys import rescoring as surveys_rescoring
+from surveys import scoring as surveys_scoring
+from surveys import sketches as surveys_sketches
+from surveys import snapshots as surveys_snapshots
+from surveys import rollups as surveys_rollups
+from surveys import submissions as surveys_submissions
+from surveys import tasks as surveys_tasks
+
+AUTH_USER = get_user_model()
+
+
+def create_questionnaire(question_count=2, weightages=(Decimal('10.00'), Decimal('90.00'))):
+    """ Method for creating a questionnaire with MCQ questions having given choice weightages. """
+
+    questionnaire = G(
+        surveys_models.Questionnaire, is_published=False, is_mandatory=False
+    )
+    for index in range(question_count):
+        question = G(
+            surveys_models.Question,
+            text=f'question {index}',
+            question_type=surveys_models.Question.MCQ
+        )
+        for weightage in weightages:
+            G(
+                surveys_models.Choice,
+                question=question,
+                text=f'choice {weightage}',
+                weightage=weightage
+            )
+        questionnaire.questions.add(question)
+    return questionnaire
+
+
+def get_submission_data(questionnaire, answer='choice 90.00'):
+    """ Method for making submission data answering all the questions with same answer. """
+
+    return {
+        'questionnaire': questionnaire.id,
+        'question_responses': [
+            {'question': question.id, 'user_input': answer}
+            for question in questionnaire.questions.all()
+        ]
+    }
+
+
+class SurveysAPITestCase(APITestCase):
+    """ Base TestCase authenticating an email verified user. """
+
+    def setUp(self):
+        surveys_scoring.clear_scoring_plans()
+        self.user = G(AUTH_USER, is_email_verified=True)
+        self.client.force_authenticate(self.user)
+
+
+class QuestionnaireSubmissionAPITestCase(SurveysAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('surveys:submit')
+
+    def test_submission_success(self):
+        """ Test to check score and risk level of a valid submission. """
+
+        questionnaire = create_questionnaire()
+
+        response = self.client.post(
+            self.url, data=get_submission_data(questionnaire), format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data[commons_constant.RISK_SCORE], 90)
+
+        questionnaire_response = surveys_models.QuestionnaireResponse.objects.get(
+            id=response.data['id']
+        )
+        self.assertEqual(questionnaire_response.user, self.user)
+        self.assertEqual(
+            questionnaire_response.risk_level,
+            surveys_models.QuestionnaireResponse.HIGH
+        )
+        self.assertEqual(questionnaire_response.question_responses.count(), 2)
+
+    def test_invalid_user_input(self):
+        """ Test for submitting an answer which is not a choice of the question. """
+
+        questionnaire = create_questionnaire()
+
+        response = self.client.post(
+            self.url,
+            data=get_submission_data(questionnaire, answer='unknown'),
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(surveys_models.QuestionnaireResponse.objects.exists())
+
+    def test_question_of_other_questionnaire(self):
+        """ Test for submitting answer of a question which belongs to some other questionnaire. """
+
+        questionnaire = create_questionnaire()
+        other_questionnaire = create_questionnaire()
+
+        data = get_submission_data(questionnaire)
+        data['question_responses'][0]['question'] = \
+            other_questionnaire.questions.first().id
+
+        response = self.client.post(self.url, data=data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data['non_field_errors'][0],
+            commons_constant.SHOULD_BELONG_TO_SAME_QUESTIONNAIRE
+        )
+
+    def test_constant_number_of_queries(self):
+        """ Test that queries made by a submission doesn't depend on number of questions. """
+
+        small_questionnaire = create_questionnaire(question_count=2)
+        large_questionnaire = create_questionnaire(question_count=20)
+
+        # Warming up scoring plan cache of both the questionnaires.
+        surveys_scoring.get_scoring_plan(small_questionnaire.id)
+        surveys_scoring.get_scoring_plan(large_questionnaire.id)
+
+        small_data = get_submission_data(small_questionnaire)
+        large_data = get_submission_data(large_questionnaire)
+
+        # Includes removing the questionnaire from the inbox of the user.
+        with self.assertNumQueries(6):
+            response = self.client.post(self.url, data=small_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(6):
+            response = self.client.post(self.url, data=large_data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+class QuestionnaireBatchSubmissionAPITestCase(SurveysAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('surveys:submit-batch')
+
+    def test_batch_submission_with_invalid_item(self):
+        """ Test that valid submissions get created and invalid ones are reported. """
+
+        questionnaire = create_questionnaire()
+        other_questionnaire = create_questionnaire(question_count=3)
+
+        data = {
+            'submissions': [
+                get_submission_data(questionnaire),
+                get_submission_data(questionnaire, answer='unknown'),
+                get_submission_data(other_questionnaire, answer='choice 10.00'),
+            ]
+        }
+
+        response = self.client.post(self.url, data=data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        results = response.data[commons_constant.RESULTS]
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0][commons_constant.RISK_SCORE], 90)
+        self.assertIn('errors', results[1])
+        self.assertEqual(results[2][commons_constant.RISK_SCORE], 10)
+
+        self.assertEqual(
+            surveys_models.QuestionnaireResponse.objects.filter(user=self.user).count(), 2
+        )
+        self.assertEqual(
+            surveys_models.QuestionResponse.objects.get(
+                questionnaire_response__id=results[0]['id'],
+                question=questionnaire.questions.first()
+            ).user_input,
+            'choice 90.00'
+        )
+        self.assertEqual(
+            surveys_models.QuestionResponse.objects.filter(
+                questionnaire_response__id=results[2]['id']
+            ).count(),
+            3
+        )
+
+    def test_batch_submission_success(self):
+        """ Test that all the submissions of a valid batch are created. """
+
+        questionnaire = create_questionnaire()
+
+        data = {'submissions': [get_submission_data(questionnaire)] * 5}
+
+        response = self.client.post(self.url, data=data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            surveys_models.QuestionnaireResponse.objects.filter(user=self.user).count(), 5
+        )
+
+    def test_unknown_questionnaire(self):
+        """ Test for submitting to a questionnaire which doesn't exists. """
+
+        questionnaire = create_questionnaire()
+        data = get_submission_data(questionnaire)
+        data['questionnaire'] = questionnaire.id + 100
+
+        response = self.client.post(
+            self.url, data={'submissions': [data]}, format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertIn(
+            'questionnaire', response.data[commons_constant.RESULTS][0]['errors']
+        )
+
+
+class IdempotentSubmissionAPITestCase(SurveysAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('surveys:submit')
+        self.questionnaire = create_questionnaire()
+        self.headers = {'HTTP_IDEMPOTENCY_KEY': 'retry-key'}
+
+    def test_retried_submission_is_replayed(self):
+        """ Test that retrying with the same key replays the response without a new submission. """
+
+        data = get_submission_data(self.questionnaire)
+
+        response = self.client.post(self.url, data=data, format='json', **self.headers)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        retried = self.client.post(self.url, data=data, format='json', **self.headers)
+        self.assertEqual(retried.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retried.data, response.data)
+        self.assertEqual(
+            retried[commons_constant.IDEMPOTENCY_KEY_REPLAYED_HEADER], 'true'
+        )
+        self.assertEqual(surveys_models.QuestionnaireResponse.objects.count(), 1)
+
+    def test_key_reused_with_different_body(self):
+        """ Test that reusing a key for a different request body is rejected. """
+
+        self.client.post(
+            self.url, data=get_submission_data(self.questionnaire),
+            format='json', **self.headers
+        )
+
+        response = self.client.post(
+            self.url,
+            data=get_submission_data(self.questionnaire, answer='choice 10.00'),
+            format='json', **self.headers
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(surveys_models.QuestionnaireResponse.objects.count(), 1)
+
+    def test_request_in_progress(self):
+        """ Test that a duplicate of a request still in progress is rejected. """
+
+        data = get_submission_data(self.questionnaire)
+        G(
+            commons_models.IdempotencyKey,
+            key=get_hash(self.user.id, 'POST', self.url, 'retry-key'),
+            fingerprint=get_hash(json.dumps(data, sort_keys=True)),
+            status_code=None,
+            expires_at=timezone.now() + datetime.timedelta(hours=1),
+            locked_until=timezone.now() + datetime.timedelta(minutes=1),
+        )
+
+        response = self.client.post(self.url, data=data, format='json', **self.headers)
+
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertFalse(surveys_models.QuestionnaireResponse.objects.exists())
+
+    def test_stopped_request_releases_key(self):
+        """ Test that a key of a request stopped before responding can be retried once
+            its lock is passed.
+        """
+
+        data = get_submission_data(self.questionnaire)
+        G(
+            commons_models.IdempotencyKey,
+            key=get_hash(self.user.id, 'POST', self.url, 'retry-key'),
+            fingerprint=get_hash(json.dumps(data, sort_keys=True)),
+            status_code=None,
+            expires_at=timezone.now() + datetime.timedelta(hours=1),
+            locked_until=timezone.now() - datetime.timedelta(seconds=1),
+        )
+
+        response = self.client.post(self.url, data=data, format='json', **self.headers)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        retried = self.client.post(self.url, data=data, format='json', **self.headers)
+        self.assertEqual(retried.data, response.data)
+        self.assertEqual(surveys_models.QuestionnaireResponse.objects.count(), 1)
+
+    def test_failed_request_releases_key(self):
+        """ Test that a key of a failed request can be retried. """
+
+        self.client.post(
+            self.url,
+            data=get_submission_data(self.questionnaire, answer='unknown'),
+            format='json', **self.headers
+        )
+
+        response = self.client.post(
+            self.url, data=get_submission_data(self.questionnaire),
+            format='json', **self.headers
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+class WriteBehindSubmissionAPITestCase(SurveysAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(
+            SUBMISSION_WRITE_BEHIND=True,
+            SUBMISSION_QUEUE_PATH=os.path.join(directory.name, 'queue.sqlite3')
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def get_receipt(self, receipt):
+        """ Method for fetching status of the receipt. """
+        return self.client.get(
+            reverse('surveys:submit-receipt', kwargs={'receipt': receipt})
+        )
+
+    def test_submission_is_queued_and_drained(self):
+        """ Test that queued submission gets resolved to the response after draining. """
+
+        questionnaire = create_questionnaire()
+
+        response = self.client.post(
+            reverse('surveys:submit'),
+            data=get_submission_data(questionnaire),
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertFalse(surveys_models.QuestionnaireResponse.objects.exists())
+        receipt = response.data[commons_constant.RECEIPT]
+
+        response = self.get_receipt(receipt)
+        self.assertEqual(
+            response.data[commons_constant.STATUS], surveys_ingestion.PENDING
+        )
+
+        self.assertEqual(surveys_ingestion.drain_submission_queue(), 1)
+
+        response = self.get_receipt(receipt)
+        questionnaire_response = surveys_models.QuestionnaireResponse.objects.get()
+        self.assertEqual(
+            response.data[commons_constant.STATUS], surveys_ingestion.PROCESSED
+        )
+        self.assertEqual(response.data['id'], questionnaire_response.id)
+        self.assertEqual(response.data[commons_constant.RISK_SCORE], 90)
+        self.assertEqual(questionnaire_response.receipt, receipt)
+        self.assertEqual(questionnaire_response.question_responses.count(), 2)
+
+    def test_invalid_submission_is_not_queued(self):
+        """ Test that submissions are validated before queuing. """
+
+        questionnaire = create_questionnaire()
+
+        response = self.client.post(
+            reverse('surveys:submit'),
+            data=get_submission_data(questionnaire, answer='unknown'),
+            format='json'
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(surveys_ingestion.drain_submission_queue(), 0)
+
+    @override_settings(SUBMISSION_QUEUE_CLAIM_TIMEOUT=-1)
+    def test_reclaimed_submission_is_not_duplicated(self):
+        """ Test that submission written by a stopped worker is not written again. """
+
+        questionnaire = create_questionnaire()
+        response = self.client.post(
+            reverse('surveys:submit'),
+            data=get_submission_data(questionnaire),
+            format='json'
+        )
+        receipt = response.data[commons_constant.RECEIPT]
+
+        # Worker which wrote the submission but stopped before completing the receipt.
+        queue = surveys_ingestion.SubmissionQueue()
+        for claimed_receipt, payload in queue.claim(10):
+            surveys_submissions.create_questionnaire_responses(
+                [surveys_ingestion.load_submission(claimed_receipt, payload)]
+            )
+
+        self.assertEqual(surveys_ingestion.drain_submission_queue(), 1)
+        self.assertEqual(surveys_models.QuestionnaireResponse.objects.count(), 1)
+        self.assertEqual(
+            self.get_receipt(receipt).data[commons_constant.STATUS],
+            surveys_ingestion.PROCESSED
+        )
+
+    @override_settings(SUBMISSION_QUEUE_CLAIM_TIMEOUT=-1)
+    def test_submission_written_by_other_worker_meanwhile(self):
+        """ Test that submission written by another worker while the batch is inserted
+            is completed, and not failed by the worker which lost the race.
+        """
+
+        questionnaire = create_questionnaire()
+        response = self.client.post(
+            reverse('surveys:submit'),
+            data=get_submission_data(questionnaire),
+            format='json'
+        )
+        receipt = response.data[commons_constant.RECEIPT]
+        load_submission = surveys_ingestion.load_submission
+
+        def load_after_other_worker(claimed_receipt, payload):
+            # Other worker which claimed the batch again commits it first.
+            submission = load_submission(claimed_receipt, payload)
+            surveys_submissions.create_questionnaire_responses([dict(submission)])
+            return submission
+
+        with mock.patch.object(
+            surveys_ingestion, 'load_submission', side_effect=load_after_other_worker
+        ):
+            self.assertEqual(surveys_ingestion.drain_submission_queue(), 1)
+
+        questionnaire_response = surveys_models.QuestionnaireResponse.objects.get()
+        response = self.get_receipt(receipt)
+        self.assertEqual(
+            response.data[commons_constant.STATUS], surveys_ingestion.PROCESSED
+        )
+        self.assertEqual(response.data['id'], questionnaire_response.id)
+
+        # Errors of a late worker don't overwrite the processed receipt.
+        surveys_ingestion.SubmissionQueue().fail({receipt: 'duplicate receipt'})
+        self.assertEqual(
+            self.get_receipt(receipt).data[commons_constant.STATUS],
+            surveys_ingestion.PROCESSED
+        )
+
+    def test_bad_payload_doesnt_block_queue(self):
+        """ Test that submission whose payload can't be written fails alone, and the other
+            submissions of the batch are written.
+        """
+
+        questionnaire = create_questionnaire()
+        queue = surveys_ingestion.SubmissionQueue()
+        bad_receipt = queue.enqueue(self.user.id, {'questionnaire_id': questionnaire.id})
+        response = self.client.post(
+            reverse('surveys:submit'),
+            data=get_submission_data(questionnaire),
+            format='json'
+        )
+
+        self.assertEqual(surveys_ingestion.drain_submission_queue(), 2)
+
+        self.assertEqual(
+            self.get_receipt(bad_receipt).data[commons_constant.STATUS],
+            surveys_ingestion.FAILED
+        )
+        self.assertEqual(
+            self.get_receipt(response.data[commons_constant.RECEIPT]).data[
+                commons_constant.STATUS
+            ],
+            surveys_ingestion.PROCESSED
+        )
+        self.assertEqual(surveys_ingestion.drain_submission_queue(), 0)
+
+    def test_receipt_of_other_user(self):
+        """ Test that receipt can't be resolved by some other user. """
+
+        questionnaire = create_questionnaire()
+        response = self.client.post(
+            reverse('surveys:submit'),
+            data=get_submission_data(questionnaire),
+            format='json'
+        )
+
+        self.client.force_authenticate(G(AUTH_USER, is_email_verified=True))
+        response = self.get_receipt(response.data[commons_constant.RECEIPT])
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class QuestionnaireBundleAPITestCase(SurveysAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.questionnaire = create_questionnaire(question_count=3)
+        surveys_models.Questionnaire.objects.filter(
+            id=self.questionnaire.id
+        ).update(is_published=True)
+        G(surveys_models.Tip, questionnaire=self.questionnaire)
+        self.url = reverse(
+            'surveys:questionnaire-bundle', kwargs={'pk': self.questionnaire.id}
+        )
+
+    def test_bundle(self):
+        """ Test that bundle has all the questions, choices and tips of the questionnaire. """
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        bundle = response.json()
+        self.assertEqual(len(bundle['questions']), 3)
+        self.assertEqual(len(bundle['questions'][0]['choices']), 2)
+        self.assertEqual(len(bundle['tips']), 1)
+        self.assertTrue(response['ETag'])
+
+    def test_bundle_answers_are_submittable(self):
+        """ Test that answering the questions and choices of the bundle is a valid
+            submission after a question and a choice are soft deleted.
+        """
+
+        questions = list(self.questionnaire.questions.order_by('id'))
+        questions[0].delete()
+        questions[1].choices.get(text='choice 90.00').delete()
+
+        bundle = self.client.get(self.url).json()
+        self.assertEqual(len(bundle['questions']), 2)
+        self.assertEqual(
+            [choice['text'] for choice in bundle['questions'][0]['choices']],
+            ['choice 10.00']
+        )
+
+        response = self.client.post(reverse('surveys:submit'), data={
+            'questionnaire': self.questionnaire.id,
+            'question_responses': [
+                {'question': question['id'], 'user_input': question['choices'][0]['text']}
+                for question in bundle['questions']
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # Soft deleted choice isn't a valid answer.
+        response = self.client.post(reverse('surveys:submit'), data={
+            'questionnaire': self.questionnaire.id,
+            'question_responses': [
+                {'question': question['id'], 'user_input': 'choice 90.00'}
+                for question in bundle['questions']
+            ],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_content_version_never_reused(self):
+        """ Test that saving the questionnaire after changing its questions moves to a new
+            content version, serving the changed bundle.
+        """
+
+        questionnaire = create_questionnaire(question_count=1)
+        stale = surveys_models.Questionnaire.objects.get(id=questionnaire.id)
+        url = reverse('surveys:questionnaire-bundle', kwargs={'pk': questionnaire.id})
+        questionnaire.is_published = True
+        questionnaire.save()
+        etag = self.client.get(url)['ETag']
+
+        questionnaire.questions.add(G(surveys_models.Question))
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+
+        questionnaire.description = 'changed description'
+        questionnaire.save()
+        stale.title = 'changed title'
+        stale.is_published = True
+        stale.save()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=changed['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['title'], 'changed title')
+        self.assertEqual(
+            len({etag, changed['ETag'], response['ETag']}), 3
+        )
+        # Instances hold the versions they bumped to, stored version is the last one.
+        self.assertEqual(stale.content_version, questionnaire.content_version + 1)
+        questionnaire.refresh_from_db()
+        self.assertEqual(questionnaire.content_version, stale.content_version)
+
+    def test_bundle_queries(self):
+        """ Test that queries made for building the bundle doesn't depend on its size. """
+
+        with self.assertNumQueries(5):
+            self.client.get(self.url)
+
+        # Cached bundle only requires the content version.
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_not_modified(self):
+        """ Test that request having the current ETag gets 304 until the content changes. """
+
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        choice = surveys_models.Choice.objects.filter(
+            question__questionnaire=self.questionnaire
+        ).first()
+        choice.text = 'changed choice'
+        choice.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('changed choice', response.content.decode())
+
+    def test_unpublished_questionnaire(self):
+        """ Test that bundle of an unpublished questionnaire is not found. """
+
+        questionnaire = create_questionnaire()
+
+        response = self.client.get(
+            reverse('surveys:questionnaire-bundle', kwargs={'pk': questionnaire.id})
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class QuestionnaireVersionTestCase(SurveysAPITestCase):
+
+    def test_publishing_freezes_version(self):
+        """ Test that publishing a questionnaire freezes snapshot of its content. """
+
+        questionnaire = create_questionnaire(question_count=2)
+        self.assertFalse(questionnaire.versions.exists())
+
+        questionnaire.is_published = True
+        questionnaire.save()
+
+        version = questionnaire.versions.get()
+        snapshot = json.loads(version.snapshot)
+        self.assertEqual(len(snapshot), 2)
+        self.assertEqual(
+            [choice['weightage'] for choice in snapshot[0]['choices']],
+            ['10.00', '90.00']
+        )
+
+    def test_version_of_other_content_not_reused(self):
+        """ Test that version frozen for other content isn't reused for changed content. """
+
+        questionnaire = create_questionnaire(question_count=1)
+        questionnaire.is_published = True
+        questionnaire.save()
+        frozen = questionnaire.versions.get()
+
+        # Content version reused for changed content, as by the stale saves before.
+        questionnaire.questions.add(G(surveys_models.Question))
+        surveys_models.Questionnaire.objects.filter(id=questionnaire.id).update(
+            content_version=frozen.content_version
+        )
+        surveys_scoring.clear_scoring_plans()
+
+        plan = surveys_scoring.get_scoring_plan(questionnaire.id)
+
+        self.assertEqual(
+            set(plan), set(questionnaire.questions.values_list('id', flat=True))
+        )
+        self.assertNotEqual(plan.version_id, frozen.id)
+        questionnaire.refresh_from_db()
+        self.assertEqual(questionnaire.content_version, frozen.content_version + 1)
+
+    def test_response_references_answered_version(self):
+        """ Test that responses keep referencing the version they answered after a change. """
+
+        questionnaire = create_questionnaire(question_count=1)
+        url = reverse('surveys:submit')
+
+        response = self.client.post(
+            url, data=get_submission_data(questionnaire), format='json'
+        )
+        first = surveys_models.QuestionnaireResponse.objects.get(id=response.data['id'])
+
+        choice = surveys_models.Choice.objects.get(
+            question__questionnaire=questionnaire, text='choice 90.00'
+        )
+        choice.weightage = Decimal('50.00')
+        choice.save()
+
+        response = self.client.post(
+            url, data=get_submission_data(questionnaire), format='json'
+        )
+        second = surveys_models.QuestionnaireResponse.objects.get(id=response.data['id'])
+
+        self.assertNotEqual(first.questionnaire_version_id, second.questionnaire_version_id)
+        self.assertEqual(second.score, 50)
+        self.assertIn(
+            '"90.00"', first.questionnaire_version.snapshot
+        )
+        self.assertIn(
+            '"50.00"', second.questionnaire_version.snapshot
+        )
+
+
+class QuestionCountTestCase(SurveysAPITestCase):
+
+    def test_question_count_follows_questions(self):
+        """ Test that question_count is updated on adding, removing and clearing questions. """
+
+        questionnaire = create_questionnaire(question_count=3)
+        questionnaire.refresh_from_db()
+        self.assertEqual(questionnaire.question_count, 3)
+
+        question = questionnaire.questions.first()
+        questionnaire.questions.remove(question)
+        questionnaire.refresh_from_db()
+        self.assertEqual(questionnaire.question_count, 2)
+
+        question.questionnaire.add(questionnaire)
+        questionnaire.refresh_from_db()
+        self.assertEqual(questionnaire.question_count, 3)
+
+        question.questionnaire.clear()
+        questionnaire.refresh_from_db()
+        self.assertEqual(questionnaire.question_count, 2)
+
+        questionnaire.questions.first().permanent_delete()
+        questionnaire.refresh_from_db()
+        self.assertEqual(questionnaire.question_count, 1)
+
+    def test_save_after_adding_questions(self):
+        """ Test that saving the questionnaire after adding questions keeps the count. """
+
+        questionnaire = create_questionnaire(question_count=3)
+        self.assertEqual(questionnaire.question_count, 3)
+
+        # Instance whose count is stale doesn't write it back.
+        stale = surveys_models.Questionnaire.objects.get(id=questionnaire.id)
+        questionnaire.questions.add(G(surveys_models.Question))
+        stale.is_published = True
+        stale.save()
+        questionnaire.is_published = True
+        questionnaire.save()
+
+        questionnaire.refresh_from_db()
+        self.assertEqual(questionnaire.question_count, 4)
+
+    def test_repair_command(self):
+        """ Test that repair command corrects only the incorrect counts. """
+
+        questionnaire = create_questionnaire(question_count=2)
+        create_questionnaire(question_count=1)
+        surveys_models.Questionnaire.objects.filter(
+            id=questionnaire.id
+        ).update(question_count=7)
+
+        out = StringIO()
+        call_command('repair_question_counts', stdout=out)
+
+        questionnaire.refresh_from_db()
+        self.assertEqual(questionnaire.question_count, 2)
+        self.assertIn('1 questionnaires repaired', out.getvalue())
+
+    def test_list_doesnt_join_questions(self):
+        """ Test that questionnaire list reads the stored count instead of counting questions. """
+
+        questionnaire = create_questionnaire(question_count=4)
+        surveys_models.Questionnaire.objects.filter(
+            id=questionnaire.id
+        ).update(is_published=True)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('surveys:questionnaire-list'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[0]['question_counts'], '4')
+        through_table = surveys_models.Questionnaire.questions.through._meta.db_table
+        self.assertFalse(
+            any(through_table in query['sql'] for query in queries.captured_queries)
+        )
+
+
+class AvailableQuestionnaireAPITestCase(SurveysAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.company = G(companies_models.Company)
+        G(
+            companies_models.Employee,
+            user=self.user, company=self.company, is_company_admin=True
+        )
+        self.url = reverse(
+            'surveys:available-questionnaire-list', kwargs={'company_id': self.company.id}
+        )
+
+    def get_available_ids(self):
+        """ Method for fetching ids of the available questionnaires. """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [questionnaire['id'] for questionnaire in response.data]
+
+    def test_available_questionnaires_are_cached(self):
+        """ Test that cached ids are used until the company's questionnaires change. """
+
+        added = create_questionnaire()
+        available = create_questionnaire()
+
+        self.assertEqual(self.get_available_ids(), [available.id, added.id])
+
+        # Permission check, cached ids and fetching the questionnaires.
+        with self.assertNumQueries(2):
+            self.get_available_ids()
+
+        company_questionnaire = G(
+            companies_models.CompanyQuestionnaire,
+            company=self.company, questionnaire=added
+        )
+        self.assertEqual(self.get_available_ids(), [available.id])
+
+        company_questionnaire.permanent_delete()
+        self.assertEqual(self.get_available_ids(), [available.id, added.id])
+
+    def test_new_questionnaire_invalidates_cache(self):
+        """ Test that a new questionnaire is available without waiting for the cache. """
+
+        first = create_questionnaire()
+        self.assertEqual(self.get_available_ids(), [first.id])
+
+        second = create_questionnaire()
+        self.assertEqual(self.get_available_ids(), [second.id, first.id])
+
+
+class DailyFillRateTestCase(SurveysAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.company = G(companies_models.Company)
+        self.employees = [
+            G(companies_models.Employee, company=self.company) for index in range(3)
+        ]
+        companies_models.Employee.objects.update(
+            created_at=timezone.now() - datetime.timedelta(days=10)
+        )
+        self.questionnaire = create_questionnaire(question_count=1)
+        self.url = reverse(
+            'surveys:fill-rate',
+            kwargs={'pk': self.company.id, 'qid': self.questionnaire.id}
+        )
+
+    def submit(self, user, created_at=None):
+        """ Method for creating a submission of the user for the company. """
+        question = self.questionnaire.questions.get()
+        surveys_submissions.create_questionnaire_responses([{
+            'user': user,
+            'company': self.company,
+            'questionnaire': self.questionnaire,
+            'created_at': created_at,
+            'question_responses': [{'question_id': question.id, 'user_input': 'choice 10.00'}],
+        }])
+
+    def get_fill_rates(self):
+        """ Method for fetching the fill rates as (date, attempted, not attempted). """
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [
+            (row['date'], row['attempted_by'], row['not_attempted_by'])
+            for row in response.data
+        ]
+
+    def test_fill_rates_are_updated_on_submission(self):
+        """ Test that submissions and joining or leaving employees update the fill rates. """
+
+        today = timezone.localdate()
+        yesterday = timezone.now() - datetime.timedelta(days=1)
+        self.submit(self.employees[0].user, created_at=yesterday)
+        self.submit(self.employees[0].user)
+        self.submit(self.employees[1].user)
+
+        G(companies_models.Employee, company=self.company)
+        self.employees[2].delete()
+
+        self.assertEqual(self.get_fill_rates(), [
+            (str(yesterday.date()), 1, 2),
+            (str(today), 2, 1),
+        ])
+
+    def test_rebuild_matches_incremental_fill_rates(self):
+        """ Test that rebuilding the fill rates gives the same fill rates. """
+
+        self.submit(
+            self.employees[0].user,
+            created_at=timezone.now() - datetime.timedelta(days=2)
+        )
+        self.submit(self.employees[1].user)
+        self.employees[2].delete()
+        fill_rates = self.get_fill_rates()
+
+        surveys_models.DailyFillRate.objects.all().delete()
+        call_command('rebuild_fill_rates', stdout=StringIO())
+
+        self.assertEqual(self.get_fill_rates(), fill_rates)
+
+
+class RiskLeaderboardAPITestCase(SurveysAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.company = G(companies_models.Company)
+        G(
+            companies_models.Employee,
+            user=self.user, company=self.company, is_company_admin=True
+        )
+        self.questionnaire = create_questionnaire(question_count=1)
+        self.url = reverse(
+            'surveys:leaderboard',
+            kwargs={'company_id': self.company.id, 'qid': self.questionnaire.id}
+        )
+
+    def submit(self, user, answer, created_at=None):
+        """ Method for creating a submission of the user for the company. """
+        question = self.questionnaire.questions.get()
+        surveys_submissions.create_questionnaire_responses([{
+            'user': user,
+            'company': self.company,
+            'questionnaire': self.questionnaire,
+            'created_at': created_at,
+            'question_responses': [{
+                'question_id': question.id,
+                'user_input': answer,
+                'score': surveys_scoring.get_scoring_plan(
+                    self.questionnaire.id
+                )[question.id].choices[answer],
+            }],
+        }])
+
+    def test_leaderboard(self):
+        """ Test that employees are ranked by their average score. """
+
+        low, high, other = [
+            G(companies_models.Employee, company=self.company).user for index in range(3)
+        ]
+        self.submit(low, 'choice 10.00')
+        self.submit(high, 'choice 90.00')
+        self.submit(high, 'choice 10.00')
+        self.submit(other, 'choice 10.00', timezone.now() - datetime.timedelta(days=10))
+
+        response = self.client.get(self.url, {'limit': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([row['user'] for row in response.data], [high.id, low.id])
+        self.assertEqual(response.data[0]['response_count'], 2)
+        self.assertEqual(response.data[0]['average_score'], 50)
+        self.assertEqual(response.data[0]['last_score'], 10)
+
+        response = self.client.get(self.url, {'window': 5})
+        self.assertNotIn(other.id, [row['user'] for row in response.data])
+
+    def test_window_average(self):
+        """ Test that employees are ranked by the average score of the window, which is
+            kept by rebuilding the aggregates.
+        """
+
+        improved, other = [
+            G(companies_models.Employee, company=self.company).user for index in range(2)
+        ]
+        ten_days_ago = timezone.now() - datetime.timedelta(days=10)
+        self.submit(improved, 'choice 90.00', ten_days_ago)
+        self.submit(improved, 'choice 90.00', ten_days_ago)
+        self.submit(improved, 'choice 10.00')
+        self.submit(other, 'choice 90.00')
+        self.submit(other, 'choice 10.00')
+
+        response = self.client.get(self.url)
+        self.assertEqual([row['user'] for row in response.data], [improved.id, other.id])
+
+        for rebuild in (False, True):
+            if rebuild:
+                surveys_rollups.rebuild_score_aggregates()
+            response = self.client.get(self.url, {'window': 5})
+            self.assertEqual(
+                [
+                    (row['user'], row['response_count'], row['average_score'])
+                    for row in response.data
+                ],
+                [(other.id, 2, 50), (improved.id, 1, 10)]
+            )
+
+    def test_rebuild_matches_incremental_aggregates(self):
+        """ Test that rebuilding the score aggregates gives the same aggregates. """
+
+        employee = G(companies_models.Employee, company=self.company).user
+        self.submit(employee, 'choice 90.00')
+        self.submit(employee, 'choice 10.00', timezone.now() - datetime.timedelta(days=1))
+        before = list(surveys_models.ScoreAggregate.objects.values_list(
+            'user', 'response_count', 'score_sum', 'average_score', 'last_score'
+        ))
+
+        call_command('rebuild_score_aggregates', stdout=StringIO())
+
+        self.assertEqual(
+            list(surveys_models.ScoreAggregate.objects.values_list(
+                'user', 'response_count', 'score_sum', 'average_score', 'last_score'
+            )),
+            before
+        )
+        self.assertEqual(before, [(employee.id, 2, 100, 50, 90)])
+
+    def test_only_company_admin(self):
+        """ Test that leaderboard is not accessible to other users. """
+
+        self.client.force_authenticate(G(AUTH_USER, is_email_verified=True))
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class CompanyResponsesExportTestCase(SurveysAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.company = G(companies_models.Company)
+        G(
+            companies_models.Employee,
+            user=self.user, company=self.company, is_company_admin=True
+        )
+        self.questionnaire = create_questionnaire(question_count=2)
+        self.url = reverse('surveys:export', kwargs={'company_id': self.company.id})
+        questions = list(self.questionnaire.questions.all())
+        for created_at in (timezone.now() - datetime.timedelta(days=3), None):
+            surveys_submissions.create_questionnaire_responses([{
+                'user': self.user,
+                'company': self.company,
+                'questionnaire': self.questionnaire,
+                'created_at': created_at,
+                'question_responses': [
+                    {'question_id': question.id, 'user_input': 'choice 90.00',
+                     'score': Decimal('90.00')}
+                    for question in questions
+                ],
+            }])
+
+    def read_rows(self, content):
+        """ Method for parsing the exported csv. """
+        return list(csv.DictReader(content.decode().splitlines()))
+
+    def test_export(self):
+        """ Test that every answer is exported as a row. """
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        rows = self.read_rows(b''.join(response.streaming_content))
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]['user_email'], self.user.email)
+        self.assertEqual(rows[0]['risk_level'], 'HIGH')
+        self.assertEqual(rows[0]['user_input'], 'choice 90.00')
+
+    def test_gzip_and_date_filter(self):
+        """ Test that export is compressed for gzip clients and filtered by date. """
+
+        response = self.client.get(
+            self.url, {'start': str(timezone.localdate())}, HTTP_ACCEPT_ENCODING='gzip'
+        )
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        rows = self.read_rows(gzip.decompress(b''.join(response.streaming_content)))
+        self.assertEqual(len(rows), 2)
+
+    def test_export_command(self):
+        """ Test that command exports the same csv. """
+
+        path = os.path.join(tempfile.mkdtemp(), 'export.csv.gz')
+        call_command('export_responses', self.company.id, output=path, gzip=True)
+
+        with gzip.open(path, 'rb') as file:
+            self.assertEqual(len(self.read_rows(file.read())), 4)
+
+    def test_export_command_invalid_date(self):
+        """ Test that a badly formatted date is rejected instead of exporting everything. """
+
+        for value in ('2024-13-01', '01/02/2024'):
+            with self.assertRaises(CommandError):
+                call_command(
+                    'export_responses', self.company.id, f'--start={value}',
+                    stdout=StringIO()
+                )
+
+
+class AnalyticsSnapshotTestCase(SurveysAPITestCase):
+
+    def test_write_and_read_snapshot(self):
+        """ Test that snapshot has every answer of the company with decodable codes. """
+
+        company = G(companies_models.Company)
+        questionnaire = create_questionnaire(question_count=2)
+        questions = list(questionnaire.questions.order_by('id'))
+        for answer in ('choice 10.00', 'choice 90.00', 'choice 90.00'):
+            surveys_submissions.create_questionnaire_responses([{
+                'user': self.user,
+                'company': company,
+                'questionnaire': questionnaire,
+                'question_responses': [
+                    {'question_id': question.id, 'user_input': answer,
+                     'score': Decimal(answer.split()[1])}
+                    for question in questions
+                ],
+            }])
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        self.assertEqual(
+            surveys_snapshots.write_company_snapshot(company.id, directory, chunk_size=2), 6
+        )
+        # Writing again replaces the snapshot.
+        surveys_snapshots.write_company_snapshot(company.id, directory)
+
+        snapshot = surveys_snapshots.Snapshot(company.id, directory)
+        self.assertEqual(len(snapshot), 6)
+        self.assertIsInstance(snapshot['score'], np.memmap)
+        self.assertEqual(sorted(snapshot['score'].tolist()), [10, 10, 90, 90, 90, 90])
+        self.assertEqual(
+            snapshot.answer_counts(questions[0].id),
+            {'choice 10.00': 1, 'choice 90.00': 2}
+        )
+        self.assertEqual(
+            snapshot.question_ids[snapshot['question_code']].tolist(),
+            [questions[0].id, questions[1].id] * 3
+        )
+
+    def test_text_answers_not_written(self):
+        """ Test that answers to text questions are written with the sentinel code and
+            their text isn't in the snapshot.
+        """
+
+        company = G(companies_models.Company)
+        questionnaire = create_questionnaire(question_count=1)
+        choice_question = questionnaire.questions.get()
+        text_question = G(
+            surveys_models.Question, question_type=surveys_models.Question.TEXT
+        )
+        questionnaire.questions.add(text_question)
+        for text in ('first secret', 'second secret'):
+            surveys_submissions.create_questionnaire_responses([{
+                'user': self.user,
+                'company': company,
+                'questionnaire': questionnaire,
+                'question_responses': [
+                    {'question_id': choice_question.id, 'user_input': 'choice 90.00',
+                     'score': Decimal('90.00')},
+                    {'question_id': text_question.id, 'user_input': text},
+                ],
+            }])
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        surveys_snapshots.write_company_snapshot(company.id, directory)
+
+        snapshot = surveys_snapshots.Snapshot(company.id, directory)
+        self.assertEqual(snapshot.answers, ['choice 90.00'])
+        self.assertEqual(
+            snapshot['answer_code'][
+                snapshot['question_code'] == snapshot.question_code(text_question.id)
+            ].tolist(),
+            [surveys_snapshots.TEXT_ANSWER] * 2
+        )
+        self.assertEqual(snapshot.answer_counts(text_question.id), {})
+        self.assertEqual(snapshot.answer_counts(choice_question.id), {'choice 90.00': 2})
+
+    def test_failed_swap_keeps_snapshot(self):
+        """ Test that snapshot is swapped in through a link to its version, and the
+            previous snapshot is kept when the swap fails.
+        """
+
+        company = G(companies_models.Company)
+        questionnaire = create_questionnaire(question_count=1)
+        surveys_submissions.create_questionnaire_responses([{
+            'user': self.user,
+            'company': company,
+            'questionnaire': questionnaire,
+            'question_responses': [
+                {'question_id': question.id, 'user_input': 'choice 90.00',
+                 'score': Decimal('90.00')}
+                for question in questionnaire.questions.all()
+            ],
+        }])
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = surveys_snapshots.get_snapshot_path(company.id, directory)
+
+        # Snapshot written before the snapshots were versioned is replaced too.
+        os.makedirs(path)
+        surveys_snapshots.write_company_snapshot(company.id, directory)
+        surveys_snapshots.write_company_snapshot(company.id, directory)
+        self.assertTrue(os.path.islink(path))
+        self.assertEqual(len(os.listdir(directory)), 2)
+
+        with mock.patch.object(
+            surveys_snapshots.os, 'replace', side_effect=OSError('Disk full')
+        ):
+            with self.assertRaises(OSError):
+                surveys_snapshots.write_company_snapshot(company.id, directory)
+
+        self.assertEqual(len(os.listdir(directory)), 2)
+        self.assertEqual(len(surveys_snapshots.Snapshot(company.id, directory)), 1)
+
+
+class AnswerDistributionAPITestCase(SurveysAPITestCase):
+
+    def test_answer_distribution(self):
+        """ Test that answers of choice questions are counted per question. """
+
+        company = G(companies_models.Company)
+        G(
+            companies_models.Employee,
+            user=self.user, company=company, is_company_admin=True
+        )
+        questionnaire = create_questionnaire(question_count=2)
+        text_question = G(
+            surveys_models.Question, question_type=surveys_models.Question.TEXT
+        )
+        questionnaire.questions.add(text_question)
+
+        for answer in ('choice 10.00', 'choice 90.00', 'choice 90.00'):
+            data = get_submission_data(questionnaire, answer=answer)
+            data['company'] = company.id
+            for question_response in data['question_responses']:
+                if question_response['question'] == text_question.id:
+                    question_response['user_input'] = 'free text'
+            response = self.client.post(
+                reverse('surveys:submit'), data=data, format='json'
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        url = reverse(
+            'surveys:answer-distribution',
+            kwargs={'company_id': company.id, 'qid': questionnaire.id}
+        )
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        questions = response.data[commons_constant.QUESTIONS]
+        self.assertEqual(len(questions), 2)
+        self.assertEqual(questions[0][commons_constant.ANSWERS], [
+            {commons_constant.ANSWER: 'choice 90.00', commons_constant.ANSWER_COUNT: 2},
+            {commons_constant.ANSWER: 'choice 10.00', commons_constant.ANSWER_COUNT: 1},
+        ])
+
+        response = self.client.get(url, {'period': '2000-01'})
+        self.assertEqual(response.data[commons_constant.QUESTIONS], [])
+
+    def test_answers_counted_by_scored_version(self):
+        """ Test that answers are classified by the version their response is scored
+            with, without freezing the changed content.
+        """
+
+        company = G(companies_models.Company)
+        questionnaire = create_questionnaire(question_count=1)
+        data = get_submission_data(questionnaire)
+        data['company'] = company.id
+        self.client.post(reverse('surveys:submit'), data=data, format='json')
+        questionnaire_response = surveys_models.QuestionnaireResponse.objects.get()
+
+        # Question changed to a text question after the response is scored.
+        question = questionnaire.questions.get()
+        question.question_type = surveys_models.Question.TEXT
+        question.save()
+        surveys_scoring.clear_scoring_plans()
+
+        surveys_rollups.add_answer_counts(
+            questionnaire_response.question_responses.select_related(
+                'questionnaire_response'
+            )
+        )
+
+        self.assertEqual(
+            surveys_models.AnswerCount.objects.get(question=question).count, 2
+        )
+        self.assertEqual(questionnaire.versions.count(), 1)
+
+
+class RiskTrendAPITestCase(SurveysAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.company = G(companies_models.Company)
+        G(
+            companies_models.Employee,
+            user=self.user, company=self.company, is_company_admin=True
+        )
+        self.questionnaire = create_questionnaire(question_count=1)
+        self.url = reverse('surveys:risk-trend', kwargs={'company_id': self.company.id})
+        self.today = timezone.localdate()
+
+    def submit(self, answer, days_ago=0):
+        """ Method for creating a submission for the company made days_ago days back. """
+        question = self.questionnaire.questions.get()
+        surveys_submissions.create_questionnaire_responses([{
+            'user': self.user,
+            'company': self.company,
+            'questionnaire': self.questionnaire,
+            'created_at': timezone.now() - datetime.timedelta(days=days_ago)
+            if days_ago else None,
+            'question_responses': [{
+                'question_id': question.id,
+                'user_input': answer,
+                'score': Decimal(answer.split()[1]),
+            }],
+        }])
+
+    def get_trend(self, **params):
+        """ Method for fetching the risk trend. """
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data[commons_constant.RESULTS]
+
+    def test_daily_trend(self):
+        """ Test that submissions are counted in their day by risk level. """
+
+        self.submit('choice 90.00', days_ago=2)
+        self.submit('choice 90.00', days_ago=2)
+        self.submit('choice 10.00')
+        start = self.today - datetime.timedelta(days=2)
+
+        trend = self.get_trend(start=str(start))
+
+        self.assertEqual(
+            [(bucket['start'], bucket['low'], bucket['high'], bucket['mean_score'])
+             for bucket in trend],
+            [
+                (start, 0, 2, 90),
+                (start + datetime.timedelta(days=1), 0, 0, None),
+                (self.today, 1, 0, 10),
+            ]
+        )
+
+        # Closed days are cached, only the current day is computed.
+        with self.assertNumQueries(2):
+            self.assertEqual(self.get_trend(start=str(start)), trend)
+
+        self.submit('choice 10.00')
+        self.assertEqual(self.get_trend(start=str(start))[-1]['count'], 2)
+
+    def test_backdated_submission_invalidates_cache(self):
+        """ Test that cached buckets are discarded on a backdated submission. """
+
+        start = self.today - datetime.timedelta(days=40)
+        self.assertEqual(self.get_trend(start=str(start), bucket='month')[0]['count'], 0)
+
+        self.submit('choice 90.00', days_ago=40)
+
+        trend = self.get_trend(start=str(start), bucket='month')
+        self.assertEqual(trend[0]['start'], start.replace(day=1))
+        self.assertEqual(trend[0]['high'], 1)
+
+    def test_too_many_buckets(self):
+        """ Test that date range having too many buckets is rejected. """
+
+        response = self.client.get(self.url, {'start': '2000-01-01'})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ScorePercentilesAPITestCase(SurveysAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.company = G(companies_models.Company)
+        G(
+            companies_models.Employee,
+            user=self.user, company=self.company, is_company_admin=True
+        )
+        self.questionnaire = create_questionnaire(question_count=1)
+        self.url = reverse(
+            'surveys:percentiles',
+            kwargs={'company_id': self.company.id, 'qid': self.questionnaire.id}
+        )
+
+    def submit(self, answers, created_at=None):
+        """ Method for creating a submission for each answer at created_at. """
+        question = self.questionnaire.questions.get()
+        surveys_submissions.create_questionnaire_responses([{
+            'user': self.user,
+            'company': self.company,
+            'questionnaire': self.questionnaire,
+            'created_at': created_at,
+            'question_responses': [{
+                'question_id': question.id,
+                'user_input': answer,
+                'score': Decimal(answer.split()[1]),
+            }],
+        } for answer in answers])
+
+    def test_percentiles_across_months(self):
+        """ Test that histograms of the months are merged into exact percentiles. """
+
+        last_month = timezone.localdate().replace(day=1) - datetime.timedelta(days=1)
+        self.submit(['choice 10.00'] * 6, created_at=timezone.now().replace(
+            year=last_month.year, month=last_month.month, day=1
+        ))
+        self.submit(['choice 90.00'] * 4)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {
+                'start': last_month.strftime('%Y-%m'),
+                'percentile': [50, 60, 61, 100],
+            })
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[commons_constant.RESPONSE_COUNT], 10)
+        self.assertEqual(
+            [
+                (row[commons_constant.PERCENTILE], row[commons_constant.RISK_SCORE])
+                for row in response.data[commons_constant.PERCENTILES]
+            ],
+            [(50, 10), (60, 10), (61, 90), (100, 90)]
+        )
+
+        # Only the current month by default.
+        response = self.client.get(self.url)
+        self.assertEqual(response.data[commons_constant.RESPONSE_COUNT], 4)
+
+        surveys_models.ScoreCount.all_objects.all().delete()
+        surveys_rollups.rebuild_score_counts()
+        response = self.client.get(self.url, {'start': last_month.strftime('%Y-%m')})
+        self.assertEqual(response.data[commons_constant.RESPONSE_COUNT], 10)
+
+    def test_invalid_percentile(self):
+        """ Test that percentiles outside 0 to 100 are rejected. """
+
+        response = self.client.get(self.url, {'percentile': 101})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class HyperLogLogTestCase(SimpleTestCase):
+
+    # Allowed relative error, 3 standard errors of the sketch.
+    TOLERANCE = 3 * 1.04 / (2 ** surveys_sketches.PRECISION) ** 0.5
+
+    def assertEstimate(self, estimate, exact):
+        """ Method to assert that the estimate is within the tolerance of the exact count. """
+        self.assertLessEqual(abs(estimate - exact), max(exact * self.TOLERANCE, 1))
+
+    def test_accuracy(self):
+        """ Test that estimates of generated data are close to the exact counts. """
+
+        random = np.random.RandomState(7)
+        for exact in (0, 1, 10, 100, 1000, 10000, 50000):
+            ids = random.randint(10 ** 9) + np.arange(exact) * 7919
+            sketch = surveys_sketches.HyperLogLog()
+            # Duplicates should not change the estimate.
+            sketch.update(ids.tolist() * 2)
+            self.assertEstimate(sketch.count(), exact)
+
+    def test_merge(self):
+        """ Test that merged sketch is same as the sketch of the union. """
+
+        random = np.random.RandomState(11)
+        days = [random.choice(20000, size=3000, replace=False).tolist() for day in range(10)]
+
+        union = surveys_sketches.HyperLogLog()
+        merged = surveys_sketches.HyperLogLog()
+        for ids in days:
+            union.update(ids)
+            sketch = surveys_sketches.HyperLogLog()
+            sketch.update(ids)
+            merged.merge(surveys_sketches.HyperLogLog.from_bytes(sketch.to_bytes()))
+
+        self.assertTrue(np.array_equal(merged.registers, union.registers))
+        self.assertEstimate(merged.count(), len(set().union(*days)))
+
+    def test_compact_storage(self):
+        """ Test that sketches of small cardinalities are stored in a few bytes. """
+
+        sketch = surveys_sketches.HyperLogLog()
+        sketch.update(range(50))
+
+        self.assertLess(len(sketch.to_bytes()), 512)
+
+
+class UniqueRespondentsAPITestCase(SurveysAPITestCase):
+
+    def test_unique_respondents(self):
+        """ Test that users submitting in many days of the range are counted once. """
+
+        company = G(companies_models.Company)
+        G(
+            companies_models.Employee,
+            user=self.user, company=company, is_company_admin=True
+        )
+        questionnaire = create_questionnaire(question_count=1)
+        question = questionnaire.questions.get()
+        users = [self.user] + [G(AUTH_USER) for index in range(4)]
+        today = timezone.localdate()
+
+        for days_ago, day_users in ((0, users), (1, users[:3]), (40, users[3:])):
+            surveys_submissions.create_questionnaire_responses([{
+                'user': user,
+                'company': company,
+                'questionnaire': questionnaire,
+                'created_at': timezone.now() - datetime.timedelta(days=days_ago),
+                'question_responses': [{
+                    'question_id': question.id,
+                    'user_input': 'choice 10.00',
+                    'score': Decimal('10.00'),
+                }],
+            } for user in day_users])
+
+        url = reverse(
+            'surveys:unique-respondents',
+            kwargs={'company_id': company.id, 'qid': questionnaire.id}
+        )
+        response = self.client.get(url, {
+            'start': str(today - datetime.timedelta(days=1)), 'end': str(today)
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[commons_constant.UNIQUE_RESPONDENTS], 5)
+
+        response = self.client.get(url, {'start': str(today - datetime.timedelta(days=2))})
+        self.assertEqual(response.data[commons_constant.UNIQUE_RESPONDENTS], 5)
+
+        start = str(today - datetime.timedelta(days=60))
+        end = str(today - datetime.timedelta(days=1))
+        response = self.client.get(url, {'start': start, 'end': end})
+        self.assertEqual(response.data[commons_constant.UNIQUE_RESPONDENTS], 5)
+
+        self.assertEqual(surveys_rollups.rebuild_respondent_sketches(), 3)
+        response = self.client.get(url, {'start': start, 'end': end})
+        self.assertEqual(response.data[commons_constant.UNIQUE_RESPONDENTS], 5)
+
+
+class CompletionBitmapTestCase(SurveysAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.company = G(companies_models.Company)
+        self.admin = G(
+            companies_models.Employee,
+            user=self.user, company=self.company, is_company_admin=True
+        )
+        self.employees = [
+            G(companies_models.Employee, user=G(AUTH_USER), company=self.company)
+            for index in range(3)
+        ]
+        self.questionnaire = create_questionnaire(question_count=1)
+        self.company_questionnaire = G(
+            companies_models.CompanyQuestionnaire,
+            company=self.company, questionnaire=self.questionnaire
+        )
+        self.url = reverse(
+            'surveys:completion',
+            kwargs={'company_id': self.company.id, 'qid': self.questionnaire.id}
+        )
+
+    def submit(self, user, created_at=None):
+        """ Method for creating a submission of the user for the company. """
+        question = self.questionnaire.questions.get()
+        surveys_submissions.create_questionnaire_responses([{
+            'user': user,
+            'company': self.company,
+            'questionnaire': self.questionnaire,
+            'created_at': created_at,
+            'question_responses': [{
+                'question_id': question.id,
+                'user_input': 'choice 10.00',
+                'score': Decimal('10.00'),
+            }],
+        }])
+
+    def test_completion(self):
+        """ Test that completion rate and pending employees are of the current period. """
+
+        # Submission made before the period started is not counted.
+        self.submit(self.employees[0].user, created_at=timezone.now() - datetime.timedelta(days=1))
+        self.submit(self.employees[1].user)
+        self.submit(self.user)
+        # Submission of a non employee is not counted.
+        self.submit(G(AUTH_USER))
+
+        with self.assertNumQueries(5):
+            response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data[commons_constant.EMPLOYEE_COUNT], 4)
+        self.assertEqual(response.data[commons_constant.COMPLETED_COUNT], 2)
+        self.assertEqual(response.data[commons_constant.COMPLETION_RATE], 0.5)
+        self.assertEqual(
+            [employee['id'] for employee in response.data[commons_constant.PENDING]],
+            [self.employees[0].id, self.employees[2].id]
+        )
+
+        # Employees who left are not counted.
+        self.employees[2].is_active = False
+        self.employees[2].save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data[commons_constant.EMPLOYEE_COUNT], 3)
+
+        surveys_models.CompletionBitmap.all_objects.all().delete()
+        self.company_questionnaire.refresh_from_db()
+        self.assertEqual(surveys_completions.rebuild_completions(self.company_questionnaire), 2)
+        response = self.client.get(self.url)
+        self.assertEqual(response.data[commons_constant.COMPLETED_COUNT], 2)
+
+    def test_pending_pages(self):
+        """ Test that pending employees are listed in pages following the next cursor. """
+
+        self.submit(self.employees[1].user)
+
+        pages = []
+        params = {'limit': 2}
+        while True:
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append(
+                [employee['id'] for employee in response.data[commons_constant.PENDING]]
+            )
+            if response.data[commons_constant.NEXT] is None:
+                break
+            params['after'] = response.data[commons_constant.NEXT]
+
+        pending_ids = sorted(
+            employee.id for employee in
+            companies_models.Employee.objects.filter(company=self.company).exclude(
+                id=self.employees[1].id
+            )
+        )
+        self.assertEqual(pages, [pending_ids[:2], pending_ids[2:]])
+
+
+class InboxTestCase(SurveysAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.company = G(companies_models.Company)
+        G(companies_models.Employee, user=self.user, company=self.company)
+        self.questionnaire = create_questionnaire(question_count=1)
+        self.company_questionnaire = G(
+            companies_models.CompanyQuestionnaire,
+            company=self.company, questionnaire=self.questionnaire
+        )
+
+    def submit(self, company=None):
+        """ Method for submitting the questionnaire for the company. """
+        data = get_submission_data(self.questionnaire)
+        if company is not None:
+            data['company'] = company.id
+        response = self.client.post(reverse('surveys:submit'), data=data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def get_inbox(self, name):
+        """ Method for fetching ids of the pending or mandatory questionnaires of the user. """
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse(f'surveys:{name}-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row['id'] for row in response.data]
+
+    def test_pending_questionnaires(self):
+        """ Test that submitted questionnaire is pending again after the next notification. """
+
+        self.assertEqual(self.get_inbox('pending'), [self.company_questionnaire.id])
+
+        self.submit(self.company)
+        self.assertEqual(self.get_inbox('pending'), [])
+
+        companies_tasks.send_company_questionnaire_notification_async(
+            self.company.id, self.questionnaire.id
+        )
+        self.assertEqual(self.get_inbox('pending'), [self.company_questionnaire.id])
+
+        # Submission without the company doesn't clear the company questionnaire.
+        self.submit()
+        self.assertEqual(self.get_inbox('pending'), [self.company_questionnaire.id])
+
+    def test_employee_leaving_and_joining(self):
+        """ Test that company questionnaires are removed from the inbox of leaving employees
+            and added to the inbox of joining employees.
+        """
+
+        companies_models.Employee.objects.get(user=self.user).delete()
+        self.assertEqual(self.get_inbox('pending'), [])
+
+        G(companies_models.Employee, user=self.user, company=self.company)
+        self.assertEqual(self.get_inbox('pending'), [self.company_questionnaire.id])
+
+    def test_mandatory_questionnaires(self):
+        """ Test that mandatory questionnaire stays in the inbox until submitted. """
+
+        self.questionnaire.is_published = True
+        self.questionnaire.is_mandatory = True
+        self.questionnaire.save()
+        surveys_tasks.add_mandatory_inbox_items_async(self.questionnaire.id)
+        new_user = G(AUTH_USER, is_email_verified=True)
+
+        self.assertEqual(self.get_inbox('mandatory'), [self.questionnaire.id])
+        self.assertTrue(
+            surveys_models.InboxItem.objects.filter(
+                user=new_user, questionnaire=self.questionnaire
+            ).exists()
+        )
+
+        self.submit(self.company)
+        self.assertEqual(self.get_inbox('mandatory'), [self.questionnaire.id])
+        self.submit()
+        self.assertEqual(self.get_inbox('mandatory'), [])
+
+        self.questionnaire.is_mandatory = False
+        self.questionnaire.save()
+        self.assertFalse(
+            surveys_models.InboxItem.objects.filter(
+                questionnaire=self.questionnaire, company_questionnaire=None
+            ).exists()
+        )
+
+    def test_mandatory_items_added_once(self):
+        """ Test that users are added to the inbox only when the questionnaire becomes
+            published and mandatory, in chunks of users.
+        """
+
+        def get_enqueued_count():
+            return commons_models.OutboxEvent.all_objects.filter(
+                task=surveys_tasks.add_mandatory_inbox_items_async.name
+            ).count()
+
+        users = [G(AUTH_USER) for _ in range(4)]
+        self.questionnaire.is_published = True
+        self.questionnaire.is_mandatory = True
+        self.questionnaire.save()
+        self.assertEqual(get_enqueued_count(), 1)
+
+        self.questionnaire.title = 'fixed typo'
+        self.questionnaire.save()
+        self.assertEqual(get_enqueued_count(), 1)
+
+        with mock.patch.object(surveys_inbox, 'INSERT_BATCH_SIZE', 2):
+            surveys_tasks.add_mandatory_inbox_items_async(self.questionnaire.id)
+        self.assertEqual(
+            set(surveys_models.InboxItem.objects.filter(
+                questionnaire=self.questionnaire, company_questionnaire=None
+            ).values_list('user_id', flat=True)),
+            {self.user.id} | {user.id for user in users}
+        )
+
+    def test_rebuild_inbox(self):
+        """ Test that rebuilt inbox has the questionnaires not submitted in current period. """
+
+        other_user = G(AUTH_USER)
+        G(companies_models.Employee, user=other_user, company=self.company)
+        self.submit(self.company)
+        surveys_models.InboxItem.all_objects.all().delete()
+
+        self.assertEqual(surveys_inbox.rebuild_inbox(), 1)
+        self.assertTrue(
+            surveys_models.InboxItem.objects.filter(
+                user=other_user, company_questionnaire=self.company_questionnaire
+            ).exists()
+        )
+
+
+@override_settings(
+    MAIL_FANOUT_CHUNK_SIZE=5, MAIL_FANOUT_CONCURRENCY=2, BULK_EMAIL_CHUNK_SIZE=2
+)
+class MailFanoutTestCase(APITestCase):
+
+    def setUp(self):
+        self.users = [G(AUTH_USER) for index in range(12)]
+        self.questionnaire = create_questionnaire(question_count=1)
+
+    def get_recipients(self):
+        """ Method for getting the recipient of each of the sent emails. """
+        return sorted(email for message in mail.outbox for email in message.to)
+
+    def test_fanout(self):
+        """ Test that each user gets one email, sent in chunks. """
+
+        surveys_tasks.send_mandatory_questionnaire_info_async(self.questionnaire.id)
+        # Users are informed only once.
+        surveys_tasks.send_mandatory_questionnaire_info_async(self.questionnaire.id)
+
+        fanout = surveys_models.MailFanout.objects.get(questionnaire=self.questionnaire)
+        self.assertEqual(fanout.chunk_count, 3)
+        self.assertEqual(fanout.sent_count, 12)
+        self.assertEqual(fanout.failed_count, 0)
+        self.assertEqual(
+            list(fanout.chunks.values_list('status', flat=True)),
+            [surveys_models.MailFanoutChunk.SENT] * 3
+        )
+        self.assertEqual(self.get_recipients(), sorted(user.email for user in self.users))
+
+    def test_resume_failed_chunk(self):
+        """ Test that resuming sends only the users not sent by the failed chunk. """
+
+        send = surveys_fanouts.send_mandatory_questionnaire_info
+        failing_email = self.users[7].email
+
+        def send_failing(recipients, *args, **kwargs):
+            recipients = list(recipients)
+            if failing_email in dict(recipients):
+                raise ConnectionError('Connection lost.')
+            return send(recipients, *args, **kwargs)
+
+        with mock.patch.object(
+            surveys_fanouts, 'send_mandatory_questionnaire_info', side_effect=send_failing
+        ):
+            surveys_tasks.send_mandatory_questionnaire_info_async(self.questionnaire.id)
+
+        fanout = surveys_models.MailFanout.objects.get(questionnaire=self.questionnaire)
+        failed_chunk = fanout.chunks.get(status=surveys_models.MailFanoutChunk.FAILED)
+        self.assertEqual(failed_chunk.error, 'Connection lost.')
+        self.assertEqual(failed_chunk.sent_count, 2)
+        self.assertEqual(fanout.sent_count, 9)
+
+        surveys_tasks.resume_mail_fanout_async(fanout.id)
+
+        fanout.refresh_from_db()
+        self.assertEqual(fanout.sent_count, 12)
+        self.assertEqual(self.get_recipients(), sorted(user.email for user in self.users))
+
+    def test_resume_during_fanout(self):
+        """ Test that resuming while the fanout is sent leaves the queued and running
+            chunks to their tasks, and resends only the chunk whose task is stopped.
+        """
+
+        fanout, created = surveys_fanouts.create_fanout(self.questionnaire.id)
+        pending_chunk, running_chunk, stopped_chunk = fanout.chunks.order_by('start_id')
+        surveys_models.MailFanoutChunk.all_objects.filter(id=running_chunk.id).update(
+            status=surveys_models.MailFanoutChunk.SENDING, updated_at=timezone.now()
+        )
+        surveys_models.MailFanoutChunk.all_objects.filter(id=stopped_chunk.id).update(
+            status=surveys_models.MailFanoutChunk.SENDING,
+            updated_at=timezone.now() - datetime.timedelta(hours=1)
+        )
+
+        self.assertEqual(surveys_tasks.resume_mail_fanout_async(fanout.id), 1)
+        self.assertEqual(
+            self.get_recipients(), sorted(user.email for user in self.users[10:])
+        )
+
+        # Duplicate task of the chunk being sent doesn't send it again.
+        surveys_tasks.send_mandatory_mail_chunk_async(running_chunk.id)
+        self.assertEqual(len(mail.outbox), 2)
+
+        surveys_tasks.send_mandatory_mail_chunk_async(pending_chunk.id)
+        surveys_tasks.send_mandatory_mail_chunk_async(pending_chunk.id)
+        self.assertEqual(len(mail.outbox), 7)
+
+
+class ScoringPlanCacheTestCase(APITestCase):
+
+    def setUp(self):
+        surveys_scoring.clear_scoring_plans()
+
+    def test_choice_update_invalidates_plan(self):
+        """ Test that updating weightage of a choice gets reflected in the plan. """
+
+        questionnaire = create_questionnaire(question_count=1)
+        question = questionnaire.questions.first()
+
+        plan = surveys_scoring.get_scoring_plan(questionnaire.id)
+        self.assertEqual(plan[question.id].choices['choice 10.00'], Decimal('10.00'))
+
+        choice = question.choices.get(text='choice 10.00')
+        choice.weightage = Decimal('20.00')
+        choice.save()
+
+        plan = surveys_scoring.get_scoring_plan(questionnaire.id)
+        self.assertEqual(plan[question.id].choices['choice 10.00'], Decimal('20.00'))
+
+    def test_change_by_other_process(self):
+        """ Test that plan cached before a change made by another process isn't used after
+            the content version moves.
+        """
+
+        questionnaire = create_questionnaire(question_count=1)
+        question = questionnaire.questions.first()
+        surveys_scoring.get_scoring_plan(questionnaire.id)
+
+        # Change made without the signals of this process.
+        surveys_models.Choice.objects.filter(
+            question=question, text='choice 10.00'
+        ).update(weightage=Decimal('30.00'))
+        surveys_models.Questionnaire.objects.filter(id=questionnaire.id).update(
+            content_version=F('content_version') + 1
+        )
+
+        plan = surveys_scoring.get_scoring_plan(questionnaire.id)
+        self.assertEqual(plan[question.id].choices['choice 10.00'], Decimal('30.00'))
+
+    def test_questions_change_invalidates_plan(self):
+        """ Test that adding or removing questions of questionnaire gets reflected in the plan. """
+
+        questionnaire = create_questionnaire(question_count=1)
+        self.assertEqual(len(surveys_scoring.get_scoring_plan(questionnaire.id)), 1)
+
+        question = G(
+            surveys_models.Question, question_type=surveys_models.Question.TEXT
+        )
+        questionnaire.questions.add(question)
+        plan = surveys_scoring.get_scoring_plan(questionnaire.id)
+        self.assertEqual(len(plan), 2)
+        self.assertEqual(plan[question.id].choices, {})
+
+        question.questionnaire.clear()
+        self.assertEqual(len(surveys_scoring.get_scoring_plan(questionnaire.id)), 1)
+
+    def test_cache_is_bounded(self):
+        """ Test that least recently used entry gets evicted. """
+
+        cache = surveys_scoring.LRUCache(maxsize=2)
+        cache.set(1, 'one')
+        cache.set(2, 'two')
+        cache.get(1)
+        cache.set(3, 'three')
+
+        self.assertEqual(cache.get(1), 'one')
+        self.assertIsNone(cache.get(2))
+        self.assertEqual(cache.get(3), 'three')
+
+
+class RescoringTestCase(SurveysAPITestCase):
+
+    def test_score_chunk(self):
+        """ Test vectorized scoring against the scores calculated at submission. """
+
+        weightages = np.array([0, 10, 55, 90])
+        response_ids = np.array([3, 7, 9])
+        answer_response_ids = np.array([3, 3, 7, 7, 7, 9])
+        # Text answer (code 0) is not part of the score.
+        answer_codes = np.array([1, 3, 2, 0, 2, 0])
+
+        scores, risk_levels = surveys_rescoring.score_chunk(
+            response_ids, answer_response_ids, answer_codes, weightages
+        )
+
+        self.assertEqual(scores.tolist(), [50, 55, 0])
+        self.assertEqual(
+            risk_levels.tolist(),
+            [surveys_scoring.get_risk_level(score) for score in (50, 55, 0)]
+        )
+
+    def test_rescore_questionnaire(self):
+        """ Test that stored scores are updated with the changed weightage. """
+
+        questionnaire = create_questionnaire()
+        for answer in ('choice 90.00', 'choice 10.00'):
+            self.client.post(
+                reverse('surveys:submit'),
+                data=get_submission_data(questionnaire, answer=answer),
+                format='json'
+            )
+
+        surveys_models.Choice.objects.filter(
+            question__questionnaire=questionnaire, text='choice 90.00'
+        ).update(weightage=Decimal('40.00'))
+
+        processed, updated = surveys_rescoring.rescore_questionnaire(
+            questionnaire.id, chunk_size=1
+        )
+
+        self.assertEqual((processed, updated), (2, 1))
+        response = surveys_models.QuestionnaireResponse.objects.get(score=40)
+        self.assertEqual(
+            response.risk_level, surveys_models.QuestionnaireResponse.MEDIUM
+        )
+        self.assertTrue(
+            surveys_models.QuestionnaireResponse.objects.filter(score=10).exists()
+        )
+
+
+class ImportResponsesCommandTestCase(TransactionTestCase):
+
+    def setUp(self):
+        surveys_scoring.clear_scoring_plans()
+        self.user = G(AUTH_USER, email='employee@mail.com')
+        self.questionnaire = create_questionnaire()
+        self.questions = list(self.questionnaire.questions.order_by('id'))
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def write_file(self, name, content):
+        """ Method for writing content in a file of the temporary directory. """
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as file:
+            file.write(content)
+        return path
+
+    def test_import_ndjson(self):
+        """ Test importing submissions from a NDJSON file with an invalid record. """
+
+        records = [
+            {
+                'user': self.user.email,
+                'questionnaire': self.questionnaire.id,
+                'created_at': '2021-01-0%dT09:00:00' % day,
+                'question_responses': [
+                    {'question': question.id, 'user_input': 'choice 90.00'}
+                    for question in self.questions
+                ]
+            } for day in range(1, 6)
+        ]
+        records[2]['user'] = 'unknown@mail.com'
+        path = self.write_file(
+            'responses.ndjson', '\n'.join(json.dumps(record) for record in records)
+        )
+
+        call_command(
+            'import_responses', path, batch_size=2, commit_every=1,
+            stdout=open(os.devnull, 'w'), stderr=open(os.devnull, 'w')
+        )
+
+        responses = surveys_models.QuestionnaireResponse.objects.order_by('created_at')
+        self.assertEqual(responses.count(), 4)
+        self.assertEqual(
+            [response.created_at.day for response in responses], [1, 2, 4, 5]
+        )
+        self.assertEqual({response.score for response in responses}, {90})
+        self.assertEqual(surveys_models.QuestionResponse.objects.count(), 8)
+
+    def test_import_csv(self):
+        """ Test importing submissions from a CSV file having one answer per row. """
+
+        lines = ['submission,user,company,questionnaire,created_at,question,user_input']
+        for submission, answer in (('a', 'choice 10.00'), ('b', 'choice 90.00')):
+            for question in self.questions:
+                lines.append(
+                    f'{submission},{self.user.email},,{self.questionnaire.id},'
+                    f'2021-01-01T09:00:00,{question.id},{answer}'
+                )
+        path = self.write_file('responses.csv', '\n'.join(lines))
+
+        call_command('import_responses', path, stdout=open(os.devnull, 'w'))
+
+        self.assertEqual(
+            sorted(
+                surveys_models.QuestionnaireResponse.objects.values_list('score', flat=True)
+            ),
+            [10, 90]
+        )
+
+    def test_import_invalid_shapes(self):
+        """ Test lines not having the shape of a submission are reported with their line
+            numbers, without stopping the import.
+        """
+
+        record = {
+            'user': self.user.email,
+            'questionnaire': self.questionnaire.id,
+            'question_responses': [
+                {'question': question.id, 'user_input': 'choice 90.00'}
+                for question in self.questions
+            ]
+        }
+        lines = [
+            json.dumps(record), '[1, 2]', '"text"',
+            json.dumps(dict(record, question_responses=['choice 90.00'])),
+            json.dumps(dict(record, question_responses={'question': 1})),
+            json.dumps(record),
+        ]
+        path = self.write_file('responses.ndjson', '\n'.join(lines))
+        stderr = StringIO()
+
+        call_command(
+            'import_responses', path, stdout=open(os.devnull, 'w'), stderr=stderr
+        )
+
+        self.assertEqual(surveys_models.QuestionnaireResponse.objects.count(), 2)
+        self.assertEqual(
+            [line.split(':')[0] for line in stderr.getvalue().splitlines()],
+            ['Line 2', 'Line 3', 'Line 4', 'Line 5']
+        )
+
+    def test_import_csv_line_numbers(self):
+        """ Test invalid submissions of a CSV file are reported at their first line. """
+
+        lines = ['submission,user,company,questionnaire,created_at,question,user_input']
+        for submission, user in (('a', self.user.email), ('b', 'unknown@mail.com')):
+            for question in self.questions:
+                lines.append(
+                    f'{submission},{user},,{self.questionnaire.id},'
+                    f'2021-01-01T09:00:00,{question.id},choice 90.00'
+                )
+        path = self.write_file('responses.csv', '\n'.join(lines))
+        stderr = StringIO()
+
+        call_command('import_responses', path, stdout=open(os.devnull, 'w'), stderr=stderr)
+
+        self.assertEqual(
+            stderr.getvalue().splitlines(),
+            [f'Line {len(self.questions) + 2}: Unknown user unknown@mail.com.']
+        )
@@ -0,0 +1,162 @@
+import datetime
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from surveys import models as surveys_models
+
+DAY = 'day'
+WEEK = 'week'
+MONTH = 'month'
+BUCKETS = (DAY, WEEK, MONTH)
+
+# Cache key of the generation of the cached buckets, changed when closed buckets change,
+# i.e. on rescoring or on backdated submissions.
+GENERATION_KEY = 'risk-trend:generation'
+
+RISK_LEVEL_NAMES = {
+    surveys_models.QuestionnaireResponse.LOW: 'low',
+    surveys_models.QuestionnaireResponse.MEDIUM: 'medium',
+    surveys_models.QuestionnaireResponse.HIGH: 'high',
+}
+
+
+def get_bucket_start(date, bucket):
+    """ Returns first date of the bucket having the date. """
+    if bucket == WEEK:
+        return date - datetime.timedelta(days=date.weekday())
+    if bucket == MONTH:
+        return date.replace(day=1)
+    return date
+
+
+def get_next_bucket_start(date, bucket):
+    """ Returns first date of the bucket after the bucket starting at the date. """
+    if bucket == WEEK:
+        return date + datetime.timedelta(days=7)
+    if bucket == MONTH:
+        return (date + datetime.timedelta(days=32)).replace(day=1)
+    return date + datetime.timedelta(days=1)
+
+
+def get_bucket_starts(start, end, bucket):
+    """ Returns first dates of the buckets from the date start to end, both inclusive. """
+    bucket_starts = []
+    date = get_bucket_start(start, bucket)
+    while date <= end:
+        bucket_starts.append(date)
+        date = get_next_bucket_start(date, bucket)
+    return bucket_starts
+
+
+def get_start_of_day(date):
+    """ Returns aware datetime of the start of the date in the current time zone. """
+    return timezone.make_aware(datetime.datetime.combine(date, datetime.time()))
+
+
+def get_generation():
+    """ Returns the current generation of the cached buckets. """
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        generation = uuid.uuid4().hex
+        cache.add(GENERATION_KEY, generation, None)
+        generation = cache.get(GENERATION_KEY, generation)
+    return generation
+
+
+def invalidate_risk_trends():
+    """ Discards all the cached buckets. """
+    cache.set(GENERATION_KEY, uuid.uuid4().hex, None)
+
+
+def empty_bucket():
+    """ Returns counts of a bucket without submissions. """
+    bucket = {name: 0 for name in RISK_LEVEL_NAMES.values()}
+    bucket.update(count=0, score_sum=0)
+    return bucket
+
+
+def compute_buckets(company_id, questionnaire_id, bucket, start, end):
+    """ Returns counts of the submissions of each bucket from the date start until end.
+
+        Returns a dictionary of first date of the bucket to the number of submissions of
+        each risk level, total number of submissions and sum of their scores.
+    """
+
+    qs = surveys_models.QuestionnaireResponse.objects.filter(
+        company_id=company_id,
+        created_at__gte=get_start_of_day(start),
+        created_at__lt=get_start_of_day(end)
+    )
+    if questionnaire_id is not None:
+        qs = qs.filter(questionnaire_id=questionnaire_id)
+
+    rows = qs.annotate(
+        bucket=Trunc('created_at', bucket, tzinfo=timezone.get_current_timezone())
+    ).order_by().values('bucket', 'risk_level').annotate(
+        count=Count('id'), score_sum=Sum('score')
+    )
+
+    buckets = {}
+    for row in rows:
+        counts = buckets.setdefault(
+            timezone.localtime(row['bucket']).date(), empty_bucket()
+        )
+        counts[RISK_LEVEL_NAMES[row['risk_level']]] += row['count']
+        counts['count'] += row['count']
+        counts['score_sum'] += row['score_sum'] or 0
+    return buckets
+
+
+def get_risk_trend(company_id, questionnaire_id, bucket, start, end):
+    """ Returns counts of the submissions of a company by risk level for each bucket.
+
+        Buckets which are over are cached without expiry, only the current bucket and
+        the buckets missing in the cache are computed, with a single query.
+    """
+
+    bucket_starts = get_bucket_starts(start, end, bucket)
+    current_bucket = get_bucket_start(timezone.localdate(), bucket)
+    generation = get_generation()
+    keys = {
+        bucket_start: f'risk-trend:{generation}:{company_id}:{questionnaire_id}:'
+                      f'{bucket}:{bucket_start}'
+        for bucket_start in bucket_starts if bucket_start < current_bucket
+    }
+
+    cached = cache.get_many(keys.values())
+    buckets = {
+        bucket_start: cached[key]
+        for bucket_start, key in keys.items() if key in cached
+    }
+
+    missing = [
+        bucket_start for bucket_start in bucket_starts if bucket_start not in buckets
+    ]
+    if missing:
+        computed = compute_buckets(
+            company_id, questionnaire_id, bucket,
+            missing[0], get_next_bucket_start(missing[-1], bucket)
+        )
+        for bucket_start in missing:
+            buckets[bucket_start] = computed.get(bucket_start, empty_bucket())
+        cache.set_many(
+            {
+                keys[bucket_start]: buckets[bucket_start]
+                for bucket_start in missing if bucket_start in keys
+            },
+            settings.RISK_TREND_CACHE_TIMEOUT
+        )
+
+    trend = []
+    for bucket_start in bucket_starts:
+        counts = dict(buckets[bucket_start])
+        score_sum = counts.pop('score_sum')
+        counts['start'] = bucket_start
+        counts['mean_score'] = score_sum / counts['count'] if counts['count'] else None
+        trend.append(counts)
+    return trend
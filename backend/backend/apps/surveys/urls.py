@@ -36,6 +36,14 @@ urlpatterns = [
     path('', include(router.urls)),
     path('<int:company_id>/', include(available_questionaire_router.urls)),
     path('submit/', surveys_views.QuestionnaireSubmissionAPIView.as_view(), name='submit'),
+    path(
+        'submit/batch/',
+        surveys_views.QuestionnaireBatchSubmissionAPIView.as_view(), name='submit-batch'
+    ),
+    path(
+        'submit/receipt/<str:receipt>/',
+        surveys_views.SubmissionReceiptAPIView.as_view(), name='submit-receipt'
+    ),
     path(
         'tips/<int:responseId>/', surveys_views.TipsAPIVIew.as_view(), name='questionnaire-tips'
     ),
@@ -48,12 +56,32 @@ urlpatterns = [
     #     surveys_views.PunctualEmployeesAPIView.as_view(), name='punctual'
     # ),
     path(
-        'company/<int:pk>/corona/',
-        surveys_views.CoronaProneEmployeesAPIView.as_view(), name='corona'
+        'company/<int:company_id>/leaderboard/<int:qid>/',
+        surveys_views.RiskLeaderboardAPIView.as_view(), name='leaderboard'
+    ),
+    path(
+        'company/<int:company_id>/answers/<int:qid>/',
+        surveys_views.AnswerDistributionAPIView.as_view(), name='answer-distribution'
+    ),
+    path(
+        'company/<int:company_id>/risk-trend/',
+        surveys_views.RiskTrendAPIView.as_view(), name='risk-trend'
+    ),
+    path(
+        'company/<int:company_id>/percentiles/<int:qid>/',
+        surveys_views.ScorePercentilesAPIView.as_view(), name='percentiles'
+    ),
+    path(
+        'company/<int:company_id>/respondents/<int:qid>/',
+        surveys_views.UniqueRespondentsAPIView.as_view(), name='unique-respondents'
+    ),
+    path(
+        'company/<int:company_id>/completion/<int:qid>/',
+        surveys_views.QuestionnaireCompletionAPIView.as_view(), name='completion'
     ),
     path(
-        'company/<int:pk>/depress/',
-        surveys_views.DepressionProneEmployeesAPIView.as_view(), name='depress'
+        'company/<int:company_id>/export/',
+        surveys_views.CompanyResponsesExportAPIView.as_view(), name='export'
     ),
     path(
         'survey-counts/', surveys_views.SurveyCountAPIView.as_view(), name='survey-counts'
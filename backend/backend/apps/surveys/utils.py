@@ -1,59 +1,75 @@
 from django.conf import settings
-from django.core.mail import EmailMultiAlternatives
-from django.template.loader import render_to_string
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.urls import reverse_lazy
-from django.utils.html import strip_tags
 
+from commons.utils import send_bulk_mail
+from surveys import models as surveys_models
 
-def send_mandatory_questionnaire_info(user_emails, id, title, description):
-    """ Method to send the Email to the user about the mandatory questionnaires. """
+
+def send_mandatory_questionnaire_info(recipients, id, title, description, connection=None):
+    """ Method to send the Email to each of the users about the mandatory questionnaires.
+
+        recipients is an iterable of (email, name) pairs of the users.
+        Returns dictionary of email to the error of the users which failed.
+    """
 
     link = reverse_lazy('surveys:questionnaire-detail', kwargs={'pk': id})
     base = settings.FRONTEND_IP
 
-    html_content = render_to_string(
+    return send_bulk_mail(
+        'New Mandatory Questionnaire',
         'email_mandatory_questionnaire_info.html',
+        ((email, {'name': name}) for email, name in recipients),
         {
             'link': f'{base}{link}',
             'title': title,
             'description': description
-        }
-    )
-    text_content = strip_tags(html_content)
-
-    email = EmailMultiAlternatives(
-        'New Mandatory Questionnaire',
-        text_content,
-        settings.EMAIL_HOST_USER,
-        user_emails
+        },
+        connection=connection
     )
 
-    email.attach_alternative(html_content, 'text/html')
-    email.send()
 
+def send_questionnaire_notification_to_company(recipients, title, id, description):
+    """ Method to send the Email to each of the company admins about new questionnaire.
 
-def send_questionnaire_notification_to_company(company_admins_email, title, id, description):
-    """ Method to send the Email to the companies about new questionnaire. """
+        recipients is an iterable of (email, name) pairs of the company admins.
+        Returns dictionary of email to the error of the company admins which failed.
+    """
 
     link = reverse_lazy('surveys:questionnaire-detail', kwargs={'pk': id})
     base = settings.FRONTEND_IP
 
-    html_content = render_to_string(
+    return send_bulk_mail(
+        'New Questionnaire Added',
         'email_questionnaire_info.html',
+        ((email, {'name': name}) for email, name in recipients),
         {
             'link': f'{base}{link}',
             'title': title,
             'description': description
         }
     )
-    text_content = strip_tags(html_content)
 
-    email = EmailMultiAlternatives(
-        'New Questionnaire Added',
-        text_content,
-        settings.EMAIL_HOST_USER,
-        company_admins_email
-    )
 
-    email.attach_alternative(html_content, 'text/html')
-    email.send()
+def update_question_counts(questionnaire_ids=None):
+    """ Method to set question_count of the questionnaires from their questions.
+
+        Updates all the questionnaires if questionnaire_ids is None, only the
+        questionnaires having incorrect count are updated.
+        Returns the number of questionnaires updated.
+    """
+
+    counts = surveys_models.Questionnaire.questions.through.objects.filter(
+        questionnaire_id=OuterRef('id')
+    ).order_by().values('questionnaire_id').annotate(count=Count('id')).values('count')
+
+    qs = surveys_models.Questionnaire.all_objects.annotate(
+        actual_count=Coalesce(Subquery(counts), 0)
+    ).exclude(question_count=F('actual_count'))
+    if questionnaire_ids is not None:
+        qs = qs.filter(id__in=questionnaire_ids)
+
+    return surveys_models.Questionnaire.all_objects.filter(
+        id__in=list(qs.values_list('id', flat=True))
+    ).update(question_count=Coalesce(Subquery(counts), 0))
@@ -1,14 +1,30 @@
-from django.db.models import F, Q, Subquery, OuterRef, Exists, Count, Sum, IntegerField, Avg
-from django.db.models.functions import TruncDate
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q, Subquery, OuterRef, Exists, Count, Sum, IntegerField, Avg, FloatField
+from django.db.models.functions import Cast
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import parse_etags
 
 from rest_framework import viewsets, generics, mixins, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 
 from commons import constants as commons_constant
+from commons.decorators import idempotent
 from commons.permissions import IsEmailVerified
 from companies import models as companies_models
+from surveys import availability as surveys_availability
+from surveys import bundles as surveys_bundles
+from surveys import completions as surveys_completions
+from surveys import exports as surveys_exports
+from surveys import ingestion as surveys_ingestion
+from surveys import rollups as surveys_rollups
 from surveys import serializers as surveys_serializers
+from surveys import trends as surveys_trends
 from surveys import models as surveys_models
 from surveys.filters import QuestionResponseFilters, QuestionFilters
 from companies.permissions import IsCompanyAdmin
@@ -20,7 +36,36 @@ class QuestionnaireViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = surveys_serializers.QuestionnaireSerializer
     queryset = surveys_models.Questionnaire.objects.filter(
         is_published=True
-    ).annotate(count=Count('questions'))
+    )
+    lookup_value_regex = r'[0-9]+'
+
+    @action(detail=True, methods=['get'])
+    def bundle(self, request, pk=None):
+        """ Method for getting the questionnaire with its questions, choices and tips.
+
+            Bundle is served with a strong ETag of its content version, requests having
+            the current ETag in If-None-Match are replied with 304 Not Modified.
+        """
+
+        content_version = surveys_models.Questionnaire.objects.filter(
+            id=pk, is_published=True
+        ).values_list('content_version', flat=True).first()
+        if content_version is None:
+            raise NotFound()
+
+        etag = surveys_bundles.get_bundle_etag(pk, content_version)
+        if etag in parse_etags(request.META.get('HTTP_IF_NONE_MATCH', '')):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            bundle = surveys_bundles.get_bundle(pk, content_version)
+            if bundle is None:
+                raise NotFound()
+            etag = bundle.etag
+            response = HttpResponse(bundle.content, content_type='application/json')
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
 
 
 class AvailableQuestionnaireForCompanyViewSet(QuestionnaireViewSet):
@@ -31,29 +76,49 @@ class AvailableQuestionnaireForCompanyViewSet(QuestionnaireViewSet):
     permission_classes = [IsAuthenticated, IsEmailVerified, IsCompanyAdmin]
 
     def get_queryset(self):
-        return surveys_models.Questionnaire.objects.exclude(
-            company_questionnaires__company=self.kwargs['company_id']
-        ).annotate(count=Count('questions')).order_by('-created_at')
+        return surveys_models.Questionnaire.objects.filter(
+            id__in=surveys_availability.get_available_questionnaire_ids(
+                self.kwargs['company_id']
+            )
+        ).order_by('-created_at')
 
 
 class QuestionViewSet(viewsets.ReadOnlyModelViewSet):
     """ Viewset for readonly operations on Questions. """
     permission_classes = [IsAuthenticated, IsEmailVerified]
     serializer_class = surveys_serializers.QuestionSerializer
-    queryset = surveys_models.Question.objects.all()
+    queryset = surveys_models.Question.objects.prefetch_related('choices')
     filterset_class = QuestionFilters
 
 
 class QuestionnaireSubmissionAPIView(generics.GenericAPIView):
-    """ API View for submitting questionnaire response. """
+    """ API View for submitting questionnaire response.
+
+        With write behind ingestion enabled, the validated submission is queued and
+        a receipt is returned, which can be resolved with the receipt API.
+    """
     serializer_class = surveys_serializers.QuestionnaireResponseSerializer
     permission_classes = [IsAuthenticated, IsEmailVerified]
 
+    @idempotent
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(
             data=request.data, context={'request': request}
         )
         serializer.is_valid(raise_exception=True)
+
+        if settings.SUBMISSION_WRITE_BEHIND:
+            receipt = surveys_ingestion.enqueue_submission(
+                serializer.validated_data
+            )
+            return Response(
+                {
+                    commons_constant.RECEIPT: receipt,
+                    commons_constant.RESPONSE_MSG: commons_constant.SUBMISSION_QUEUED
+                },
+                status=status.HTTP_202_ACCEPTED
+            )
+
         questionnaire_response = serializer.save()
         return Response(
             {
@@ -65,6 +130,57 @@ class QuestionnaireSubmissionAPIView(generics.GenericAPIView):
         )
 
 
+class QuestionnaireBatchSubmissionAPIView(generics.GenericAPIView):
+    """ API View for submitting many questionnaire responses in one request. """
+    serializer_class = surveys_serializers.QuestionnaireResponseBatchSerializer
+    permission_classes = [IsAuthenticated, IsEmailVerified]
+
+    @idempotent
+    def post(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = []
+        for result in serializer.save():
+            if isinstance(result, surveys_models.QuestionnaireResponse):
+                results.append({
+                    'id': result.id,
+                    commons_constant.RISK_SCORE: result.score
+                })
+            else:
+                results.append({'errors': result})
+
+        # Multi status response if any of the submission is failed.
+        if any('errors' in result for result in results):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+
+        return Response(
+            {commons_constant.RESULTS: results},
+            status=response_status
+        )
+
+
+class SubmissionReceiptAPIView(generics.GenericAPIView):
+    """ API View for getting status of a submission queued for write behind ingestion. """
+    permission_classes = [IsAuthenticated, IsEmailVerified]
+
+    def get(self, request, *args, **kwargs):
+        """ Method for handling get requests. """
+        submission = surveys_ingestion.SubmissionQueue().get(kwargs['receipt'])
+
+        if submission is None or submission['user_id'] != request.user.id:
+            raise NotFound()
+
+        return Response({
+            commons_constant.RECEIPT: submission['receipt'],
+            commons_constant.STATUS: submission['status'],
+            'id': submission['response_id'],
+            commons_constant.RISK_SCORE: submission['score'],
+        })
+
+
 class TipsAPIVIew(generics.ListAPIView):
     """ API View for getting tips for a given response. """
     serializer_class = surveys_serializers.TipsSerializer
@@ -86,32 +202,15 @@ class PendingQuesitonnairesViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = surveys_serializers.PendingQuestionnairesSerializer
     permission_classes = [IsAuthenticated, IsEmailVerified]
 
-    def get_queryset(self):
-
-        # filter out company questionnaires, in which the user is involved.
-        qs = companies_models.CompanyQuestionnaire.objects.filter(
-            company__id__in=Subquery(
-                companies_models.Employee.objects.filter(
-                    user__id=self.request.user.id
-                ).values('company__id')
-            )
-        )
+    lookup_field = 'company_questionnaire'
 
-        # annotate to find whether current questionnaire response is attempted or not.
-        qs = qs.annotate(
-            attempted=Exists(
-                surveys_models.QuestionnaireResponse.objects.filter(
-                    user__id=self.request.user.id,
-                    company__id=OuterRef('company__id'),
-                    questionnaire__id=OuterRef('questionnaire__id'),
-                    created_at__gte=OuterRef('rule__last_notified')
-                )
-            )
-        )
+    def get_queryset(self):
+        """ Method for returning the queryset required for this viewset. """
 
-        # filter out the non attempted only company questionnaire.
-        qs = qs.filter(attempted=False)
-        return qs
+        # Inbox items are added on notification and removed on submission.
+        return surveys_models.InboxItem.objects.filter(
+            user_id=self.request.user.id, company_questionnaire__isnull=False
+        ).select_related('company_questionnaire__company', 'questionnaire')
 
 
 class MandatoryQuestionnairesViewSet(viewsets.ReadOnlyModelViewSet):
@@ -119,21 +218,15 @@ class MandatoryQuestionnairesViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = surveys_serializers.MandatoryQuestionnairesSerializer
     permission_classes = [IsAuthenticated, IsEmailVerified]
 
+    lookup_field = 'questionnaire'
+
     def get_queryset(self):
         """ Method for returning the queryset required for this viewset. """
-        qs = surveys_models.Questionnaire.objects.filter(
-            is_published=True, is_mandatory=True
-        )
-        qs = qs.annotate(
-            attempted=Exists(
-                surveys_models.QuestionnaireResponse.objects.filter(
-                    user__id=self.request.user.id,
-                    questionnaire__id=OuterRef('id'),
-                    company=None
-                )
-            )
-        )
-        return qs.filter(attempted=False)
+
+        # Inbox items are added on publishing and removed on submission.
+        return surveys_models.InboxItem.objects.filter(
+            user_id=self.request.user.id, company_questionnaire=None
+        ).select_related('questionnaire')
 
 
 class QuestionnaireResponseViewSet(viewsets.ReadOnlyModelViewSet):
@@ -169,24 +262,12 @@ class QuestionnaireFillRateAPIView(generics.ListAPIView):
         pk = self.kwargs['pk']
         qid = self.kwargs['qid']
 
-        # Filter out the questionnaireResponses belonging to given company and questionnaire.
-        qs = surveys_models.QuestionnaireResponse.objects.filter(
+        # Daily fill rates are updated on each submission, one row per date.
+        return surveys_models.DailyFillRate.objects.filter(
             company__id=pk, questionnaire__id=qid
-        )
-        # Annotating to get date out of the datetime field and Grouping by Data.
-        qs = qs.annotate(date=TruncDate('created_at')).values('date')
-        # Annotating to get count of entries having same date and ordering by date in Increasing order.
-        qs = qs.annotate(attempted_by=Count('id')).order_by('date')
-        # Annotating to get the count of employees who have'nt attempted.
-        qs = qs.annotate(
-            not_attempted_by=Subquery(
-                companies_models.Employee.objects.filter(
-                    company__id=pk, created_at__date__lte=OuterRef('date')
-                ).values('company').annotate(count=Count('company')).values('count'),
-                output_field=IntegerField()
-            ) - F('attempted_by')
-        )
-        return qs
+        ).annotate(
+            not_attempted_by=F('employee_count') - F('attempted_by')
+        ).values('date', 'attempted_by', 'not_attempted_by').order_by('date')
 
 
 # class PunctualEmployeesAPIView(generics.ListAPIView):
@@ -202,51 +283,293 @@ class QuestionnaireFillRateAPIView(generics.ListAPIView):
 #         return qs
 
 
-# corona prone employees
-class CoronaProneEmployeesAPIView(generics.ListAPIView):
-    """  API View for listing top 5 employees they may have Corona."""
-    serializer_class = surveys_serializers.PotentialEmployeesSerializer
-    permission_classes = [IsAuthenticated, IsEmailVerified]
+class QuestionnaireCompletionAPIView(generics.GenericAPIView):
+    """ API View for the completion of a questionnaire by the employees of a company in
+        the current notification period, with a page of the employees who haven't
+        submitted it.
 
-    def get_queryset(self):
-        pk = self.kwargs['pk']
-        qs = companies_models.Employee.objects.filter(company__id=pk)
-        qs = qs.annotate(
-            risk_score=Subquery(
-                surveys_models.QuestionnaireResponse.objects.filter(
-                    user__id=OuterRef('user__id'),
-                    questionnaire__title__iexact='corona',
-                    company__id=OuterRef('company__id')
-                ).order_by().values('company').annotate(avg=Avg('score')).values('avg'),
-                output_field=IntegerField()
-            )
+        Query parameters:-
+        1. limit: number of pending employees listed.
+        2. after: next cursor of the previous page, for listing the next page.
+    """
+    permission_classes = [IsAuthenticated, IsEmailVerified, IsCompanyAdmin]
+
+    def get(self, request, *args, **kwargs):
+        """ Method for handling get requests. """
+        params = surveys_serializers.QuestionnaireCompletionParamsSerializer(
+            data=request.query_params
+        )
+        params.is_valid(raise_exception=True)
+        limit = params.validated_data['limit']
+
+        company_questionnaire = companies_models.CompanyQuestionnaire.objects.filter(
+            company_id=kwargs['company_id'], questionnaire_id=kwargs['qid']
+        ).first()
+        if company_questionnaire is None:
+            raise NotFound()
+
+        employee_bits = surveys_completions.get_employee_bits(kwargs['company_id'])
+        completed_bits = surveys_completions.get_completed_bits(company_questionnaire)
+        employee_count = surveys_completions.count_bits(employee_bits)
+        completed_count = surveys_completions.count_bits(employee_bits & completed_bits)
+
+        # Pending employees are paged by their ordinal, one more is read for knowing
+        # whether there is a next page.
+        ordinals = surveys_completions.get_ordinals(
+            employee_bits & ~completed_bits,
+            after=params.validated_data.get('after'),
+            limit=limit + 1
         )
-        qs = qs.filter(~Q(risk_score=None)).order_by('-risk_score')[:5]
+        pending = companies_models.Employee.objects.filter(
+            company_id=kwargs['company_id'], ordinal__in=ordinals[:limit]
+        ).select_related('user').order_by('ordinal')
+
+        return Response({
+            commons_constant.PERIOD: company_questionnaire.period,
+            commons_constant.PERIOD_STARTED_AT: company_questionnaire.period_started_at,
+            commons_constant.EMPLOYEE_COUNT: employee_count,
+            commons_constant.COMPLETED_COUNT: completed_count,
+            commons_constant.COMPLETION_RATE:
+                completed_count / employee_count if employee_count else None,
+            commons_constant.PENDING: surveys_serializers.PendingEmployeeSerializer(
+                pending, many=True
+            ).data,
+            commons_constant.NEXT: ordinals[limit - 1] if len(ordinals) > limit else None,
+        })
 
-        return qs
 
+class RiskLeaderboardAPIView(generics.ListAPIView):
+    """ API View for listing the employees of a company having highest average risk score
+        in a questionnaire.
 
-class DepressionProneEmployeesAPIView(generics.ListAPIView):
-    """ API View for Depression prone employees. """
-    serializer_class = surveys_serializers.PotentialEmployeesSerializer
-    permission_classes = [IsAuthenticated, IsEmailVerified]
+        Query parameters:-
+        1. window: employees are ranked by the average score of their submissions in these
+           many days, today included, instead of all their submissions.
+        2. limit: number of employees listed.
+    """
+    serializer_class = surveys_serializers.RiskLeaderboardSerializer
+    permission_classes = [IsAuthenticated, IsEmailVerified, IsCompanyAdmin]
+
+    def get_serializer_class(self):
+        """ Method for getting the serializer of the ranking of all or windowed submissions. """
+        if getattr(self, 'window', None) is not None:
+            return surveys_serializers.WindowRiskLeaderboardSerializer
+        return self.serializer_class
 
     def get_queryset(self):
-        pk = self.kwargs['pk']
-        qs = companies_models.Employee.objects.filter(company__id=pk)
+        """ Method for getting the queryset for the view. """
+        params = surveys_serializers.RiskLeaderboardParamsSerializer(
+            data=self.request.query_params
+        )
+        params.is_valid(raise_exception=True)
+        self.window = params.validated_data.get('window')
+
+        # Score aggregates are updated on each submission.
+        qs = surveys_models.ScoreAggregate.objects.filter(
+            company_id=self.kwargs['company_id'],
+            questionnaire_id=self.kwargs['qid']
+        ).select_related('user')
+        # Listing only the current employees of the company.
         qs = qs.annotate(
-            risk_score=Subquery(
-                surveys_models.QuestionnaireResponse.objects.filter(
-                    user__id=OuterRef('user__id'),
-                    questionnaire__title__iexact='mental health',
-                    company__id=OuterRef('company__id')
-                ).order_by().values('company').annotate(avg=Avg('score')).values('avg'),
+            is_employee=Exists(
+                companies_models.Employee.objects.filter(
+                    user_id=OuterRef('user_id'), company_id=OuterRef('company_id')
+                )
+            )
+        ).filter(is_employee=True)
+
+        if self.window is None:
+            return qs.order_by('-average_score', 'id')[:params.validated_data['limit']]
+
+        # Average of the window is summed from the daily scores of its days.
+        start = timezone.localdate() - timedelta(days=self.window - 1)
+        daily_scores = surveys_models.DailyScore.objects.filter(
+            company_id=OuterRef('company_id'),
+            questionnaire_id=OuterRef('questionnaire_id'),
+            user_id=OuterRef('user_id'),
+            date__gte=start
+        ).order_by().values('user_id')
+        qs = qs.filter(
+            last_submitted_at__gte=surveys_trends.get_start_of_day(start)
+        ).annotate(
+            window_response_count=Subquery(
+                daily_scores.annotate(total=Sum('response_count')).values('total'),
                 output_field=IntegerField()
+            ),
+            window_score_sum=Subquery(
+                daily_scores.annotate(total=Sum('score_sum')).values('total'),
+                output_field=IntegerField()
+            ),
+        ).filter(window_response_count__gt=0).annotate(
+            window_average_score=Cast('window_score_sum', FloatField()) /
+            Cast('window_response_count', FloatField())
+        )
+        return qs.order_by('-window_average_score', 'id')[:params.validated_data['limit']]
+
+
+class AnswerDistributionAPIView(generics.GenericAPIView):
+    """ API View for the number of times each choice is answered for the questions of a
+        questionnaire by the employees of a company in a month.
+    """
+    permission_classes = [IsAuthenticated, IsEmailVerified, IsCompanyAdmin]
+
+    def get(self, request, *args, **kwargs):
+        """ Method for handling get requests. """
+        params = surveys_serializers.AnswerDistributionParamsSerializer(
+            data=request.query_params
+        )
+        params.is_valid(raise_exception=True)
+        period = params.validated_data.get(
+            'period', surveys_rollups.get_period(timezone.now())
+        )
+
+        # Answer counts are updated on each submission.
+        answer_counts = surveys_models.AnswerCount.objects.filter(
+            company_id=kwargs['company_id'],
+            questionnaire_id=kwargs['qid'],
+            period=period
+        ).order_by('question_id', '-count', 'answer').values_list(
+            'question_id', 'answer', 'count'
+        )
+
+        questions = {}
+        for question_id, answer, count in answer_counts:
+            questions.setdefault(question_id, []).append(
+                {commons_constant.ANSWER: answer, commons_constant.ANSWER_COUNT: count}
             )
+
+        return Response({
+            commons_constant.PERIOD: period,
+            commons_constant.QUESTIONS: [
+                {commons_constant.QUESTION: question_id, commons_constant.ANSWERS: answers}
+                for question_id, answers in questions.items()
+            ],
+        })
+
+
+class RiskTrendAPIView(generics.GenericAPIView):
+    """ API View for the number of submissions of each risk level and mean score of a
+        company's submissions in each day, week or month.
+
+        Query parameters bucket (day, week or month), questionnaire, start and end.
+    """
+    permission_classes = [IsAuthenticated, IsEmailVerified, IsCompanyAdmin]
+
+    def get(self, request, *args, **kwargs):
+        """ Method for handling get requests. """
+        params = surveys_serializers.RiskTrendParamsSerializer(
+            data=request.query_params
         )
-        qs = qs.filter(~Q(risk_score=None)).order_by('-risk_score')[:5]
+        params.is_valid(raise_exception=True)
+
+        return Response({
+            commons_constant.BUCKET: params.validated_data['bucket'],
+            commons_constant.RESULTS: surveys_trends.get_risk_trend(
+                kwargs['company_id'],
+                params.validated_data.get('questionnaire'),
+                params.validated_data['bucket'],
+                params.validated_data['start'],
+                params.validated_data['end'],
+            ),
+        })
 
-        return qs
+
+class ScorePercentilesAPIView(generics.GenericAPIView):
+    """ API View for the percentiles of risk scores of a company's submissions of a
+        questionnaire in a range of months.
+
+        Query parameters start and end (YYYY-MM) and percentile, which can be repeated.
+    """
+    permission_classes = [IsAuthenticated, IsEmailVerified, IsCompanyAdmin]
+
+    def get(self, request, *args, **kwargs):
+        """ Method for handling get requests. """
+        params = surveys_serializers.ScorePercentilesParamsSerializer(
+            data=request.query_params
+        )
+        params.is_valid(raise_exception=True)
+
+        count, scores = surveys_rollups.get_percentiles(
+            kwargs['company_id'],
+            kwargs['qid'],
+            params.validated_data['start'],
+            params.validated_data['end'],
+            params.validated_data['percentile'],
+        )
+        return Response({
+            commons_constant.RESPONSE_COUNT: count,
+            commons_constant.PERCENTILES: [
+                {
+                    commons_constant.PERCENTILE: percentile,
+                    commons_constant.RISK_SCORE: score
+                } for percentile, score in scores.items()
+            ],
+        })
+
+
+class UniqueRespondentsAPIView(generics.GenericAPIView):
+    """ API View for the estimated number of unique users who have submitted a
+        questionnaire for a company between start and end dates.
+
+        Count is estimated from the daily HyperLogLog sketches, having about 1.6%
+        standard error.
+    """
+    permission_classes = [IsAuthenticated, IsEmailVerified, IsCompanyAdmin]
+
+    def get(self, request, *args, **kwargs):
+        """ Method for handling get requests. """
+        params = surveys_serializers.UniqueRespondentsParamsSerializer(
+            data=request.query_params
+        )
+        params.is_valid(raise_exception=True)
+
+        return Response({
+            commons_constant.START: params.validated_data['start'],
+            commons_constant.END: params.validated_data['end'],
+            commons_constant.UNIQUE_RESPONDENTS: surveys_rollups.count_respondents(
+                kwargs['company_id'],
+                kwargs['qid'],
+                params.validated_data['start'],
+                params.validated_data['end'],
+            ),
+        })
+
+
+class CompanyResponsesExportAPIView(generics.GenericAPIView):
+    """ API View for downloading answers of the questionnaire responses of a company as csv.
+
+        Query parameters questionnaire, start and end (dates, inclusive) filter the
+        responses. Csv is streamed while it is read from the database, gzip compressed
+        if the client accepts it.
+    """
+    permission_classes = [IsAuthenticated, IsEmailVerified, IsCompanyAdmin]
+
+    def get(self, request, *args, **kwargs):
+        """ Method for handling get requests. """
+        params = surveys_serializers.ResponseExportParamsSerializer(
+            data=request.query_params
+        )
+        params.is_valid(raise_exception=True)
+
+        chunks = surveys_exports.stream_csv(
+            surveys_exports.get_export_rows(
+                kwargs['company_id'],
+                questionnaire_id=params.validated_data.get('questionnaire'),
+                start=params.validated_data.get('start'),
+                end=params.validated_data.get('end'),
+            )
+        )
+        is_gzip = 'gzip' in request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if is_gzip:
+            chunks = surveys_exports.stream_gzip(chunks)
+
+        response = StreamingHttpResponse(chunks, content_type='text/csv')
+        if is_gzip:
+            response['Content-Encoding'] = 'gzip'
+        response['Vary'] = 'Accept-Encoding'
+        response['Content-Disposition'] = \
+            f'attachment; filename="responses-{kwargs["company_id"]}.csv"'
+        return response
 
 
 class SurveyCountAPIView(generics.GenericAPIView):
@@ -1,3 +1,4 @@
+from celery.schedules import crontab
 from configurations import Configuration
 
 
@@ -112,6 +113,20 @@ class Base(Configuration):
         },
     ]
 
+    # Cache shared by all the web and celery processes, so that an invalidation made by
+    # one process is seen by the others. Using the Redis server of the message broker.
+    # https://github.com/jazzband/django-redis
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': 'redis://127.0.0.1:6379/1',
+            'OPTIONS': {
+                'CLIENT_CLASS': 'django_redis.client.DefaultClient',
+            },
+        }
+    }
+
     # Internationalization
     # https://docs.djangoproject.com/en/2.2/topics/i18n/
 
@@ -133,3 +148,110 @@ class Base(Configuration):
     MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
     MEDIA_URL = '/media/'
+
+    # Celery beat schedule for the periodic tasks of the apps.
+    CELERY_BEAT_SCHEDULE = {
+        'dispatch-due-questionnaire-rules': {
+            'task': 'companies.tasks.dispatch_due_rules_async',
+            'schedule': crontab(),
+        },
+        'relay-outbox-events': {
+            'task': 'commons.tasks.relay_outbox_events_async',
+            'schedule': 10.0,
+        },
+        'drain-submission-queue': {
+            'task': 'surveys.tasks.drain_submission_queue_async',
+            'schedule': 5.0,
+        },
+        'delete-expired-idempotency-keys': {
+            'task': 'commons.tasks.delete_expired_idempotency_keys',
+            'schedule': 3600.0,
+        },
+        'write-analytics-snapshots': {
+            'task': 'surveys.tasks.write_analytics_snapshots_async',
+            'schedule': crontab(hour=2, minute=0),
+        },
+    }
+
+    # Number of questionnaire scoring plans cached in memory by each process.
+    SCORING_PLAN_CACHE_SIZE = 128
+
+    # Maximum number of submissions accepted by the batch submission API.
+    SUBMISSION_BATCH_MAX_SIZE = 100
+
+    # Number of questionnaire responses rescored at once and updated per statement
+    # on change of choice weightages.
+    RESCORE_CHUNK_SIZE = 5000
+    RESCORE_UPDATE_BATCH_SIZE = 1000
+
+    # Write behind ingestion of questionnaire submissions. When enabled, submissions
+    # are validated and queued in the local queue file and written to the database
+    # in batches by drain_submission_queue_async.
+    SUBMISSION_WRITE_BEHIND = False
+    SUBMISSION_QUEUE_PATH = os.path.join(BASE_DIR, 'submission_queue.sqlite3')
+    SUBMISSION_QUEUE_BATCH_SIZE = 500
+    # Seconds after which submissions claimed by a stopped worker are claimed again.
+    SUBMISSION_QUEUE_CLAIM_TIMEOUT = 300
+
+    # Seconds for which responses of requests having Idempotency-Key header are replayed.
+    IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+    # Seconds after which a key of a request stopped before responding can be claimed again,
+    # longer than the request timeout.
+    IDEMPOTENCY_KEY_LOCK_TIMEOUT = 5 * 60
+
+    # Seconds for which rendered questionnaire bundles are cached.
+    QUESTIONNAIRE_BUNDLE_CACHE_TIMEOUT = 24 * 60 * 60
+
+    # Seconds for which ids of questionnaires available to a company are cached.
+    AVAILABLE_QUESTIONNAIRES_CACHE_TIMEOUT = 60 * 60
+
+    # Default and maximum number of employees listed in the risk leaderboard.
+    LEADERBOARD_DEFAULT_SIZE = 5
+    LEADERBOARD_MAX_SIZE = 100
+
+    # Default and maximum number of pending employees listed in a page of the completion
+    # of a questionnaire.
+    COMPLETION_PENDING_DEFAULT_SIZE = 100
+    COMPLETION_PENDING_MAX_SIZE = 1000
+
+    # Number of rows fetched at once while exporting questionnaire responses.
+    EXPORT_CHUNK_SIZE = 2000
+
+    # Directory of the nightly columnar snapshots of the companies' responses, and
+    # number of rows read at once while writing them.
+    ANALYTICS_SNAPSHOT_DIR = os.path.join(BASE_DIR, 'analytics')
+    ANALYTICS_SNAPSHOT_CHUNK_SIZE = 10000
+
+    # Number of buckets returned by the risk trend API by default and at most.
+    RISK_TREND_DEFAULT_BUCKETS = 30
+    RISK_TREND_MAX_BUCKETS = 400
+
+    # Seconds for which the closed buckets of the risk trend are cached, in case an
+    # invalidation is missed.
+    RISK_TREND_CACHE_TIMEOUT = 24 * 60 * 60
+
+    # Percentiles returned by the score percentiles API by default, and maximum number
+    # of percentiles in a request.
+    SCORE_PERCENTILES_DEFAULT = [50, 90, 99]
+    SCORE_PERCENTILES_MAX_SIZE = 20
+
+    # Number of emails sent at once by the bulk mailer over a single connection.
+    BULK_EMAIL_CHUNK_SIZE = 100
+
+    # Number of users in a chunk of the mandatory questionnaire email, and number of
+    # chunks sent at a time.
+    MAIL_FANOUT_CHUNK_SIZE = 1000
+    MAIL_FANOUT_CONCURRENCY = 4
+    # Seconds after which a chunk being sent without progress is taken as stopped, and
+    # can be sent again by resuming the fanout.
+    MAIL_FANOUT_CHUNK_TIMEOUT = 10 * 60
+
+    # Seconds after which the tasks enqueued in the outbox are relayed to the broker,
+    # and number of tasks sent at once by the relay. Outbox is also relayed by the
+    # celery beat, in case a scheduled relay is lost.
+    OUTBOX_RELAY_DELAY = 1
+    OUTBOX_RELAY_BATCH_SIZE = 500
+
+    # Number of employees fetched at once while sending the questionnaire notification
+    # of a company.
+    NOTIFICATION_RECIPIENT_CHUNK_SIZE = 1000